@@ -1,3 +1,23 @@
 from django.contrib import admin
 
-# Register your models here.
+from accounts.models import UserProfile, HandicapRecord
+
+
+class UserProfileAdmin(admin.ModelAdmin):
+    list_display = ('family_name', 'first_name', 'department', 'user')
+    list_select_related = ('user',)
+    list_filter = ('department',)
+    search_fields = ('^family_name', '^first_name')
+
+
+class HandicapRecordAdmin(admin.ModelAdmin):
+    list_display = ('user_profile', 'date_played', 'score_differential', 'handicap_index')
+    list_select_related = ('user_profile',)
+    search_fields = ('^user_profile__family_name', '^user_profile__first_name')
+    date_hierarchy = 'date_played'
+    autocomplete_fields = ('user_profile',)
+    readonly_fields = ('handicap_index',)
+
+
+admin.site.register(UserProfile, UserProfileAdmin)
+admin.site.register(HandicapRecord, HandicapRecordAdmin)
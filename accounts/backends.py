@@ -0,0 +1,11 @@
+from django.contrib.auth.backends import ModelBackend
+
+from accounts import identity
+
+
+class CachedModelBackend(ModelBackend):
+    """ `ModelBackend` loading the user of the session from the identity cache. """
+
+    def get_user(self, user_id):
+        user = identity.get_user(user_id)
+        return user if self.user_can_authenticate(user) else None
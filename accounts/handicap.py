@@ -0,0 +1,98 @@
+"""
+Batch engine computing the World Handicap System index of the members from their `HandicapRecord` history.
+
+The history of every member is read with a single query, the index after each round is computed in memory and only
+the records whose index changed are written back with one bulk update. The current index of a member is cached so
+that snapshots (e.g. when registering to a tournament) are a constant time lookup. The cached indexes are dropped as
+soon as they are recomputed and only written again once the transaction is committed, a rolled back update leaves no
+index in the cache.
+"""
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from django.core.cache import cache
+from django.db import transaction
+
+from accounts import utils
+from accounts.models import HandicapRecord
+
+CACHE_KEY = 'handicap-index:{}'
+# the indexes are invalidated on every change, the timeout only bounds the life of an entry written by mistake
+CACHE_TIMEOUT = 24 * 60 * 60
+DEFAULT_HANDICAP_INDEX = utils.MAX_HANDICAP_INDEX
+LOW_INDEX_PERIOD = datetime.timedelta(days=365)
+
+_MISSING = object()
+
+
+def _compute_history(records: List[HandicapRecord]) -> List[HandicapRecord]:
+    """ Compute the index after each round of a member (records ordered from the oldest to the newest).
+    :return: the records whose handicap index changed.
+    """
+    changed = []
+    differentials = []
+    established = []  # (date, index) of the indexes computed so far, used for the low handicap index
+    for record in records:
+        differentials.append(record.score_differential)
+        index = utils.handicap_index(differentials)
+        if index is not None and len(differentials) >= utils.WINDOW_SIZE:
+            # the caps only apply once the member has a full scoring record
+            since = record.date_played - LOW_INDEX_PERIOD
+            previous = [value for date, value in established if date >= since]
+            index = utils.apply_caps(index, min(previous) if previous else None)
+        elif index is not None:
+            index = min(index, utils.MAX_HANDICAP_INDEX)
+        if index is not None:
+            established.append((record.date_played, index))
+        if record.handicap_index != index:
+            record.handicap_index = index
+            changed.append(record)
+    return changed
+
+
+@transaction.atomic
+def update_handicap_indexes(profile_ids: Optional[Iterable[int]] = None) -> Dict[int, Optional[Decimal]]:
+    """ Recompute the handicap indexes of the given members, or of all members when no ids are given.
+    :return: the current handicap index per member id (None if the member has not enough rounds).
+    """
+    records = (HandicapRecord.objects
+               .order_by('user_profile_id', 'date_played', 'id')
+               .only('id', 'user_profile_id', 'date_played', 'score_differential', 'handicap_index'))
+    current = {}
+    if profile_ids is not None:
+        profile_ids = list(profile_ids)
+        records = records.filter(user_profile_id__in=profile_ids)
+        current = dict.fromkeys(profile_ids)
+
+    histories = defaultdict(list)
+    for record in records.iterator(chunk_size=2000):
+        histories[record.user_profile_id].append(record)
+
+    changed = []
+    for profile_id, history in histories.items():
+        changed += _compute_history(history)
+        current[profile_id] = next((r.handicap_index for r in reversed(history) if r.handicap_index is not None),
+                                   None)
+    HandicapRecord.objects.bulk_update(changed, ['handicap_index'], batch_size=500)
+
+    indexes = {CACHE_KEY.format(profile_id): index for profile_id, index in current.items()}
+    cache.delete_many(indexes)
+    transaction.on_commit(lambda: cache.set_many(indexes, timeout=CACHE_TIMEOUT))
+    return current
+
+
+def get_current_handicap_index(profile_id: int) -> Decimal:
+    """ Current handicap index of a member, served from the cache. Members without index get the maximum, plus
+    handicaps (negative indexes) count as 0, the lowest handicap of a competitor. """
+    key = CACHE_KEY.format(profile_id)
+    index = cache.get(key, _MISSING)
+    if index is _MISSING:
+        index = (HandicapRecord.objects
+                 .filter(user_profile_id=profile_id, handicap_index__isnull=False)
+                 .order_by('-date_played', '-id')
+                 .values_list('handicap_index', flat=True)
+                 .first())
+        cache.set(key, index, timeout=CACHE_TIMEOUT)
+    return DEFAULT_HANDICAP_INDEX if index is None else max(index, utils.MIN_HANDICAP_INDEX)
@@ -0,0 +1,43 @@
+"""
+Cache of the identity of the members: the `User` of a session with its `UserProfile`, loaded with one query and kept
+in the cache until either of them is saved or deleted (see accounts.signals).
+
+`CachedModelBackend` serves `request.user` from it and `ProfileMiddleware` gives `request.profile`, so that with
+cached sessions an authenticated request makes no query to identify the member.
+"""
+from typing import Optional
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from accounts.models import UserProfile
+
+CACHE_KEY = 'accounts:identity:{}'
+# the signals only invalidate the cache of the worker saving the user when the cache is not shared by the workers:
+# the changes made in another worker (e.g. a deactivated account) are seen after this delay at most
+CACHE_TIMEOUT = 5 * 60
+
+
+def get_user(user_id):
+    """ The user with its profile (`user.userprofile` makes no query), `None` if there is no such user. """
+    key = CACHE_KEY.format(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = get_user_model()._default_manager.select_related('userprofile').filter(pk=user_id).first()
+        if user is None:
+            return None
+        cache.set(key, user, CACHE_TIMEOUT)
+    return user
+
+
+def invalidate(user_id):
+    cache.delete(CACHE_KEY.format(user_id))
+
+
+def get_profile(user) -> Optional[UserProfile]:
+    if not user.is_authenticated:
+        return None
+    try:
+        return user.userprofile
+    except UserProfile.DoesNotExist:
+        return None
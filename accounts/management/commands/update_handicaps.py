@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from accounts import handicap
+
+
+class Command(BaseCommand):
+    help = 'Recompute the handicap index history of all members (or of the given member ids).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('profile_ids', nargs='*', type=int, help='UserProfile ids, all members if omitted')
+
+    def handle(self, *args, **options):
+        indexes = handicap.update_handicap_indexes(options['profile_ids'] or None)
+        self.stdout.write(self.style.SUCCESS(f'Updated the handicap index of {len(indexes)} member(s).'))
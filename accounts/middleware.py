@@ -0,0 +1,15 @@
+from django.utils.functional import SimpleLazyObject
+
+from accounts import identity
+
+
+class ProfileMiddleware:
+    """ `request.profile`: the `UserProfile` of the authenticated member, loaded on first use. It is falsy for the
+    anonymous users and the users without profile. """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.profile = SimpleLazyObject(lambda: identity.get_profile(request.user))
+        return self.get_response(request)
@@ -0,0 +1,21 @@
+# Generated by Django 4.2 on 2026-10-19 10:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['family_name', 'first_name'], name='accounts_us_family__783413_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['first_name'], name='accounts_us_first_n_9eeba5_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2 on 2026-10-19 10:45
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_userprofile_name_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HandicapRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date_played', models.DateField(default=django.utils.timezone.now)),
+                ('adjusted_gross_score', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('course_rating', models.DecimalField(blank=True, decimal_places=1, max_digits=3, null=True)),
+                ('slope_rating', models.PositiveSmallIntegerField(default=113, validators=[django.core.validators.MinValueValidator(55), django.core.validators.MaxValueValidator(155)])),
+                ('pcc', models.SmallIntegerField(default=0, help_text='Playing conditions calculation of the day', validators=[django.core.validators.MinValueValidator(-1), django.core.validators.MaxValueValidator(3)])),
+                ('score_differential', models.DecimalField(blank=True, decimal_places=1, max_digits=4)),
+                ('handicap_index', models.DecimalField(blank=True, decimal_places=1, max_digits=3, null=True)),
+                ('user_profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='handicap_records', to='accounts.userprofile')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='handicaprecord',
+            index=models.Index(fields=['user_profile', 'date_played', 'id'], name='accounts_ha_user_pr_3c5cbf_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2 on 2026-10-19 13:04
+
+from django.db import migrations, models
+import django.db.models.functions.comparison
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_handicaprecord'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='userprofile',
+            name='accounts_us_family__783413_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='userprofile',
+            name='accounts_us_first_n_9eeba5_idx',
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(django.db.models.functions.comparison.Collate('family_name', 'nocase'), name='profile_family_name_nocase'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(django.db.models.functions.comparison.Collate('first_name', 'nocase'), name='profile_first_name_nocase'),
+        ),
+    ]
@@ -1,8 +1,14 @@
+from django.core.exceptions import ValidationError
+from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 from phonenumber_field import modelfields
 from django.db import models
+from django.db.models.functions import Collate
 
 from django.conf import settings
 
+from accounts import utils
+
 
 User = settings.AUTH_USER_MODEL
 
@@ -14,9 +20,52 @@ class UserProfile(models.Model):
     department = models.CharField(max_length=20)
     phone_number = modelfields.PhoneNumberField()
 
+    class Meta:
+        # the prefix searches of the admin (`istartswith`) are a case-insensitive `LIKE` on SQLite, which can only use
+        # an index of the column in the NOCASE collation
+        indexes = [
+            models.Index(Collate('family_name', 'nocase'), name='profile_family_name_nocase'),
+            models.Index(Collate('first_name', 'nocase'), name='profile_first_name_nocase'),
+        ]
+
     def __str__(self):
         return f'{self.first_name} {self.family_name}'
 
     def is_registered(self, tournament_pk: int) -> bool:
-        # Check if the UserProfile is registered to the tournament using 'competitors' related_name
-        return self.competitors.filter(pk=tournament_pk).exists()
+        # imported here: the module imports the models of the tournaments app
+        from accounts import registrations
+        return tournament_pk in registrations.registered_tournament_ids(self.pk)
+
+
+class HandicapRecord(models.Model):
+    """ A played round relevant for the handicap of a member, with the handicap index computed after it. """
+    user_profile = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='handicap_records')
+    date_played = models.DateField(default=timezone.now)
+    adjusted_gross_score = models.PositiveSmallIntegerField(null=True, blank=True)
+    course_rating = models.DecimalField(max_digits=3, decimal_places=1, null=True, blank=True)
+    slope_rating = models.PositiveSmallIntegerField(default=113,
+                                                    validators=[MinValueValidator(55), MaxValueValidator(155)])
+    pcc = models.SmallIntegerField(default=0, validators=[MinValueValidator(-1), MaxValueValidator(3)],
+                                   help_text='Playing conditions calculation of the day')
+    score_differential = models.DecimalField(max_digits=4, decimal_places=1, blank=True)
+    # index after this round, filled by the batch engine in accounts.handicap
+    handicap_index = models.DecimalField(max_digits=3, decimal_places=1, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user_profile', 'date_played', 'id']),
+        ]
+
+    def __str__(self):
+        return f'{self.user_profile}: {self.score_differential} ({self.date_played})'
+
+    def clean(self):
+        if self.score_differential is None and (self.adjusted_gross_score is None or self.course_rating is None):
+            raise ValidationError('Either a score differential or an adjusted gross score and course rating '
+                                  'are required.')
+
+    def save(self, *args, **kwargs):
+        if self.adjusted_gross_score is not None and self.course_rating is not None:
+            self.score_differential = utils.score_differential(self.adjusted_gross_score, self.course_rating,
+                                                               self.slope_rating, self.pcc)
+        super().save(*args, **kwargs)
@@ -0,0 +1,30 @@
+"""
+Cache of the tournaments a member is registered to, so that a page listing tournaments shows the registration status
+of every row from one set instead of one `exists()` query per tournament.
+
+The set is invalidated when a registration of the member is created or deleted (see accounts.signals) and by the bulk
+operations, which send no signals.
+"""
+from typing import FrozenSet, Iterable
+
+from django.core.cache import cache
+
+from tournaments.models import Competitor
+
+CACHE_KEY = 'accounts:registrations:{}'
+# as for the identity cache, the signals only invalidate the cache of the worker making the change
+CACHE_TIMEOUT = 5 * 60
+
+
+def registered_tournament_ids(profile_pk: int) -> FrozenSet[int]:
+    key = CACHE_KEY.format(profile_pk)
+    tournament_ids = cache.get(key)
+    if tournament_ids is None:
+        tournament_ids = frozenset(Competitor.objects.filter(user_profile_id=profile_pk)
+                                   .values_list('tournament_id', flat=True))
+        cache.set(key, tournament_ids, CACHE_TIMEOUT)
+    return tournament_ids
+
+
+def invalidate(profile_pks: Iterable[int]):
+    cache.delete_many([CACHE_KEY.format(profile_pk) for profile_pk in profile_pks])
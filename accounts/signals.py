@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from accounts import handicap, identity, registrations
+from accounts.models import HandicapRecord, UserProfile
+from tournaments.models import Competitor
+
+
+@receiver(post_save, sender=HandicapRecord)
+@receiver(post_delete, sender=HandicapRecord)
+def update_member_handicap(sender, instance, **kwargs):
+    """ Keep the index history of the member up to date as rounds are entered, edited or removed. """
+    handicap.update_handicap_indexes([instance.user_profile_id])
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_identity(sender, instance, **kwargs):
+    identity.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_profile_identity(sender, instance, **kwargs):
+    identity.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Competitor)
+@receiver(post_delete, sender=Competitor)
+def invalidate_registrations(sender, instance, **kwargs):
+    registrations.invalidate([instance.user_profile_id])
@@ -8,10 +8,14 @@ from django.contrib.auth import get_user
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.models import User, AnonymousUser
 from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.cache import cache
+from django.db import DatabaseError, connection, transaction
 from django.test import Client, TestCase, RequestFactory
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from accounts.models import UserProfile
+from accounts import handicap, identity, utils
+from accounts.models import UserProfile, HandicapRecord
 from accounts.views import login_view, register_view
 from app import settings
 from tournaments.models import Tournament, Competitor
@@ -152,3 +156,149 @@ class TestAccountManagement(TestCase):
 
         assert response.status_code == HTTPStatus.FOUND
         assert response.url == '/'
+
+
+class TestHandicapIndex(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username='john', password='test-password')
+        self.user_profile = UserProfile.objects.create(user=user, first_name='John', family_name='Doe',
+                                                       phone_number='+4915150505050')
+
+    def tearDown(self):
+        cache.clear()
+
+    def add_rounds(self, differentials, start=datetime.date(2024, 1, 1)):
+        HandicapRecord.objects.bulk_create([
+            HandicapRecord(user_profile=self.user_profile, date_played=start + datetime.timedelta(days=7 * i),
+                           score_differential=Decimal(differential))
+            for i, differential in enumerate(differentials)])
+
+    def test_score_differential(self):
+        assert utils.score_differential(95, Decimal('71.2'), 130) == Decimal('20.7')
+        assert utils.score_differential(72, Decimal('72.0')) == Decimal('0.0')
+
+    def test_handicap_index_counting_rules(self):
+        assert utils.handicap_index([Decimal('20.0')] * 2) is None
+        assert utils.handicap_index([Decimal('20.0'), Decimal('18.0'), Decimal('25.0')]) == Decimal('16.0')
+        # best 8 of the last 20 differentials
+        differentials = [Decimal(value) for value in range(30, 0, -1)]
+        assert utils.handicap_index(differentials) == Decimal('4.5')
+
+    def test_apply_caps(self):
+        assert utils.apply_caps(Decimal('12.0'), Decimal('10.0')) == Decimal('12.0')
+        # soft cap halves the increase above 3 strokes
+        assert utils.apply_caps(Decimal('14.0'), Decimal('10.0')) == Decimal('13.5')
+        # hard cap limits the increase to 5 strokes
+        assert utils.apply_caps(Decimal('20.0'), Decimal('10.0')) == Decimal('15.0')
+        assert utils.apply_caps(Decimal('60.0'), None) == utils.MAX_HANDICAP_INDEX
+
+    @pytest.mark.django_db
+    def test_update_handicap_indexes_batch(self):
+        self.add_rounds([30 - i for i in range(20)])
+        indexes = handicap.update_handicap_indexes()
+        assert indexes[self.user_profile.pk] == Decimal('14.5')
+        latest = HandicapRecord.objects.order_by('-date_played').first()
+        assert latest.handicap_index == Decimal('14.5')
+        assert not HandicapRecord.objects.filter(handicap_index__isnull=True).exclude(
+            date_played__lt=datetime.date(2024, 1, 15)).exists()
+
+    @pytest.mark.django_db
+    def test_new_round_updates_index_incrementally(self):
+        self.add_rounds([20] * 20)
+        handicap.update_handicap_indexes([self.user_profile.pk])
+        assert handicap.get_current_handicap_index(self.user_profile.pk) == Decimal('20.0')
+
+        HandicapRecord.objects.create(user_profile=self.user_profile, date_played=datetime.date(2024, 6, 1),
+                                      adjusted_gross_score=72, course_rating=Decimal('72.0'))
+        # the new round (differential 0.0) is among the 8 best ones
+        assert handicap.get_current_handicap_index(self.user_profile.pk) == Decimal('17.5')
+
+    @pytest.mark.django_db
+    def test_current_handicap_index_is_cached(self):
+        assert handicap.get_current_handicap_index(self.user_profile.pk) == handicap.DEFAULT_HANDICAP_INDEX
+        with self.assertNumQueries(0):
+            handicap.get_current_handicap_index(self.user_profile.pk)
+
+    @pytest.mark.django_db
+    def test_registration_snapshots_current_index(self):
+        self.add_rounds([12, 14, 16])
+        handicap.update_handicap_indexes()
+        tournament = Tournament.objects.create(date=datetime.datetime.now(), hcp_limit=34.0)
+
+        client = Client()
+        client.force_login(self.user_profile.user)
+        client.post(reverse('accounts:participate', args=[tournament.pk]))
+        assert Competitor.objects.get(tournament=tournament).hcp == Decimal('10.0')
+
+    @pytest.mark.django_db
+    def test_cached_index_written_on_commit_only(self):
+        key = handicap.CACHE_KEY.format(self.user_profile.pk)
+        self.add_rounds([12, 14, 16])
+        with self.captureOnCommitCallbacks(execute=True):
+            handicap.update_handicap_indexes()
+        assert cache.get(key) == Decimal('10.0')
+
+        with pytest.raises(DatabaseError), transaction.atomic():
+            self.add_rounds([2, 2, 2], start=datetime.date(2024, 6, 1))
+            handicap.update_handicap_indexes([self.user_profile.pk])
+            raise DatabaseError
+        assert cache.get(key, 'missing') == 'missing'
+        assert handicap.get_current_handicap_index(self.user_profile.pk) == Decimal('10.0')
+
+    @pytest.mark.django_db
+    def test_plus_handicap_snapshot_is_zero(self):
+        self.add_rounds([-3, -4, -5])
+        assert handicap.update_handicap_indexes()[self.user_profile.pk] == Decimal('-7.0')
+        assert handicap.get_current_handicap_index(self.user_profile.pk) == Decimal('0.0')
+
+
+class TestIdentityCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='john', password='test-password')
+        self.user_profile = UserProfile.objects.create(user=self.user, first_name='John', family_name='Doe',
+                                                       phone_number='+4915150505050')
+        self.tournament = Tournament.objects.create(date=datetime.datetime.now(), hcp_limit=34.0)
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    @pytest.mark.django_db
+    def test_authenticated_requests_make_no_identity_query(self):
+        url = reverse('tournaments:detail', args=[self.tournament.pk, 'overview'])
+        response = self.client.get(url)
+        assert response.wsgi_request.profile == self.user_profile
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        tables = ' '.join(query['sql'] for query in queries)
+        assert 'django_session' not in tables
+        assert 'auth_user' not in tables
+        assert 'accounts_userprofile' not in tables
+
+    @pytest.mark.django_db
+    def test_cache_invalidated_by_changes(self):
+        assert identity.get_user(self.user.pk).userprofile.first_name == 'John'
+        with self.assertNumQueries(0):
+            assert identity.get_user(self.user.pk).userprofile.family_name == 'Doe'
+
+        self.user_profile.first_name = 'Johnny'
+        self.user_profile.save()
+        assert identity.get_user(self.user.pk).userprofile.first_name == 'Johnny'
+
+        self.user.is_active = False
+        self.user.save()
+        assert self.client.get(reverse('tournaments:list')).status_code == HTTPStatus.FOUND
+
+        self.user.delete()
+        assert identity.get_user(self.user_profile.user_id) is None
+
+    @pytest.mark.django_db
+    def test_profile_of_anonymous_and_users_without_profile(self):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        assert identity.get_profile(request.user) is None
+        superuser = User.objects.create_superuser(username='admin', password='admin-password')
+        assert identity.get_profile(identity.get_user(superuser.pk)) is None
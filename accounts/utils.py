@@ -0,0 +1,66 @@
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Optional, Sequence
+
+MAX_HANDICAP_INDEX = Decimal('54.0')
+# lowest handicap of a competitor of a tournament
+MIN_HANDICAP_INDEX = Decimal('0.0')
+STANDARD_SLOPE = 113
+WINDOW_SIZE = 20
+
+# World Handicap System: number of lowest differentials used and adjustment, by number of differentials available
+_COUNTING_RULES = {
+    3: (1, Decimal('-2.0')),
+    4: (1, Decimal('-1.0')),
+    5: (1, Decimal('0')),
+    6: (2, Decimal('-1.0')),
+    7: (2, Decimal('0')),
+    8: (2, Decimal('0')),
+    9: (3, Decimal('0')),
+    10: (3, Decimal('0')),
+    11: (3, Decimal('0')),
+    12: (4, Decimal('0')),
+    13: (4, Decimal('0')),
+    14: (4, Decimal('0')),
+    15: (5, Decimal('0')),
+    16: (5, Decimal('0')),
+    17: (6, Decimal('0')),
+    18: (6, Decimal('0')),
+    19: (7, Decimal('0')),
+    20: (8, Decimal('0')),
+}
+
+
+def round_one_decimal(value) -> Decimal:
+    return Decimal(value).quantize(Decimal('0.1'), rounding=ROUND_HALF_UP)
+
+
+def score_differential(adjusted_gross_score: int, course_rating: Decimal, slope_rating: int = STANDARD_SLOPE,
+                       pcc: int = 0) -> Decimal:
+    """ Score differential of a round: (113 / slope) x (adjusted gross score - course rating - PCC) """
+    differential = (Decimal(STANDARD_SLOPE) / Decimal(slope_rating)) * (
+            Decimal(adjusted_gross_score) - Decimal(course_rating) - Decimal(pcc))
+    return round_one_decimal(differential)
+
+
+def handicap_index(differentials: Sequence[Decimal]) -> Optional[Decimal]:
+    """ Handicap index (uncapped) from the most recent differentials, oldest first.
+    :return: None as long as fewer than 3 differentials are available.
+    """
+    window = differentials[-WINDOW_SIZE:]
+    if len(window) not in _COUNTING_RULES:
+        return None
+    nr_counting, adjustment = _COUNTING_RULES[len(window)]
+    lowest = sorted(window)[:nr_counting]
+    return round_one_decimal(sum(lowest) / nr_counting + adjustment)
+
+
+def apply_caps(index: Decimal, low_handicap_index: Optional[Decimal]) -> Decimal:
+    """ Limit the increase of an index compared to the lowest index of the previous 365 days.
+    Soft cap: half of the increase above 3.0 strokes is kept. Hard cap: at most 5.0 strokes of increase.
+    """
+    if low_handicap_index is not None:
+        increase = index - low_handicap_index
+        if increase > 3:
+            increase = 3 + (increase - 3) / 2
+        index = round_one_decimal(low_handicap_index + min(increase, Decimal('5.0')))
+    return min(index, MAX_HANDICAP_INDEX)
@@ -1,13 +1,16 @@
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import AuthenticationForm
+from django.db import transaction
 from django.shortcuts import redirect, render, get_object_or_404
 from django.utils import timezone
 
+from accounts import handicap
 from accounts.forms import UserRegistrationForm
-from accounts.models import UserProfile
 from app import settings
-from tournaments.models import Tournament, Competitor
+from notifications import outbox
+from notifications.models import Notification
+from tournaments.models import Tournament, Competitor, WaitlistEntry
 
 
 def login_view(request):
@@ -44,21 +47,45 @@ def logout_view(request):
 
 @login_required
 def tournament_registration_view(request, pk: int):
-    tournament = get_object_or_404(Tournament, pk=pk)
-    user_profile = UserProfile.objects.get(user=request.user)
+    # archived tournaments are closed
+    tournament = get_object_or_404(Tournament, pk=pk, is_archived=False)
+    user_profile = request.profile
 
     if request.method == 'POST':
-        # identify the participation of the user to the tournament
-        competitor_instance = Competitor.objects.filter(tournament=tournament, user_profile=user_profile).first()
-        if competitor_instance:
-            # remove the user from the participant
-            competitor_instance.delete()
-        else:
-            # add the user to the participant
-            Competitor.objects.create(
-                tournament=tournament,
-                user_profile=user_profile,
-                registration_date=timezone.now().date(),
-                hcp=54.0  # TODO: create new registration form
-            )
-    return redirect('tournaments:detail', pk=tournament.pk, detail_page='overview')
\ No newline at end of file
+        with transaction.atomic():
+            # identify the participation of the user to the tournament
+            competitor_instance = Competitor.objects.filter(tournament=tournament, user_profile=user_profile).first()
+            waitlist_entry = WaitlistEntry.objects.filter(tournament=tournament, user_profile=user_profile).first()
+            if competitor_instance:
+                # remove the user from the participant
+                competitor_instance.delete()
+                outbox.notify(Notification.CANCELLATION, tournament, [user_profile.pk])
+                _register_from_waitlist(tournament)
+            elif waitlist_entry:
+                # leave the waitlist
+                waitlist_entry.delete()
+            elif tournament.competitor_set.count() >= tournament.max_participants:
+                WaitlistEntry.objects.create(tournament=tournament, user_profile=user_profile)
+                outbox.notify(Notification.WAITLIST, tournament, [user_profile.pk])
+            else:
+                # add the user to the participant
+                _register(tournament, user_profile.pk)
+    return redirect('tournaments:detail', pk=tournament.pk, detail_page='overview')
+
+
+def _register(tournament: Tournament, profile_pk: int):
+    Competitor.objects.create(
+        tournament=tournament,
+        user_profile_id=profile_pk,
+        registration_date=timezone.now().date(),
+        hcp=handicap.get_current_handicap_index(profile_pk)
+    )
+    outbox.notify(Notification.REGISTRATION, tournament, [profile_pk])
+
+
+def _register_from_waitlist(tournament: Tournament):
+    """ Give the free place to the first member of the waitlist. """
+    waitlist_entry = tournament.waitlist.first()
+    if waitlist_entry:
+        waitlist_entry.delete()
+        _register(tournament, waitlist_entry.user_profile_id)
@@ -0,0 +1,174 @@
+"""
+Resources of the read-only JSON API: the public fields of each model mapped to the lookups of `QuerySet.values()`,
+so that a response is built from one query returning only the selected columns, without model instances.
+
+The lists are paginated on a key (`Resource.ordering`) instead of an offset: the cursor of the next page holds the key of the
+last row returned, and the page is fetched with `WHERE key > cursor`, which uses the index and does not skip rows when
+tournaments are added meanwhile.
+"""
+import base64
+import json
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Q, QuerySet
+
+from tournaments.models import Competitor, GolfCourse, Tournament
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+class InvalidParameter(ValueError):
+    """ A query parameter of the request cannot be used, reported as a 400 response. """
+
+
+class Resource(NamedTuple):
+    # public name -> lookup of `values()`
+    fields: Dict[str, str]
+    default_fields: Tuple[str, ...]
+    # key of the keyset pagination, the last lookup unique
+    ordering: Tuple[str, ...]
+    annotations: Dict[str, object] = {}
+
+
+TOURNAMENT = Resource(
+    fields={
+        'id': 'id',
+        'slug': 'slug',
+        'date': 'date',
+        'tee_time': 'tee_time',
+        'course_id': 'course_id',
+        'course_name': 'course__name',
+        'hcp_limit': 'hcp_limit',
+        'hcp_relevant': 'hcp_relevant',
+        'max_participants': 'max_participants',
+        'participants_count': 'participants_count',
+        'comment': 'comment',
+        'updated_date': 'updated_date',
+    },
+    default_fields=('id', 'slug', 'date', 'tee_time', 'course_id', 'course_name', 'max_participants',
+                    'participants_count'),
+    ordering=('date', 'id'),
+    annotations={'participants_count': Count('participants')},
+)
+
+COURSE = Resource(
+    fields={
+        'id': 'id',
+        'name': 'name',
+        'address': 'address',
+        'zip_code': 'zip_code',
+        'city': 'city',
+        'country': 'country',
+        'telephone': 'telephone',
+        'email': 'email',
+        'greenfee_external': 'greenfee_external',
+        'greenfee_member': 'greenfee_member',
+    },
+    default_fields=('id', 'name', 'zip_code', 'city', 'country'),
+    ordering=('id',),
+)
+
+COMPETITOR = Resource(
+    fields={
+        'id': 'id',
+        'profile_id': 'user_profile_id',
+        'first_name': 'user_profile__first_name',
+        'family_name': 'user_profile__family_name',
+        'hcp': 'hcp',
+        'registration_date': 'registration_date',
+    },
+    default_fields=('id', 'profile_id', 'first_name', 'family_name', 'hcp'),
+    ordering=('id',),
+)
+
+
+def tournaments() -> QuerySet:
+    return Tournament.objects.filter(is_archived=False)
+
+
+def courses() -> QuerySet:
+    return GolfCourse.objects.all()
+
+
+def competitors(tournament_pk: int) -> QuerySet:
+    return Competitor.objects.filter(tournament_id=tournament_pk)
+
+
+def parse_fields(resource: Resource, value: Optional[str]) -> List[str]:
+    """ Fields selected by the `fields` parameter (comma separated), the default fields if there is none. """
+    if not value:
+        return list(resource.default_fields)
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in resource.fields]
+    if unknown:
+        raise InvalidParameter(f"Unknown fields: {', '.join(unknown)}. Available fields: "
+                               f"{', '.join(resource.fields)}")
+    return list(dict.fromkeys(fields))
+
+
+def parse_limit(value: Optional[str]) -> int:
+    if not value:
+        return DEFAULT_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        raise InvalidParameter('limit must be an integer')
+    if not 1 <= limit <= MAX_LIMIT:
+        raise InvalidParameter(f'limit must be between 1 and {MAX_LIMIT}')
+    return limit
+
+
+def encode_cursor(key: Sequence) -> str:
+    data = json.dumps([value.isoformat() if hasattr(value, 'isoformat') else value for value in key])
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(resource: Resource, cursor: str) -> list:
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except ValueError:
+        raise InvalidParameter('Invalid cursor')
+    if not isinstance(key, list) or len(key) != len(resource.ordering):
+        raise InvalidParameter('Invalid cursor')
+    return key
+
+
+def after(resource: Resource, key: Sequence) -> Q:
+    """ Rows after the key in the order of the resource: `(a, b) > (x, y)` as `a > x OR (a = x AND b > y)`. """
+    condition = Q()
+    for position, lookup in enumerate(resource.ordering):
+        equal = {previous: value for previous, value in zip(resource.ordering[:position], key)}
+        condition |= Q(**equal, **{f'{lookup}__gt': key[position]})
+    return condition
+
+
+def values(resource: Resource, queryset: QuerySet, fields: List[str]) -> QuerySet:
+    """ The rows as dicts of the selected fields and of the key of the resource, in the order of the key. """
+    lookups = [resource.fields[field] for field in fields]
+    annotations = {name: expression for name, expression in resource.annotations.items() if name in lookups}
+    if annotations:
+        queryset = queryset.annotate(**annotations)
+    return queryset.order_by(*resource.ordering).values(*dict.fromkeys(lookups + list(resource.ordering)))
+
+
+def serialize(resource: Resource, rows, fields: List[str]) -> List[dict]:
+    return [{field: row[resource.fields[field]] for field in fields} for row in rows]
+
+
+def page(resource: Resource, queryset: QuerySet, fields: List[str], limit: int,
+         cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+    """ One page of the rows after the cursor, with the cursor of the next page (`None` on the last page). """
+    if cursor:
+        try:
+            queryset = queryset.filter(after(resource, decode_cursor(resource, cursor)))
+        except (TypeError, ValueError, ValidationError):
+            raise InvalidParameter('Invalid cursor')
+    # one more row tells if there is a next page
+    rows = list(values(resource, queryset, fields)[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1][lookup] for lookup in resource.ordering])
+    return serialize(resource, rows, fields), next_cursor
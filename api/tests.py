@@ -0,0 +1,110 @@
+import datetime
+from decimal import Decimal
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from accounts.models import UserProfile
+from api import resources
+from tournaments.models import Competitor, GolfCourse, Tournament
+
+
+class TestApi(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='client', password='test-api')
+        UserProfile.objects.create(user=self.user, first_name='Api', family_name='Client')
+        self.course = GolfCourse.objects.create(name='Golfclub Schönbuch', city='Holzgerlingen', zip_code=71088)
+        start = datetime.date(2030, 4, 1)
+        self.tournaments = [Tournament.objects.create(date=start + datetime.timedelta(days=7 * (number // 2)),
+                                                      course=self.course, hcp_limit=36.0)
+                            for number in range(7)]
+        self.tournament = self.tournaments[0]
+        for number in range(6):
+            user = User.objects.create_user(username=f'member{number}')
+            profile = UserProfile.objects.create(user=user, first_name=f'First{number}', family_name='Member')
+            Competitor.objects.create(tournament=self.tournament, user_profile=profile, hcp=Decimal(number * 5))
+        self.client.force_login(self.user)
+        # identity and session cached
+        self.client.get(reverse('api:courses'))
+
+    def tearDown(self):
+        cache.clear()
+
+    @pytest.mark.django_db
+    def test_keyset_pagination_and_sparse_fields(self):
+        url = reverse('api:tournaments')
+        seen = []
+        next_url = f'{url}?limit=3&fields=id,date,participants_count'
+        while next_url:
+            with self.assertNumQueries(1):
+                response = self.client.get(next_url)
+            assert response.status_code == HTTPStatus.OK
+            data = response.json()
+            assert all(set(row) == {'id', 'date', 'participants_count'} for row in data['results'])
+            seen += data['results']
+            next_url = data['next']
+        # tournaments of the same date ordered by id
+        assert [row['id'] for row in seen] == [tournament.pk for tournament in self.tournaments]
+        assert seen[0]['participants_count'] == 6
+        assert seen[0]['date'] == '2030-04-01'
+
+        response = self.client.get(url, {'from': '2030-04-15', 'fields': 'id,course_name'})
+        assert response.json() == {'results': [{'id': tournament.pk, 'course_name': 'Golfclub Schönbuch'}
+                                               for tournament in self.tournaments[4:]], 'next': None}
+
+    @pytest.mark.django_db
+    def test_invalid_parameters(self):
+        url = reverse('api:tournaments')
+        for parameters in ({'fields': 'id,secret'}, {'limit': '1000'}, {'cursor': 'garbage'},
+                           {'cursor': resources.encode_cursor(['not a date', 1])}, {'from': '15.04.2030'}):
+            response = self.client.get(url, parameters)
+            assert response.status_code == HTTPStatus.BAD_REQUEST, parameters
+            assert 'error' in response.json()
+        assert self.client.get(reverse('api:tournament', args=[0])).status_code == HTTPStatus.NOT_FOUND
+        assert self.client.post(url).status_code == HTTPStatus.METHOD_NOT_ALLOWED
+        self.client.logout()
+        assert self.client.get(url).status_code == HTTPStatus.UNAUTHORIZED
+
+    @pytest.mark.django_db
+    def test_competitors_and_flights(self):
+        url = reverse('api:competitors', args=[self.tournament.pk])
+        # the names and handicaps of the members are shown to the staff only
+        assert self.client.get(url).status_code == HTTPStatus.FORBIDDEN
+        assert self.client.get(reverse('api:flights', args=[self.tournament.pk])).status_code == HTTPStatus.FORBIDDEN
+        self.user.is_staff = True
+        self.user.save()
+        self.client.get(reverse('api:courses'))
+
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'fields': 'first_name,hcp'})
+        assert response.json()['results'][0] == {'first_name': 'First0', 'hcp': '0.0'}
+
+        response = self.client.get(reverse('api:flights', args=[self.tournament.pk]), {'fields': 'profile_id'})
+        flights = response.json()['flights']
+        assert [[competitor['hcp'] for competitor in flight] for flight in flights] == [
+            ['0.0', '5.0', '10.0'], ['15.0', '20.0', '25.0']]
+        response = self.client.get(reverse('api:flights', args=[self.tournament.pk]), {'strategy': 'HighMediumLow'})
+        assert [[competitor['hcp'] for competitor in flight] for flight in response.json()['flights']] == [
+            ['0.0', '15.0', '25.0'], ['5.0', '10.0', '20.0']]
+
+    @pytest.mark.django_db
+    def test_etag_and_cache_invalidation(self):
+        url = reverse('api:tournament', args=[self.tournament.pk])
+        response = self.client.get(url)
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+        self.tournament.max_participants = 12
+        self.tournament.save()
+        response = self.client.get(url, {'fields': 'max_participants'})
+        assert response.json() == {'max_participants': 12}
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        assert response['ETag'] != etag
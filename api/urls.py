@@ -0,0 +1,14 @@
+from django.urls import path
+
+from api import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('v1/tournaments/', views.tournament_list, name='tournaments'),
+    path('v1/tournaments/<int:pk>/', views.tournament_detail, name='tournament'),
+    path('v1/tournaments/<int:pk>/competitors/', views.competitor_list, name='competitors'),
+    path('v1/tournaments/<int:pk>/flights/', views.flight_list, name='flights'),
+    path('v1/courses/', views.course_list, name='courses'),
+    path('v1/courses/<int:pk>/', views.course_detail, name='course'),
+]
@@ -0,0 +1,150 @@
+import functools
+import hashlib
+import json
+from datetime import date
+from typing import NamedTuple
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import require_GET
+
+from api import resources
+from api.resources import InvalidParameter
+from tournaments import ical, utils
+
+CACHE_KEY = 'api:{version}:{path}'
+# the version changes with the tournaments, courses and registrations, not with the names of the members
+CACHE_TIMEOUT = 5 * 60
+
+
+class Payload(NamedTuple):
+    content: bytes
+    etag: str
+
+
+class NotFound(Exception):
+    pass
+
+
+def api_view(build=None, *, staff_only: bool = False):
+    """ JSON endpoint of the data returned by `build(request, **kwargs)`, served from the cache until the tournaments
+    change and answering the conditional requests of the clients with a 304. The `staff_only` endpoints hold the
+    personal data of the members, shown to the staff only as in the participants tab. """
+    if build is None:
+        return functools.partial(api_view, staff_only=staff_only)
+
+    @require_GET
+    @functools.wraps(build)
+    def view(request, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required'}, status=401)
+        if staff_only and not request.user.is_staff:
+            # checked before the cache: the cached payloads of these endpoints are only served to the staff
+            return JsonResponse({'error': 'Permission denied'}, status=403)
+        key = CACHE_KEY.format(version=ical.get_version(),
+                               path=hashlib.md5(request.get_full_path().encode()).hexdigest())
+        payload = cache.get(key)
+        if payload is None:
+            try:
+                data = build(request, **kwargs)
+            except InvalidParameter as error:
+                return JsonResponse({'error': str(error)}, status=400)
+            except NotFound:
+                return JsonResponse({'error': 'Not found'}, status=404)
+            content = json.dumps(data, cls=DjangoJSONEncoder).encode()
+            payload = Payload(content, f'"{hashlib.sha1(content).hexdigest()}"')
+            cache.set(key, payload, CACHE_TIMEOUT)
+        response = get_conditional_response(request, etag=payload.etag)
+        if response is None:
+            response = HttpResponse(payload.content, content_type='application/json')
+        response['ETag'] = payload.etag
+        response['Cache-Control'] = 'private, max-age=60'
+        return response
+    return view
+
+
+def _page(request, resource, queryset) -> dict:
+    fields = resources.parse_fields(resource, request.GET.get('fields'))
+    limit = resources.parse_limit(request.GET.get('limit'))
+    results, next_cursor = resources.page(resource, queryset, fields, limit, request.GET.get('cursor'))
+    next_url = None
+    if next_cursor:
+        query = request.GET.copy()
+        query['cursor'] = next_cursor
+        next_url = f'{request.path}?{query.urlencode()}'
+    return {'results': results, 'next': next_url}
+
+
+def _object(request, resource, queryset) -> dict:
+    fields = resources.parse_fields(resource, request.GET.get('fields'))
+    rows = resources.serialize(resource, resources.values(resource, queryset, fields)[:1], fields)
+    if not rows:
+        raise NotFound
+    return rows[0]
+
+
+def _date_parameter(request, name: str):
+    value = request.GET.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise InvalidParameter(f'{name} must be a date (YYYY-MM-DD)')
+
+
+@api_view
+def tournament_list(request):
+    tournaments = resources.tournaments()
+    date_from = _date_parameter(request, 'from')
+    if date_from:
+        tournaments = tournaments.filter(date__gte=date_from)
+    date_to = _date_parameter(request, 'to')
+    if date_to:
+        tournaments = tournaments.filter(date__lte=date_to)
+    return _page(request, resources.TOURNAMENT, tournaments)
+
+
+@api_view
+def tournament_detail(request, pk):
+    return _object(request, resources.TOURNAMENT, resources.tournaments().filter(pk=pk))
+
+
+@api_view
+def course_list(request):
+    return _page(request, resources.COURSE, resources.courses())
+
+
+@api_view
+def course_detail(request, pk):
+    return _object(request, resources.COURSE, resources.courses().filter(pk=pk))
+
+
+@api_view(staff_only=True)
+def competitor_list(request, pk):
+    if not resources.tournaments().filter(pk=pk).exists():
+        raise NotFound
+    return _page(request, resources.COMPETITOR, resources.competitors(pk))
+
+
+@api_view(staff_only=True)
+def flight_list(request, pk):
+    strategy = request.GET.get('strategy', 'SortByHcp')
+    if strategy not in utils.FLIGHT_STRATEGIES:
+        raise InvalidParameter(f"Unknown strategy: {strategy}. "
+                               f"Available strategies: {', '.join(utils.FLIGHT_STRATEGIES)}")
+    if not resources.tournaments().filter(pk=pk).exists():
+        raise NotFound
+    resource = resources.COMPETITOR
+    fields = resources.parse_fields(resource, request.GET.get('fields'))
+    if 'hcp' not in fields:
+        # the flights are formed on the handicaps
+        fields.append('hcp')
+    competitors = resources.values(resource, resources.competitors(pk), fields)
+    try:
+        flights = utils.FLIGHT_STRATEGIES[strategy](competitors)
+    except IndexError:
+        raise InvalidParameter(f'The {strategy} flights cannot be formed with this number of competitors')
+    return {'strategy': strategy, 'flights': [resources.serialize(resource, flight, fields) for flight in flights]}
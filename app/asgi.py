@@ -3,14 +3,24 @@ ASGI config for KSFGolf project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Deployed with uvicorn (`DJANGO_ENV=production uvicorn app.asgi:application --workers 4`), which keeps the streams of
+the live leaderboards open (see tournaments.leaderboard). Under a WSGI server the leaderboards are polled instead.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
 """
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
+from app.warmup import warm_up
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
 application = get_asgi_application()
+
+if settings.PRODUCTION:
+    # compile the templates and populate the URL resolvers before the first request, not during it
+    warm_up()
@@ -0,0 +1,146 @@
+"""
+Response middleware reducing the size of the pages, mostly the participants and flights tables which grow with the
+field size and are swapped by htmx.
+
+`HtmlMinifyMiddleware` collapses the indentation left by the templates and `CompressionMiddleware` compresses the
+text responses above `COMPRESSION_MIN_SIZE` with brotli or gzip. Streaming responses are compressed chunk by chunk, each
+chunk flushed to the client as it is produced, never buffered.
+"""
+import re
+import zlib
+
+import brotli
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_string
+
+# the content of these elements is kept as is, whitespace is significant there
+PRESERVED = re.compile(r'(<(?:pre|textarea|script|style)\b.*?</(?:pre|textarea|script|style)\s*>)',
+                       re.IGNORECASE | re.DOTALL)
+# HTML whitespace only: a non-breaking space is content
+MULTILINE_WHITESPACE = re.compile(r'[ \t\r\f]*\n[ \t\r\n\f]*')
+# by order of preference among the codings of the same quality
+ENCODINGS = ('br', 'gzip')
+# the other types (PDF, images, archives) are compressed already
+COMPRESSIBLE_TYPES = re.compile(r'\s*(text/|application/(json|javascript|[\w.+-]*\+json)\b|image/svg\+xml\b)',
+                                re.IGNORECASE)
+# fast settings: the responses are compressed on every request, unlike the static files compressed once
+BROTLI_QUALITY = 5
+GZIP_LEVEL = 6
+# random bytes in the gzip header against the BREACH attack, as in Django's `GZipMiddleware`
+MAX_RANDOM_BYTES = 100
+
+
+def minify_html(content: str) -> str:
+    """ Collapse the whitespace spanning several lines into a newline, which renders the same. """
+    parts = PRESERVED.split(content)
+    # the preserved elements are at the odd indexes
+    parts[::2] = [MULTILINE_WHITESPACE.sub('\n', part) for part in parts[::2]]
+    return ''.join(parts)
+
+
+class HtmlMinifyMiddleware(MiddlewareMixin):
+    def process_response(self, request, response):
+        if (response.streaming or response.has_header('Content-Encoding')
+                or not response.get('Content-Type', '').startswith('text/html')):
+            return response
+        content = minify_html(response.content.decode(response.charset))
+        response.content = content.encode(response.charset)
+        if response.has_header('Content-Length'):
+            response.headers['Content-Length'] = str(len(response.content))
+        return response
+
+
+def accept_encoding_qualities(header: str) -> dict:
+    """ Quality (`q`, 1 by default) of each coding of an `Accept-Encoding` header. """
+    qualities = {}
+    for part in header.split(','):
+        coding, *parameters = part.split(';')
+        quality = 1.0
+        for parameter in parameters:
+            name, _, value = parameter.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding.strip():
+            qualities[coding.strip().lower()] = quality
+    return qualities
+
+
+def accepted_encoding(request) -> str:
+    """ The encoding of the highest quality accepted by the client, none of those it refused with `q=0`. """
+    qualities = accept_encoding_qualities(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    accepted = [encoding for encoding in ENCODINGS if qualities.get(encoding, 0) > 0]
+    return max(accepted, key=lambda encoding: qualities[encoding], default='')
+
+
+def compress(content: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(content, mode=brotli.MODE_TEXT, quality=BROTLI_QUALITY)
+    return compress_string(content, max_random_bytes=MAX_RANDOM_BYTES)
+
+
+def streaming_compressor(encoding: str):
+    """ `(compress, finish)` functions of a compression stream, `compress` flushing the compressed chunk. """
+    if encoding == 'br':
+        compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=BROTLI_QUALITY)
+        return lambda chunk: compressor.process(chunk) + compressor.flush(), compressor.finish
+    # gzip container
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+
+def compress_sequence(chunks, encoding: str):
+    compress_chunk, finish = streaming_compressor(encoding)
+    for chunk in chunks:
+        yield compress_chunk(chunk)
+    yield finish()
+
+
+async def compress_async_sequence(chunks, encoding: str):
+    compress_chunk, finish = streaming_compressor(encoding)
+    async for chunk in chunks:
+        yield compress_chunk(chunk)
+    yield finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    def process_response(self, request, response):
+        if (response.has_header('Content-Encoding') or 'no-transform' in response.get('Cache-Control', '')
+                or not COMPRESSIBLE_TYPES.match(response.get('Content-Type', ''))):
+            return response
+        if response.streaming:
+            # the events are sent one by one, too small to gain anything, and some proxies buffer compressed streams
+            if response.get('Content-Type', '').startswith('text/event-stream'):
+                return response
+        elif len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = accepted_encoding(request)
+        if not encoding:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compress_async_sequence(response.streaming_content, encoding)
+            else:
+                response.streaming_content = compress_sequence(response.streaming_content, encoding)
+            # the compressed size is only known at the end of the stream
+            del response.headers['Content-Length']
+        else:
+            content = compress(response.content, encoding)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response.headers['Content-Length'] = str(len(content))
+
+        # the compressed representation differs: a strong ETag becomes weak, which still matches conditional requests
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = f'W/{etag}'
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -10,21 +10,31 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.0/howto/deployment/checklist/
 
+# `DJANGO_ENV=production` for the deployment: no debug, cached templates warmed up at worker boot (see app.warmup)
+# and hashed static files
+PRODUCTION = os.environ.get('DJANGO_ENV') == 'production'
+
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-f+3i-h+o(si_$g0a#@2se&_p9l6(#s!+bw#_g5#gqr$*dhj&nh'
+# the sessions and the calendar tokens are signed with it: the key committed here is for the development only
+if PRODUCTION and not os.environ.get('SECRET_KEY'):
+    raise ImproperlyConfigured('The SECRET_KEY environment variable is required in production.')
+SECRET_KEY = os.environ.get('SECRET_KEY', 'django-insecure-f+3i-h+o(si_$g0a#@2se&_p9l6(#s!+bw#_g5#gqr$*dhj&nh')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = not PRODUCTION
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = os.environ.get('ALLOWED_HOSTS', 'localhost').split(',') if PRODUCTION else []
 
 # Application definition
 
@@ -38,23 +48,58 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'django_htmx',
     'tournaments',
+    'search',
+    'jobs',
+    'notifications',
+    'api',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # serves the static files from the application, before any other processing of the request
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # compresses the response after the other middleware are done with it
+    'app.middleware.CompressionMiddleware',
+    'app.middleware.HtmlMinifyMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.middleware.ProfileMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     "django_htmx.middleware.HtmxMiddleware",
 ]
+# smaller responses are not worth compressing (see app.middleware)
+COMPRESSION_MIN_SIZE = 1024
 
 ROOT_URLCONF = 'app.urls'
 
 LOGIN_URL = '/accounts/login/'
 
+AUTHENTICATION_BACKENDS = [
+    # the user of the session is served from the cache (see accounts.identity)
+    'accounts.backends.CachedModelBackend',
+]
+
+# The cache is shared by the web workers, the job worker and the management commands, so that the data cached or
+# invalidated by one process (handicap indexes, calendar feed and course index versions, sessions, ...) is seen by all
+# of them: a file based cache in the `CACHE_LOCATION` directory. Past `MAX_ENTRIES` the cache deletes random entries,
+# the versions and the cached sessions included: the limit is far above the entries of the club (a handful per
+# member) so that it is never reached. The tests use a cache of their own process instead (see app.test_settings).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', BASE_DIR / 'cache'),
+        'OPTIONS': {'MAX_ENTRIES': 1000000},
+    },
+}
+
+# where the sessions are stored: `cached_db` reads them from the cache and writes them to the database too, `cache`
+# keeps them in the cache only (which must then be shared by the workers and large enough), `signed_cookies` in the
+# cookie itself, `db` in the database only
+SESSION_ENGINE = f"django.contrib.sessions.backends.{os.environ.get('SESSION_STORE', 'cached_db')}"
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -71,6 +116,13 @@ TEMPLATES = [
         },
     },
 ]
+if PRODUCTION:
+    # templates compiled once per worker and never checked for changes
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ])]
 
 WSGI_APPLICATION = 'app.wsgi.application'
 
@@ -117,6 +169,25 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.0/howto/static-files/
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / "static"]
+# collected by `manage.py collectstatic` and served by WhiteNoise
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+if not DEBUG:
+    # content-hashed file names with gzip and brotli variants written at collectstatic time: the hashed files are
+    # served with `Cache-Control: max-age=315360000, public, immutable` and never revalidated
+    STORAGES['staticfiles']['BACKEND'] = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# files without a hash in their name (e.g. referenced by an absolute URL) are revalidated after a day
+WHITENOISE_MAX_AGE = 24 * 60 * 60
+# in development (and tests) the files are found in STATICFILES_DIRS on each request, no collectstatic needed
+WHITENOISE_AUTOREFRESH = DEBUG
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
@@ -125,3 +196,11 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_REDIRECT_URL = 'home'
 LOGOUT_REDIRECT_URL = 'home'
+
+# Emails: sent by the job worker (see notifications). For development, run a debugging SMTP server with
+# `python -m aiosmtpd -n -l localhost:1025` and set EMAIL_PORT=1025
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 25))
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'KSF Golf <golf@localhost>')
+# absolute links in the emails
+SITE_URL = os.environ.get('SITE_URL', 'http://localhost:8000')
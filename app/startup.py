@@ -0,0 +1,145 @@
+"""
+Profile of the boot of a WSGI worker, reported by the `startup_profile` command.
+
+The boot is measured in a fresh interpreter started with `python -X importtime -m app.startup`: the time to load the
+settings, to populate the app registry (models import and `ready()` of each app), to create the WSGI application
+(middleware and, in production, the warm-up) and the latency of the first requests. The import-time tree is parsed
+from the `-X importtime` output of that interpreter.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Iterable, List, NamedTuple
+
+# no Django import at module level: this module starts the measured interpreter
+IMPORT_TIME_PREFIX = 'import time:'
+
+
+class ImportNode(NamedTuple):
+    name: str
+    # microseconds, as reported by -X importtime
+    self_us: int
+    cumulative_us: int
+    children: list
+
+
+class AppTiming(NamedTuple):
+    label: str
+    models_seconds: float
+    ready_seconds: float
+
+
+class StartupProfile(NamedTuple):
+    settings_seconds: float
+    setup_seconds: float
+    apps: List[AppTiming]
+    wsgi_seconds: float
+    # status code and seconds of the first requests
+    requests: List[tuple]
+    imports: List[ImportNode]
+
+    @property
+    def import_seconds(self):
+        return sum(node.cumulative_us for node in self.imports) / 1e6
+
+    @property
+    def boot_seconds(self):
+        return self.settings_seconds + self.setup_seconds + self.wsgi_seconds
+
+
+def parse_importtime(lines: Iterable[str]) -> List[ImportNode]:
+    """ Tree of the imports from the `-X importtime` output, where a module is listed after its own imports. """
+    pending = defaultdict(list)
+    for line in lines:
+        if not line.startswith(IMPORT_TIME_PREFIX) or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len(IMPORT_TIME_PREFIX):].split('|')
+        name = name.rstrip()
+        # one space, then two per level of nesting
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        pending[depth].append(ImportNode(name.strip(), int(self_us), int(cumulative_us), pending.pop(depth + 1, [])))
+    return pending[0]
+
+
+def profile_startup(url: str = '/', host: str = 'localhost') -> StartupProfile:
+    """ Boot a worker in a new interpreter and measure it. """
+    from django.conf import settings
+
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-m', 'app.startup', url, host],
+                             capture_output=True, text=True, cwd=settings.BASE_DIR, env=os.environ.copy())
+    if process.returncode:
+        raise RuntimeError(f'The boot failed:\n{process.stderr[-2000:]}')
+    measures = json.loads(process.stdout.splitlines()[-1])
+    return StartupProfile(measures['settings'], measures['setup'],
+                          [AppTiming(*app) for app in measures['apps']], measures['wsgi'],
+                          [tuple(request) for request in measures['requests']],
+                          parse_importtime(process.stderr.splitlines()))
+
+
+def _timed(function, timings: dict, key: str):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            timings[key] = time.perf_counter() - start
+    return wrapper
+
+
+def measure_boot(url: str, host: str) -> dict:
+    """ Boot the WSGI application in this interpreter, which must not have imported Django yet. """
+    from wsgiref.util import setup_testing_defaults
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+    start = time.perf_counter()
+    import django
+    from django.apps import AppConfig
+    from django.conf import settings
+    # loads the settings module
+    settings.INSTALLED_APPS
+    settings_loaded = time.perf_counter()
+
+    app_timings = defaultdict(dict)
+    create = AppConfig.create
+
+    def timed_create(entry):
+        app_config = create(entry)
+        timings = app_timings[app_config.label]
+        app_config.import_models = _timed(app_config.import_models, timings, 'models')
+        app_config.ready = _timed(app_config.ready, timings, 'ready')
+        return app_config
+
+    AppConfig.create = timed_create
+    django.setup()
+    AppConfig.create = create
+    ready = time.perf_counter()
+
+    from app.wsgi import application
+    wsgi_loaded = time.perf_counter()
+
+    requests = []
+    for _ in range(2):
+        environ = {'PATH_INFO': url, 'HTTP_HOST': host}
+        setup_testing_defaults(environ)
+        status = []
+        request_start = time.perf_counter()
+        response = application(environ, lambda response_status, headers, exc_info=None: status.append(response_status))
+        for _ in response:
+            pass
+        response.close()
+        requests.append((int(status[0].split()[0]), time.perf_counter() - request_start))
+
+    return {
+        'settings': settings_loaded - start,
+        'setup': ready - settings_loaded,
+        'apps': [(label, timings.get('models', 0), timings.get('ready', 0)) for label, timings in app_timings.items()],
+        'wsgi': wsgi_loaded - ready,
+        'requests': requests,
+    }
+
+
+if __name__ == '__main__':
+    print(json.dumps(measure_boot(*sys.argv[1:3])))
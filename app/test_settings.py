@@ -0,0 +1,11 @@
+"""
+Settings of the test runs: `manage.py test` and pytest (see pytest.ini) use them instead of `app.settings`.
+
+The cache of the deployment is shared through the file system; the tests use a cache of their own process, empty at
+the start of every run, so that they neither see nor clear the data of a development server.
+"""
+from app.settings import *  # noqa: F401,F403
+
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
@@ -24,4 +24,7 @@ urlpatterns = [
     path('accounts/', include('accounts.urls'), name='accounts'),
     path('admin/', admin.site.urls),
     path('tournaments/', include('tournaments.urls'), name='tournaments'),
+    path('search/', include('search.urls'), name='search'),
+    path('jobs/', include('jobs.urls'), name='jobs'),
+    path('api/', include('api.urls'), name='api'),
 ]
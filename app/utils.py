@@ -9,3 +9,4 @@ def arrange_urlpatterns(urlpatterns_list):
             specific_urlpatterns.append(pattern)
 
     return specific_urlpatterns + general_urlpatterns
+
@@ -0,0 +1,68 @@
+"""
+Warm-up of a worker at boot: the work Django does lazily on the first requests is done before serving any.
+
+Every template under `templates/` and every form widget template is compiled into the cached template loaders, the
+URLs of the main apps are reversed once, which populates the URL resolvers, and the password validators load their
+list of common passwords. Called by `app.wsgi`/`app.asgi` in production and by the `warmup` command, which reports the
+timings.
+"""
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+from django import forms
+from django.contrib.auth import password_validation
+from django.forms.renderers import get_default_renderer
+from django.template import engines
+from django.urls import get_resolver, reverse
+from django.urls.converters import IntConverter
+
+NAMESPACES = ['tournaments', 'accounts', 'api']
+
+
+class WarmUpReport(NamedTuple):
+    templates: int
+    urls: int
+    seconds: float
+
+
+def _compile_directory(engine, directory: Path) -> int:
+    compiled = 0
+    for path in sorted(directory.rglob('*')):
+        if path.is_file():
+            # with the cached loader the compiled template is kept for the lifetime of the worker
+            engine.get_template(path.relative_to(directory).as_posix())
+            compiled += 1
+    return compiled
+
+
+def compile_templates() -> int:
+    """ Load every template of the `DIRS` of the template engine and the templates of the form widgets, which have
+    their own engine, return the number of templates compiled. """
+    engine = engines['django']
+    compiled = sum(_compile_directory(engine, Path(directory)) for directory in engine.engine.dirs)
+    return compiled + _compile_directory(get_default_renderer(), Path(forms.__file__).parent / 'templates')
+
+
+def reverse_urls(namespaces=NAMESPACES) -> int:
+    """ Reverse every named URL of the namespaces with sample arguments, return the number of URLs reversed. """
+    reversed_urls = 0
+    for namespace in namespaces:
+        _, resolver = get_resolver().namespace_dict[namespace]
+        for pattern in resolver.url_patterns:
+            if not pattern.name:
+                continue
+            kwargs = {name: 1 if isinstance(converter, IntConverter) else 'warm-up'
+                      for name, converter in pattern.pattern.converters.items()}
+            reverse(f'{namespace}:{pattern.name}', kwargs=kwargs)
+            reversed_urls += 1
+    return reversed_urls
+
+
+def warm_up() -> WarmUpReport:
+    start = time.perf_counter()
+    templates = compile_templates()
+    urls = reverse_urls()
+    # cached, the common passwords are read from a compressed file of 20000 lines
+    password_validation.get_default_password_validators()
+    return WarmUpReport(templates, urls, time.perf_counter() - start)
@@ -0,0 +1,22 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from jobs.models import Job
+
+
+@admin.action(description='Queue the selected jobs again')
+def retry_jobs(modeladmin, request, queryset):
+    queryset.exclude(status__in=Job.ACTIVE_STATUSES).update(status=Job.QUEUED, attempts=0, run_at=timezone.now(),
+                                                            finished_date=None)
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'status', 'priority', 'attempts', 'run_at', 'finished_date')
+    list_filter = ('status', 'name')
+    search_fields = ('^name', '^dedup_key')
+    readonly_fields = ('attempts', 'result', 'last_error', 'created_by', 'created_date', 'started_date',
+                       'finished_date')
+    actions = [retry_jobs]
+
+
+admin.site.register(Job, JobAdmin)
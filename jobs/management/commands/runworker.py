@@ -0,0 +1,79 @@
+import signal
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from jobs import queue
+
+
+def run_in_thread(job):
+    try:
+        queue.run_job(job)
+    finally:
+        # each thread has its own database connections
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Execute the queued background jobs with a pool of worker threads.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4,
+                            help='Number of jobs executed concurrently, 1 runs the jobs in the main thread.')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to wait when the queue is empty.')
+        parser.add_argument('--burst', action='store_true',
+                            help='Exit once no job is due instead of waiting for new ones.')
+
+    def handle(self, *args, **options):
+        self.stopping = threading.Event()
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda signum, frame: self.stopping.set())
+        requeued = queue.requeue_stale()
+        if requeued:
+            self.stdout.write(f'Queued {requeued} stale jobs again.')
+
+        threads = options['threads']
+        try:
+            if threads == 1:
+                executed = self.run_inline(options['poll_interval'], options['burst'])
+            else:
+                executed = self.run_pool(threads, options['poll_interval'], options['burst'])
+        except KeyboardInterrupt:
+            self.stopping.set()
+            executed = None
+        if executed is not None:
+            self.stdout.write(self.style.SUCCESS(f'Executed {executed} jobs.'))
+
+    def run_inline(self, poll_interval, burst):
+        executed = 0
+        while not self.stopping.is_set():
+            jobs = queue.claim(1)
+            if not jobs:
+                if burst:
+                    break
+                self.stopping.wait(poll_interval)
+                continue
+            queue.run_job(jobs[0])
+            executed += 1
+        return executed
+
+    def run_pool(self, threads, poll_interval, burst):
+        executed = 0
+        running = set()
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='job') as executor:
+            while not self.stopping.is_set():
+                jobs = queue.claim(threads - len(running))
+                running |= {executor.submit(run_in_thread, job) for job in jobs}
+                if not running:
+                    if burst:
+                        break
+                    self.stopping.wait(poll_interval)
+                    continue
+                done, running = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                executed += len(done)
+            # the pool waits for the running jobs on exit
+            executed += len(running)
+        return executed
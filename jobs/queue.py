@@ -0,0 +1,146 @@
+"""
+Job queue stored in the database: no broker is needed, the worker (`manage.py runworker`) polls the `Job` table.
+
+Tasks are plain functions registered with the `task` decorator in the `tasks` module of an app and queued with
+`enqueue`. The arguments are stored as JSON, so they must be primary keys and simple values, not model instances.
+Workers claim a job with a conditional UPDATE, so several workers may consume the same queue.
+"""
+import datetime
+import logging
+import traceback
+from typing import Callable, Dict, List, Optional
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from jobs.models import Job
+
+logger = logging.getLogger(__name__)
+
+# delay before the next attempt of a failed job: RETRY_DELAY * 2 ** (attempts - 1)
+RETRY_DELAY = datetime.timedelta(seconds=30)
+# running jobs without news for this long belong to a crashed worker
+STALE_AFTER = datetime.timedelta(hours=1)
+
+_tasks: Dict[str, Callable] = {}
+
+
+class TaskNotRegistered(KeyError):
+    pass
+
+
+def task(name: Optional[str] = None, max_attempts: int = 3):
+    """ Register the decorated function as task, by default under `<module>.<function name>`. """
+    def register(function):
+        task_name = name or f'{function.__module__}.{function.__name__}'
+        function.task_name = task_name
+        function.max_attempts = max_attempts
+        _tasks[task_name] = function
+        return function
+    return register
+
+
+def get_task(name: str) -> Callable:
+    try:
+        return _tasks[name]
+    except KeyError:
+        raise TaskNotRegistered(name) from None
+
+
+def enqueue(name: str, *, priority: int = 0, dedup_key: Optional[str] = None,
+            run_at: Optional[datetime.datetime] = None, created_by=None, **arguments) -> Job:
+    """ Queue a call of the task.
+
+    When a job with the same `dedup_key` is already queued, that job is returned instead of a new one. A running job
+    does not count: it may have read the data before the change the new job is queued for.
+    """
+    function = get_task(name)
+    job = Job(name=name, arguments=arguments, priority=priority, dedup_key=dedup_key,
+              max_attempts=function.max_attempts, run_at=run_at or timezone.now(), created_by=created_by)
+    if dedup_key is None:
+        job.save()
+        return job
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        existing = Job.objects.filter(dedup_key=dedup_key, status=Job.QUEUED).first()
+        if existing is None:
+            # started in the meantime
+            return enqueue(name, priority=priority, dedup_key=dedup_key, run_at=run_at, created_by=created_by,
+                           **arguments)
+        return existing
+    return job
+
+
+def claim(limit: int) -> List[Job]:
+    """ Mark up to `limit` due jobs as running, by priority then due date, and return them. A job waits while
+    another job of the same `dedup_key` is running. """
+    now = timezone.now()
+    running = Job.objects.filter(status=Job.RUNNING, dedup_key__isnull=False).values('dedup_key')
+    candidates = (Job.objects
+                  .filter(status=Job.QUEUED, run_at__lte=now)
+                  .exclude(dedup_key__in=running)
+                  .order_by('-priority', 'run_at', 'pk')
+                  .values_list('pk', flat=True)[:limit])
+    claimed = []
+    for pk in candidates:
+        # another worker may have taken the job since the select
+        if Job.objects.filter(pk=pk, status=Job.QUEUED).update(status=Job.RUNNING, started_date=now,
+                                                               attempts=F('attempts') + 1):
+            claimed.append(pk)
+    return list(Job.objects.filter(pk__in=claimed).order_by('-priority', 'run_at', 'pk'))
+
+
+def run_job(job: Job):
+    """ Execute a claimed job and record the outcome, failed jobs are queued again until `max_attempts`. """
+    try:
+        result = get_task(job.name)(**job.arguments)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if _superseded(job):
+            # the job queued with the same key meanwhile does the work again
+            job.status = Job.FAILED
+            job.finished_date = timezone.now()
+            logger.warning('Job %s failed, superseded by a queued job', job)
+        elif job.attempts < job.max_attempts:
+            job.status = Job.QUEUED
+            job.run_at = timezone.now() + RETRY_DELAY * 2 ** (job.attempts - 1)
+            logger.warning('Job %s failed, attempt %d of %d', job, job.attempts, job.max_attempts)
+        else:
+            job.status = Job.FAILED
+            job.finished_date = timezone.now()
+            logger.error('Job %s failed', job)
+    else:
+        job.status = Job.SUCCEEDED
+        job.result = result
+        job.finished_date = timezone.now()
+    fields = ['status', 'result', 'last_error', 'run_at', 'finished_date']
+    try:
+        with transaction.atomic():
+            job.save(update_fields=fields)
+    except IntegrityError:
+        # a job of the same key was queued since the `_superseded` check, before the retry was saved
+        job.status = Job.FAILED
+        job.finished_date = timezone.now()
+        logger.warning('Job %s failed, superseded by a queued job', job)
+        job.save(update_fields=fields)
+
+
+def _superseded(job: Job) -> bool:
+    return bool(job.dedup_key) and Job.objects.filter(dedup_key=job.dedup_key, status=Job.QUEUED).exists()
+
+
+def requeue_stale(older_than: datetime.timedelta = STALE_AFTER) -> int:
+    """ Queue again the jobs left running by a worker which was killed, unless a job of the same key is queued. """
+    now = timezone.now()
+    requeued = 0
+    for pk in Job.objects.filter(status=Job.RUNNING, started_date__lt=now - older_than).values_list('pk', flat=True):
+        try:
+            with transaction.atomic():
+                requeued += Job.objects.filter(pk=pk, status=Job.RUNNING).update(status=Job.QUEUED, run_at=now)
+        except IntegrityError:
+            Job.objects.filter(pk=pk).update(status=Job.FAILED, finished_date=now,
+                                             last_error='Superseded by a queued job')
+    return requeued
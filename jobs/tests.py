@@ -0,0 +1,141 @@
+import datetime
+from io import StringIO
+from http import HTTPStatus
+from unittest import mock
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from jobs import queue
+from jobs.models import Job
+
+calls = []
+
+
+@queue.task(name='tests.record')
+def record(value):
+    calls.append(value)
+    return value
+
+
+@queue.task(name='tests.fail', max_attempts=2)
+def fail():
+    raise RuntimeError('boom')
+
+
+class TestJobQueue(TestCase):
+    def setUp(self):
+        calls.clear()
+        self.user = User.objects.create_user(username='organiser', password='test-organiser')
+
+    @pytest.mark.django_db
+    def test_enqueue_unknown_task(self):
+        with self.assertRaises(queue.TaskNotRegistered):
+            queue.enqueue('tests.unknown')
+
+    @pytest.mark.django_db
+    def test_deduplication(self):
+        job = queue.enqueue('tests.record', dedup_key='record', value=1)
+        assert queue.enqueue('tests.record', dedup_key='record', value=2) == job
+        assert Job.objects.count() == 1
+        queue.run_job(queue.claim(1)[0])
+        # the key is free again once the job is finished
+        assert queue.enqueue('tests.record', dedup_key='record', value=3) != job
+
+    @pytest.mark.django_db
+    def test_running_job_is_not_merged(self):
+        running = queue.enqueue('tests.record', dedup_key='record', value=1)
+        assert queue.claim(1) == [running]
+        # the running job may have read the data already: the change gets a job of its own
+        queued = queue.enqueue('tests.record', dedup_key='record', value=2)
+        assert queued != running
+        assert queue.enqueue('tests.record', dedup_key='record', value=3) == queued
+        # which waits for the running one
+        assert queue.claim(1) == []
+        queue.run_job(running)
+        assert queue.claim(1) == [queued]
+
+    @pytest.mark.django_db
+    def test_stale_job_superseded_by_queued_job(self):
+        stale = queue.enqueue('tests.record', dedup_key='record', value=1)
+        queue.claim(1)
+        Job.objects.filter(pk=stale.pk).update(started_date=timezone.now() - datetime.timedelta(days=1))
+        queue.enqueue('tests.record', dedup_key='record', value=2)
+        assert queue.requeue_stale() == 0
+        assert Job.objects.get(pk=stale.pk).status == Job.FAILED
+
+    @pytest.mark.django_db
+    def test_retry_superseded_by_job_queued_meanwhile(self):
+        failed = queue.enqueue('tests.fail', dedup_key='fail')
+        queue.claim(1)
+        queued = queue.enqueue('tests.fail', dedup_key='fail')
+        # the other job is queued between the check and the save of the retry
+        with mock.patch.object(queue, '_superseded', return_value=False):
+            queue.run_job(failed)
+        failed.refresh_from_db()
+        assert failed.status == Job.FAILED
+        assert 'RuntimeError: boom' in failed.last_error
+        assert queue.claim(1) == [queued]
+
+    @pytest.mark.django_db
+    def test_claim_by_priority_and_due_date(self):
+        low = queue.enqueue('tests.record', value='low')
+        high = queue.enqueue('tests.record', priority=10, value='high')
+        queue.enqueue('tests.record', priority=20, run_at=timezone.now() + datetime.timedelta(hours=1),
+                      value='later')
+        assert queue.claim(5) == [high, low]
+        assert queue.claim(5) == []
+        assert Job.objects.get(pk=high.pk).status == Job.RUNNING
+
+    @pytest.mark.django_db
+    def test_retry_then_fail(self):
+        job = queue.enqueue('tests.fail')
+        queue.run_job(queue.claim(1)[0])
+        job.refresh_from_db()
+        assert job.status == Job.QUEUED
+        assert job.run_at > timezone.now()
+        assert 'RuntimeError: boom' in job.last_error
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        queue.run_job(queue.claim(1)[0])
+        job.refresh_from_db()
+        assert job.status == Job.FAILED
+        assert job.attempts == 2
+
+    @pytest.mark.django_db
+    def test_requeue_stale(self):
+        job = queue.enqueue('tests.record', value=1)
+        queue.claim(1)
+        Job.objects.filter(pk=job.pk).update(started_date=timezone.now() - datetime.timedelta(days=1))
+        assert queue.requeue_stale() == 1
+        assert queue.claim(1) == [job]
+
+    @pytest.mark.django_db
+    def test_runworker(self):
+        for value in range(3):
+            queue.enqueue('tests.record', value=value)
+        call_command('runworker', threads=1, burst=True, stdout=StringIO())
+        assert calls == [0, 1, 2]
+        assert list(Job.objects.values_list('status', 'result')) == [(Job.SUCCEEDED, 0), (Job.SUCCEEDED, 1),
+                                                                     (Job.SUCCEEDED, 2)]
+
+    @pytest.mark.django_db
+    def test_status_view(self):
+        job = queue.enqueue('tests.record', created_by=self.user, value=1)
+        url = reverse('jobs:status', args=[job.pk])
+        self.client.force_login(self.user)
+        response = self.client.get(url, HTTP_HX_REQUEST='true')
+        assert response.status_code == HTTPStatus.OK
+        assert 'hx-trigger="every 2s"' in response.content.decode()
+
+        queue.run_job(queue.claim(1)[0])
+        response = self.client.get(url, HTTP_HX_REQUEST='true')
+        # polling stops with the finished job
+        assert 'hx-trigger' not in response.content.decode()
+
+        self.client.force_login(User.objects.create_user(username='other', password='test-other'))
+        assert self.client.get(url).status_code == HTTPStatus.NOT_FOUND
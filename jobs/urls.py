@@ -0,0 +1,9 @@
+from django.urls import path
+
+from jobs import views
+
+app_name = 'jobs'
+
+urlpatterns = [
+    path('<int:pk>/', views.job_status, name='status'),
+]
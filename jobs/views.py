@@ -0,0 +1,14 @@
+from django.contrib.auth.decorators import login_required
+from django.http import Http404
+from django.shortcuts import render, get_object_or_404
+
+from jobs.models import Job
+
+
+@login_required
+def job_status(request, pk):
+    job = get_object_or_404(Job, pk=pk)
+    if not request.user.is_staff and job.created_by_id != request.user.pk:
+        raise Http404
+    # htmx polls the partial until the job is finished
+    return render(request, 'jobs/partials/status.html', {'job': job})
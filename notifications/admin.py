@@ -0,0 +1,13 @@
+from django.contrib import admin
+
+from notifications.models import Notification
+
+
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'tournament', 'user_profile', 'created_date', 'sent_date')
+    list_filter = ('kind', 'sent_date')
+    list_select_related = ('tournament__course', 'user_profile')
+    raw_id_fields = ('tournament', 'user_profile')
+
+
+admin.site.register(Notification, NotificationAdmin)
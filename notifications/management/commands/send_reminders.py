@@ -0,0 +1,31 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from notifications import outbox
+from notifications.models import Notification
+from tournaments.models import Competitor, Tournament
+
+
+class Command(BaseCommand):
+    help = 'Queue the reminder emails of the tournaments taking place in a few days (run once a day).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=2, help='Days before the tournament.')
+
+    def handle(self, *args, **options):
+        date = timezone.now().date() + datetime.timedelta(days=options['days'])
+        reminded = 0
+        for tournament in Tournament.objects.filter(date=date):
+            already_reminded = (Notification.objects
+                                .filter(tournament=tournament, kind=Notification.REMINDER)
+                                .values('user_profile_id'))
+            profile_ids = list(Competitor.objects
+                               .filter(tournament=tournament)
+                               .exclude(user_profile_id__in=already_reminded)
+                               .values_list('user_profile_id', flat=True))
+            if profile_ids:
+                outbox.notify(Notification.REMINDER, tournament, profile_ids)
+                reminded += len(profile_ids)
+        self.stdout.write(self.style.SUCCESS(f'Queued {reminded} reminders.'))
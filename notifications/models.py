@@ -0,0 +1,32 @@
+from django.db import models
+
+
+class Notification(models.Model):
+    """ Email to a member about a tournament, queued by `notifications.outbox.notify` and sent in batches. """
+    REGISTRATION = 'registration'
+    CANCELLATION = 'cancellation'
+    WAITLIST = 'waitlist'
+    REMINDER = 'reminder'
+    KIND_CHOICES = [
+        (REGISTRATION, 'Registration confirmed'),
+        (CANCELLATION, 'Registration cancelled'),
+        (WAITLIST, 'Added to the waitlist'),
+        (REMINDER, 'Tournament reminder'),
+    ]
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    tournament = models.ForeignKey('tournaments.Tournament', on_delete=models.CASCADE)
+    user_profile = models.ForeignKey('accounts.UserProfile', on_delete=models.CASCADE)
+    created_date = models.DateTimeField(auto_now_add=True)
+    sent_date = models.DateTimeField(null=True, blank=True)
+    # batch of the job sending the notification, see `notifications.outbox.send_pending`
+    claimed_by = models.CharField(max_length=32, null=True, blank=True)
+    claimed_date = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['sent_date'], name='notification_sent_idx'),
+            models.Index(fields=['claimed_by'], name='notification_claimed_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.user_profile} ({self.tournament})"
@@ -0,0 +1,99 @@
+"""
+Outbox of the tournament emails: requests only store a `Notification`, the job worker sends them.
+
+Notifications queued within `BATCH_WINDOW` are sent by the same job. A message is rendered once per kind and
+tournament, only the greeting is personal, and all the messages of a batch go over a single SMTP connection.
+
+The jobs of consecutive windows, or the retry of a job, may run at the same time: a job first claims the unsent
+notifications with a single conditional UPDATE and only sends the ones it claimed, so that no member gets an email
+twice. The claims of a job which failed are released, those of a worker which was killed expire after
+`CLAIM_TIMEOUT`.
+"""
+import datetime
+import math
+import uuid
+from itertools import groupby
+from typing import Iterable
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from jobs import queue
+from notifications.models import Notification
+
+BATCH_WINDOW = datetime.timedelta(seconds=30)
+# messages per SMTP transaction, the sent ones are recorded after each chunk
+CHUNK_SIZE = 100
+CLAIM_TIMEOUT = datetime.timedelta(minutes=15)
+
+
+def notify(kind: str, tournament, profile_ids: Iterable[int]):
+    """ Queue the notification of the members, to be sent at the end of the current batch window. """
+    Notification.objects.bulk_create([Notification(kind=kind, tournament=tournament, user_profile_id=profile_id)
+                                      for profile_id in profile_ids])
+    # one job per window: a running job cannot miss the new notifications, they belong to the next window
+    window = BATCH_WINDOW.total_seconds()
+    window_end = math.ceil(timezone.now().timestamp() / window) * window
+    queue.enqueue('notifications.tasks.send_notifications', dedup_key=f'notifications:{int(window_end)}',
+                  run_at=datetime.datetime.fromtimestamp(window_end, tz=datetime.timezone.utc))
+
+
+def render_message(kind: str, tournament) -> tuple:
+    """ Subject and body of the notification, shared by all the recipients. """
+    context = {'tournament': tournament, 'course': tournament.course,
+               'url': f'{settings.SITE_URL}{tournament.get_absolute_url()}'}
+    subject = render_to_string(f'notifications/{kind}_subject.txt', context).strip()
+    body = render_to_string(f'notifications/{kind}.txt', context)
+    return subject, body
+
+
+def claim_pending() -> str:
+    """ Claim the unsent notifications which are not claimed by a running job, return the claim. """
+    claim = uuid.uuid4().hex
+    now = timezone.now()
+    (Notification.objects
+     .filter(Q(claimed_by__isnull=True) | Q(claimed_date__lt=now - CLAIM_TIMEOUT), sent_date__isnull=True)
+     .update(claimed_by=claim, claimed_date=now))
+    return claim
+
+
+def send_pending() -> int:
+    """ Send the unsent notifications, return the number of emails sent. """
+    claim = claim_pending()
+    try:
+        return _send_claimed(claim)
+    except Exception:
+        # the retry of the job claims them again
+        Notification.objects.filter(claimed_by=claim, sent_date__isnull=True).update(claimed_by=None,
+                                                                                      claimed_date=None)
+        raise
+
+
+def _send_claimed(claim: str) -> int:
+    pending = (Notification.objects
+               .filter(claimed_by=claim, sent_date__isnull=True)
+               .select_related('tournament__course', 'user_profile__user')
+               .order_by('kind', 'tournament_id', 'pk'))
+    messages = []
+    for (kind, _), notifications in groupby(pending, key=lambda notification: (notification.kind,
+                                                                              notification.tournament_id)):
+        notifications = list(notifications)
+        subject, body = render_message(kind, notifications[0].tournament)
+        for notification in notifications:
+            profile = notification.user_profile
+            message = None
+            if profile.user.email:
+                message = EmailMessage(subject, f'Hello {profile.first_name},\n\n{body}', to=[profile.user.email])
+            messages.append((notification.pk, message))
+
+    sent = 0
+    with get_connection() as connection:
+        for start in range(0, len(messages), CHUNK_SIZE):
+            chunk = messages[start:start + CHUNK_SIZE]
+            sent += connection.send_messages([message for _, message in chunk if message]) or 0
+            # members without an email address are skipped for good
+            Notification.objects.filter(pk__in=[pk for pk, _ in chunk]).update(sent_date=timezone.now())
+    return sent
@@ -0,0 +1,7 @@
+from jobs.queue import task
+from notifications import outbox
+
+
+@task(max_attempts=5)
+def send_notifications():
+    return outbox.send_pending()
@@ -0,0 +1,119 @@
+import datetime
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import UserProfile
+from jobs.models import Job
+from notifications import outbox
+from notifications.models import Notification
+from tournaments.models import Competitor, GolfCourse, Tournament, WaitlistEntry
+
+
+class TestNotifications(TestCase):
+    def setUp(self):
+        self.golf_course = GolfCourse.objects.create(name='Golfclub Schönbuch', address='Schaichhof',
+                                                     city='Holzgerlingen', zip_code=71088)
+        self.tournament = Tournament.objects.create(date=timezone.now().date() + datetime.timedelta(days=2),
+                                                    course=self.golf_course, hcp_limit=36.0, max_participants=2)
+        self.profiles = []
+        for name in ('Anna', 'Ben', 'Clara'):
+            user = User.objects.create_user(username=name.lower(), password='test-notify',
+                                            email=f'{name.lower()}@example.com')
+            self.profiles.append(UserProfile.objects.create(user=user, first_name=name, family_name='Test',
+                                                            phone_number='+4915150505050'))
+
+    def participate(self, profile):
+        self.client.force_login(profile.user)
+        self.client.post(reverse('accounts:participate', args=[self.tournament.pk]))
+
+    def run_worker(self):
+        Job.objects.update(run_at=timezone.now())
+        call_command('runworker', threads=1, burst=True, stdout=StringIO())
+
+    @pytest.mark.django_db
+    def test_registration_is_confirmed_by_the_worker(self):
+        self.participate(self.profiles[0])
+        assert Notification.objects.get().kind == Notification.REGISTRATION
+        # nothing is sent in the request
+        assert mail.outbox == []
+        self.run_worker()
+        assert len(mail.outbox) == 1
+        assert mail.outbox[0].to == ['anna@example.com']
+        assert mail.outbox[0].subject == f'Registration confirmed: {self.tournament}'
+        assert mail.outbox[0].body.startswith('Hello Anna,\n\nyour registration')
+        assert not Notification.objects.filter(sent_date__isnull=True).exists()
+
+    @pytest.mark.django_db
+    def test_waitlist_and_cancellation(self):
+        with mock.patch('notifications.outbox.timezone') as outbox_timezone:
+            outbox_timezone.now.return_value = timezone.now()
+            for profile in self.profiles:
+                self.participate(profile)
+            assert WaitlistEntry.objects.get().user_profile == self.profiles[2]
+            # the place of the cancelled registration goes to the waitlist
+            self.participate(self.profiles[0])
+        assert set(Competitor.objects.values_list('user_profile', flat=True)) == {self.profiles[1].pk,
+                                                                                 self.profiles[2].pk}
+        assert not WaitlistEntry.objects.exists()
+
+        # all the notifications of the burst are sent by a single job
+        assert Job.objects.count() == 1
+        self.run_worker()
+        subjects = sorted((message.to[0], message.subject.split(':')[0]) for message in mail.outbox)
+        assert subjects == [('anna@example.com', 'Registration cancelled'),
+                            ('anna@example.com', 'Registration confirmed'),
+                            ('ben@example.com', 'Registration confirmed'),
+                            ('clara@example.com', 'Registration confirmed'),
+                            ('clara@example.com', 'Waitlist')]
+
+    @pytest.mark.django_db
+    def test_rendered_once_per_kind_and_tournament(self):
+        outbox.notify(Notification.REMINDER, self.tournament, [profile.pk for profile in self.profiles])
+        with mock.patch('notifications.outbox.render_to_string', wraps=outbox.render_to_string) as render:
+            assert outbox.send_pending() == 3
+        # subject and body
+        assert render.call_count == 2
+        assert [message.body.splitlines()[0] for message in mail.outbox] == ['Hello Anna,', 'Hello Ben,',
+                                                                            'Hello Clara,']
+
+    @pytest.mark.django_db
+    def test_concurrent_jobs_send_each_notification_once(self):
+        outbox.notify(Notification.REMINDER, self.tournament, [profile.pk for profile in self.profiles])
+        # a job of another window claimed the notifications first and is still sending them
+        claim = outbox.claim_pending()
+        assert outbox.send_pending() == 0
+        assert outbox._send_claimed(claim) == 3
+        assert len(mail.outbox) == 3
+
+    @pytest.mark.django_db
+    def test_claims_released_on_failure(self):
+        outbox.notify(Notification.REMINDER, self.tournament, [self.profiles[0].pk])
+        with mock.patch('notifications.outbox.render_message', side_effect=RuntimeError('template')):
+            with self.assertRaises(RuntimeError):
+                outbox.send_pending()
+        assert outbox.send_pending() == 1
+
+        # the claims of a killed worker expire
+        outbox.notify(Notification.REMINDER, self.tournament, [self.profiles[1].pk])
+        outbox.claim_pending()
+        Notification.objects.update(claimed_date=timezone.now() - outbox.CLAIM_TIMEOUT * 2)
+        assert outbox.send_pending() == 1
+        assert len(mail.outbox) == 2
+
+    @pytest.mark.django_db
+    def test_send_reminders(self):
+        for profile in self.profiles[:2]:
+            Competitor.objects.create(tournament=self.tournament, user_profile=profile, hcp=18)
+        call_command('send_reminders', stdout=StringIO())
+        call_command('send_reminders', stdout=StringIO())
+        assert Notification.objects.filter(kind=Notification.REMINDER).count() == 2
+        self.run_worker()
+        assert [message.subject for message in mail.outbox] == [f'Reminder: {self.tournament}'] * 2
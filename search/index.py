@@ -0,0 +1,98 @@
+"""
+Search index over tournaments, golf courses and members.
+
+The documents are stored in `SearchEntry`. On SQLite they are queried through the `search_fts` FTS5 table with prefix
+matching and bm25 ranking; other databases fall back to a `LIKE` search.
+"""
+import re
+from typing import Iterable, List
+
+from django.db import connection
+from django.db.models import Case, Q, Value, When
+
+from accounts.models import UserProfile
+from search.models import SearchEntry
+from tournaments.models import GolfCourse, Tournament
+
+FTS_TABLE = 'search_fts'
+MAX_RESULTS = 20
+
+
+def tournament_entry(tournament) -> SearchEntry:
+    course = tournament.course
+    body = ' '.join(filter(None, [course and course.city, tournament.comment]))
+    # same as str(tournament), but the date may still be the raw string the tournament was created with
+    title = f"{course}: {tournament.date}"
+    return SearchEntry(kind=SearchEntry.TOURNAMENT, object_id=tournament.pk, title=title[:200],
+                       body=body, url=tournament.get_absolute_url())
+
+
+def course_entry(course) -> SearchEntry:
+    return SearchEntry(kind=SearchEntry.COURSE, object_id=course.pk, title=course.name,
+                       body=f"{course.city} {course.zip_code} {course.address}")
+
+
+def member_entry(user_profile) -> SearchEntry:
+    return SearchEntry(kind=SearchEntry.MEMBER, object_id=user_profile.pk, title=str(user_profile),
+                       body=user_profile.department)
+
+
+def index_entries(entries: Iterable[SearchEntry]):
+    """ Insert or update the search entries in bulk. """
+    SearchEntry.objects.bulk_create(list(entries), batch_size=500, update_conflicts=True,
+                                    unique_fields=['kind', 'object_id'], update_fields=['title', 'body', 'url'])
+
+
+def remove_entries(kind: str, object_ids: Iterable[int]):
+    SearchEntry.objects.filter(kind=kind, object_id__in=list(object_ids)).delete()
+
+
+def _terms(query: str) -> List[str]:
+    return re.findall(r'\w+', query.lower())
+
+
+def has_fts() -> bool:
+    return connection.vendor == 'sqlite'
+
+
+def search(query: str, limit: int = MAX_RESULTS) -> List[SearchEntry]:
+    """ Entries matching all the terms of the query, each term being matched as a prefix, best matches first. """
+    terms = _terms(query)
+    if not terms:
+        return []
+    if has_fts():
+        return _fts_search(terms, limit)
+    return _fallback_search(terms, limit)
+
+
+def _fts_search(terms: List[str], limit: int) -> List[SearchEntry]:
+    match = ' '.join(f'"{term}"*' for term in terms)
+    # `ORDER BY rank LIMIT` is answered by FTS5 itself, keeping only the best matches while ranking, so that a short
+    # prefix matching most of the index does not sort every document. The ranking (bm25 with a higher weight on the
+    # titles) is configured on the FTS table.
+    return list(SearchEntry.objects.raw(
+        f"SELECT entry.* FROM ("
+        f"    SELECT rowid, rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY rank LIMIT %s"
+        f") AS hits JOIN search_searchentry entry ON entry.id = hits.rowid ORDER BY hits.rank",
+        [match, limit]))
+
+
+def _fallback_search(terms: List[str], limit: int) -> List[SearchEntry]:
+    entries = SearchEntry.objects.all()
+    for term in terms:
+        entries = entries.filter(Q(title__icontains=term) | Q(body__icontains=term))
+    title_matches = Case(When(title__istartswith=terms[0], then=Value(0)), default=Value(1))
+    return list(entries.order_by(title_matches, 'title')[:limit])
+
+
+def rebuild_index():
+    """ Index all the tournaments (except the archived ones), golf courses and members again. """
+    SearchEntry.objects.all().delete()
+    index_entries(tournament_entry(tournament)
+                  for tournament in Tournament.objects.filter(is_archived=False).select_related('course')
+                  .iterator(chunk_size=2000))
+    index_entries(course_entry(course) for course in GolfCourse.objects.iterator(chunk_size=2000))
+    index_entries(member_entry(user_profile) for user_profile in UserProfile.objects.iterator(chunk_size=2000))
+    if has_fts():
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('rebuild')")
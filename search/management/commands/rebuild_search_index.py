@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from search import index
+from search.models import SearchEntry
+
+
+class Command(BaseCommand):
+    help = 'Index all the tournaments, golf courses and members for the search again.'
+
+    def handle(self, *args, **options):
+        index.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {SearchEntry.objects.count()} entries.'))
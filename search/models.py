@@ -0,0 +1,29 @@
+from django.db import models
+
+
+class SearchEntry(models.Model):
+    """ Searchable document of a tournament, a golf course or a member.
+
+    On SQLite the entries are indexed by the `search_fts` FTS5 table, kept in sync by triggers (see migrations).
+    """
+    TOURNAMENT = 'tournament'
+    COURSE = 'course'
+    MEMBER = 'member'
+    KIND_CHOICES = [
+        (TOURNAMENT, 'Tournament'),
+        (COURSE, 'Golf course'),
+        (MEMBER, 'Member'),
+    ]
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    title = models.CharField(max_length=200)
+    body = models.TextField(blank=True)
+    url = models.CharField(max_length=200, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_entry'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.title}"
@@ -0,0 +1,44 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from accounts.models import UserProfile
+from search import index
+from search.models import SearchEntry
+from tournaments.models import GolfCourse, Tournament
+
+
+@receiver(post_save, sender=Tournament)
+def index_tournament(sender, instance, **kwargs):
+    # archived tournaments are not searchable
+    if instance.is_archived:
+        index.remove_entries(SearchEntry.TOURNAMENT, [instance.pk])
+    else:
+        index.index_entries([index.tournament_entry(instance)])
+
+
+@receiver(post_save, sender=GolfCourse)
+def index_course(sender, instance, **kwargs):
+    # the tournaments are found by the name and city of their course as well
+    tournaments = Tournament.objects.filter(course=instance, is_archived=False).select_related('course')
+    index.index_entries([index.course_entry(instance)] +
+                        [index.tournament_entry(tournament) for tournament in tournaments])
+
+
+@receiver(post_save, sender=UserProfile)
+def index_member(sender, instance, **kwargs):
+    index.index_entries([index.member_entry(instance)])
+
+
+@receiver(post_delete, sender=Tournament)
+def remove_tournament(sender, instance, **kwargs):
+    index.remove_entries(SearchEntry.TOURNAMENT, [instance.pk])
+
+
+@receiver(post_delete, sender=GolfCourse)
+def remove_course(sender, instance, **kwargs):
+    index.remove_entries(SearchEntry.COURSE, [instance.pk])
+
+
+@receiver(post_delete, sender=UserProfile)
+def remove_member(sender, instance, **kwargs):
+    index.remove_entries(SearchEntry.MEMBER, [instance.pk])
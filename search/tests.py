@@ -0,0 +1,92 @@
+import datetime
+import time
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from accounts.models import UserProfile
+from search import index
+from search.models import SearchEntry
+from tournaments.models import GolfCourse, Tournament
+
+
+class TestSearch(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='searcher', password='test-search')
+        self.user_profile = UserProfile.objects.create(user=self.user, first_name='Johanna', family_name='Berger',
+                                                       department='Finance', phone_number='+4915150505050')
+        self.golf_course = GolfCourse.objects.create(name='Golfclub Schönbuch', city='Holzgerlingen',
+                                                     zip_code=71088)
+        self.tournament = Tournament.objects.create(date=datetime.date(2024, 5, 8), course=self.golf_course,
+                                                    hcp_limit=36.0, comment='Spring cup with barbecue')
+
+    @pytest.mark.django_db
+    def test_signals_keep_index_in_sync(self):
+        assert SearchEntry.objects.count() == 3
+        self.golf_course.name = 'Golfclub Stuttgart'
+        self.golf_course.save()
+        # the tournament entry contains the name of its course
+        assert [entry.object_id for entry in index.search('stuttgart')] == [self.golf_course.pk,
+                                                                           self.tournament.pk]
+        self.tournament.delete()
+        assert not SearchEntry.objects.filter(kind=SearchEntry.TOURNAMENT).exists()
+        assert index.search('barbecue') == []
+
+    @pytest.mark.django_db
+    def test_prefix_and_ranked_search(self):
+        results = index.search('golfc')
+        # the course matches by title, the tournament as well (the course name is part of its title)
+        assert {entry.kind for entry in results} == {SearchEntry.COURSE, SearchEntry.TOURNAMENT}
+        assert [entry.title for entry in index.search('berg fin')] == ['Johanna Berger']
+        # title matches are ranked before body matches
+        assert index.search('holzgerlingen')[0].kind == SearchEntry.COURSE
+        assert index.search('schonbuch')[0].title == 'Golfclub Schönbuch'
+        assert index.search('') == []
+        assert index.search('"*') == []
+
+    @pytest.mark.django_db
+    def test_fallback_search(self):
+        results = index._fallback_search(['berger'], 10)
+        assert [entry.title for entry in results] == ['Johanna Berger']
+
+    @pytest.mark.django_db
+    def test_rebuild_index(self):
+        SearchEntry.objects.all().delete()
+        index.rebuild_index()
+        assert SearchEntry.objects.count() == 3
+        assert index.search('spring')[0].object_id == self.tournament.pk
+
+    @pytest.mark.django_db
+    def test_search_is_fast_on_large_index(self):
+        index.index_entries(SearchEntry(kind=SearchEntry.MEMBER, object_id=pk, title=f'Member {pk}',
+                                        body=f'Department {pk % 100}') for pk in range(1000, 21000))
+        start = time.perf_counter()
+        results = index.search('member 1999')
+        assert time.perf_counter() - start < 0.05
+        assert results[0].object_id == 1999
+
+        # the best match of a prefix matching every entry is found, whatever its position in the index
+        index.index_entries([SearchEntry(kind=SearchEntry.COURSE, object_id=1, title='Department store golf',
+                                         body='')])
+        start = time.perf_counter()
+        results = index.search('dep')
+        assert time.perf_counter() - start < 0.1
+        assert results[0].title == 'Department store golf'
+
+    @pytest.mark.django_db
+    def test_search_view(self):
+        self.client.login(username='searcher', password='test-search')
+        response = self.client.get(reverse('search:search'), {'q': 'spring'})
+        assert response.status_code == HTTPStatus.OK
+        assert 'search/search.html' in [template.name for template in response.templates]
+
+        response = self.client.get(reverse('search:search'), {'q': 'spring'}, HTTP_HX_REQUEST='true')
+        assert [template.name for template in response.templates] == ['search/partials/results.html']
+        assert self.tournament.get_absolute_url() in response.content.decode()
+
+    def test_search_view_fail_login_required(self):
+        response = self.client.get(reverse('search:search'), {'q': 'spring'})
+        assert response.status_code == HTTPStatus.FOUND
@@ -0,0 +1,14 @@
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import render
+
+from search import index
+
+
+@login_required
+def search_view(request):
+    query = request.GET.get('q', '')
+    context = {'query': query, 'results': index.search(query)}
+    if request.htmx:
+        # search-as-you-type: only the results are swapped
+        return render(request, 'search/partials/results.html', context)
+    return render(request, 'search/search.html', context)
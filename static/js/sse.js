@@ -0,0 +1,84 @@
+/*
+ * Server Sent Events extension for htmx 1.9.
+ *
+ *   <div hx-ext="sse" sse-connect="/stream/" sse-swap="message"></div>
+ *
+ * One EventSource is opened per element with `sse-connect`. The data of every event named in `sse-swap` (on the
+ * element itself or on its children) is swapped like a normal htmx response: `hx-target` and `hx-swap` apply and
+ * `hx-swap-oob` fragments are swapped in place. The browser reconnects on its own when the server ends the stream.
+ */
+(function () {
+    var api;
+
+    htmx.defineExtension('sse', {
+        init: function (apiRef) {
+            api = apiRef;
+            if (htmx.createEventSource === undefined) {
+                htmx.createEventSource = function (url) {
+                    return new EventSource(url, {withCredentials: true});
+                };
+            }
+        },
+
+        onEvent: function (name, evt) {
+            if (name === 'htmx:beforeCleanupElement') {
+                var source = api.getInternalData(evt.target).sseEventSource;
+                if (source) {
+                    source.close();
+                }
+            } else if (name === 'htmx:afterProcessNode') {
+                connect(evt.target);
+            }
+        }
+    });
+
+    function connect(elt) {
+        var url = api.getAttributeValue(elt, 'sse-connect');
+        var internalData = api.getInternalData(elt);
+        if (url == null || internalData.sseEventSource) {
+            return;
+        }
+        var source = htmx.createEventSource(url);
+        internalData.sseEventSource = source;
+        source.onopen = function () {
+            api.triggerEvent(elt, 'htmx:sseOpen', {source: source});
+        };
+        source.onerror = function (err) {
+            api.triggerErrorEvent(elt, 'htmx:sseError', {error: err, source: source});
+        };
+
+        listen(elt, source);
+        var children = elt.querySelectorAll('[sse-swap]');
+        for (var i = 0; i < children.length; i++) {
+            listen(children[i], source);
+        }
+    }
+
+    function listen(elt, source) {
+        var names = api.getAttributeValue(elt, 'sse-swap');
+        if (!names) {
+            return;
+        }
+        names.split(',').forEach(function (name) {
+            source.addEventListener(name.trim(), function (event) {
+                if (!api.bodyContains(elt)) {
+                    source.close();
+                    return;
+                }
+                if (!api.triggerEvent(elt, 'htmx:sseBeforeMessage', event)) {
+                    return;
+                }
+                swap(elt, event.data);
+                api.triggerEvent(elt, 'htmx:sseMessage', event);
+            });
+        });
+    }
+
+    function swap(elt, content) {
+        var swapSpec = api.getSwapSpecification(elt);
+        var target = api.getTarget(elt);
+        var settleInfo = api.makeSettleInfo(elt);
+        api.selectAndSwap(swapSpec.swapStyle, target, elt, content, settleInfo);
+        api.settleImmediately(settleInfo.tasks);
+    }
+})();
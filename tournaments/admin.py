@@ -1,29 +1,171 @@
 from django.contrib import admin
+from django.contrib.admin import helpers
+from django.core.paginator import Paginator
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.forms.models import BaseInlineFormSet
+from django.template.response import TemplateResponse
 
-from tournaments.models import Tournament, Competitor
+from jobs import queue
+from tournaments import tasks
+from tournaments.models import Tournament, Competitor, GolfCourse, CourseHole, Season, SeasonArchive
+
+
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    """Inline formset that only loads a single page of related objects instead of the whole relation."""
+    per_page = 50
+    page_number = 1
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        paginator = Paginator(self.queryset.order_by('registration_date', 'pk'), self.per_page)
+        self.page = paginator.get_page(self.page_number)
+        self.queryset = self.page.object_list
+
+
+class CompetitorInline(admin.TabularInline):
+    model = Competitor
+    formset = PaginatedInlineFormSet
+    template = 'admin/tournaments/competitor_inline.html'
+    fields = ('user_profile', 'hcp', 'registration_date')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+    show_change_link = True
+    per_page = 50
+    page_param = 'competitors_page'
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user_profile')
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.per_page = self.per_page
+        formset.page_number = request.GET.get(self.page_param, 1)
+        formset.page_param = self.page_param
+        return formset
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+class CourseHoleInline(admin.TabularInline):
+    model = CourseHole
+    max_num = 18
+
+    def get_extra(self, request, obj=None, **kwargs):
+        return 0 if obj and obj.holes.exists() else 18
+
+
+class GolfCourseAdmin(admin.ModelAdmin):
+    list_display = ('name', 'city', 'zip_code', 'country')
+    list_filter = ('country',)
+    search_fields = ('^name', '^city')
+    inlines = (CourseHoleInline,)
+
+
+@admin.action(description='Archive the selected tournaments', permissions=['change'])
+def archive_tournaments(modeladmin, request, queryset):
+    # imported by the actions using them only, not at the boot of every worker
+    from tournaments import deletion
+
+    deletion.archive_tournaments(queryset.values_list('pk', flat=True))
+
+
+@admin.action(description='Restore the selected tournaments from the archive', permissions=['change'])
+def restore_tournaments(modeladmin, request, queryset):
+    from tournaments import deletion
+
+    deletion.archive_tournaments(queryset.values_list('pk', flat=True), archived=False)
+
+
+@admin.action(description='Delete the selected tournaments (in bulk)', permissions=['delete'])
+def delete_tournaments(modeladmin, request, queryset):
+    from tournaments import deletion
+
+    # same confirmation step as Django's `delete_selected`: the form posts back to the action with `post`
+    if request.POST.get('post'):
+        deleted = deletion.delete_tournaments(queryset.values_list('pk', flat=True))
+        modeladmin.message_user(request, f'{deleted} tournaments deleted.')
+        return None
+    context = {
+        **modeladmin.admin_site.each_context(request),
+        'title': 'Are you sure?',
+        'opts': modeladmin.model._meta,
+        'queryset': queryset.select_related('course').order_by('date'),
+        'competitor_count': Competitor.objects.filter(tournament__in=queryset.values('pk')).count(),
+        'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        'media': modeladmin.media,
+    }
+    request.current_app = modeladmin.admin_site.name
+    return TemplateResponse(request, 'admin/tournaments/delete_tournaments_confirmation.html', context)
 
 
-# Register your models here.
 class TournamentAdmin(admin.ModelAdmin):
-    list_display = ('id', 'date', 'tee_time', 'hcp_limit')
-    search_fields = ('id', 'date', 'tee_time', 'course')
-    readonly_fields = ('id', 'creation_date', 'updated_date', 'display_participants_and_dates')
+    list_display = ('id', 'course', 'date', 'tee_time', 'hcp_limit', 'participant_count', 'max_participants',
+                    'is_archived')
+    list_filter = ('is_archived',)
+    list_select_related = ('course', 'supervisor')
+    search_fields = ('^course__name', '^course__city', 'slug')
+    date_hierarchy = 'date'
+    autocomplete_fields = ('course', 'supervisor')
+    readonly_fields = ('id', 'creation_date', 'updated_date')
+    inlines = (CompetitorInline,)
+    actions = [archive_tournaments, restore_tournaments, delete_tournaments]
 
-    def display_participants_and_dates(self, obj):
-        """Create a string for the Tournament. This is required to display participant and their registration dates
-        in the list view."""
-        return '\n '.join(
-            [f'{participant.registration_date} -- {participant.competitor}' for participant
-             in obj.competitor_set.all()])
+    def get_queryset(self, request):
+        # correlated subquery so that the changelist count and date hierarchy queries stay free of a GROUP BY
+        participant_total = (Competitor.objects.filter(tournament=OuterRef('pk')).order_by()
+                             .values('tournament').annotate(total=Count('pk')).values('total'))
+        return super().get_queryset(request).annotate(participant_total=Coalesce(Subquery(participant_total), 0))
 
-    display_participants_and_dates.short_description = 'Participants (Registration Dates)'
+    @admin.display(description='Participants', ordering='participant_total')
+    def participant_count(self, obj):
+        return obj.participant_total
 
 
 class CompetitorsAdmin(admin.ModelAdmin):
-    list_display = ('tournament', 'user_profile', 'registration_date')
-    readonly_fields = ('tournament', 'user_profile', 'registration_date')
-    search_fields = ('tournament', 'user_profile')
+    list_display = ('tournament', 'user_profile', 'hcp', 'registration_date')
+    list_select_related = ('tournament__course', 'user_profile')
+    search_fields = ('^user_profile__family_name', '^user_profile__first_name', '^tournament__course__name')
+    date_hierarchy = 'registration_date'
+    autocomplete_fields = ('tournament', 'user_profile')
+
+    def get_readonly_fields(self, request, obj=None):
+        # the registration itself cannot be moved to another tournament or member once created
+        if obj is not None:
+            return 'tournament', 'user_profile', 'registration_date'
+        return 'registration_date',
+
+
+class SeasonAdmin(admin.ModelAdmin):
+    list_display = ('year', 'name', 'counting_results')
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and {'points_table', 'counting_results'} & set(form.changed_data):
+            # a rebuild rewrites all the standings of the season: done by the worker, once for a burst of changes
+            queue.enqueue(tasks.rebuild_season.task_name, dedup_key=f'rebuild-season:{obj.pk}',
+                          created_by=request.user, season_id=obj.pk)
+            self.message_user(request, 'The standings of the season are being recomputed in the background.')
+
+
+class SeasonArchiveAdmin(admin.ModelAdmin):
+    list_display = ('year', 'name', 'tournament_count', 'competitor_count', 'created_date')
+    exclude = ('data',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('data')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
 
+admin.site.register(GolfCourse, GolfCourseAdmin)
 admin.site.register(Tournament, TournamentAdmin)
 admin.site.register(Competitor, CompetitorsAdmin)
+admin.site.register(Season, SeasonAdmin)
+admin.site.register(SeasonArchive, SeasonArchiveAdmin)
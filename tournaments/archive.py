@@ -0,0 +1,111 @@
+"""
+Cold storage of finished seasons.
+
+A season (the tournaments of a calendar year with their competitors, scores and order of merit) is serialised into
+a single `SeasonArchive` row of zlib-compressed JSON, then removed from the live tables, so that these stay
+proportional to the active seasons. The rows of a table are stored column-wise: a list of column names and a list
+of values per row. Snapshots are only decompressed to be displayed by the history view.
+"""
+import json
+import zlib
+from typing import List
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F
+
+from tournaments import deletion
+from tournaments.models import Competitor, Season, SeasonArchive, SeasonStanding, Tournament, TournamentResult
+
+SNAPSHOT_VERSION = 1
+COMPETITOR_COLUMNS = ['member', 'department', 'hcp', 'playing_handicap', 'gross', 'net', 'stableford_points',
+                      'position', 'points']
+STANDING_COLUMNS = ['rank', 'member', 'department', 'points', 'events_played', 'events_counted']
+
+
+def _member(first_name: str, family_name: str) -> str:
+    return f'{first_name} {family_name}'
+
+
+def snapshot_season(year: int) -> dict:
+    """ Everything displayed about the season, with one query per table whatever its size. """
+    season = Season.objects.filter(year=year).first()
+    tournaments = list(Tournament.objects.filter(date__year=year).select_related('course').order_by('date', 'pk'))
+    results = {(tournament_id, profile_id): (position, points) for tournament_id, profile_id, position, points in
+               TournamentResult.objects.filter(tournament__date__year=year)
+               .values_list('tournament_id', 'user_profile_id', 'position', 'points')}
+
+    competitors = {tournament.pk: [] for tournament in tournaments}
+    rows = (Competitor.objects
+            .filter(tournament__date__year=year)
+            .order_by('tournament', F('score__stableford_points').desc(nulls_last=True), 'pk')
+            .values_list('tournament_id', 'user_profile_id', 'user_profile__first_name',
+                         'user_profile__family_name', 'user_profile__department', 'hcp', 'score__playing_handicap',
+                         'score__gross', 'score__net', 'score__stableford_points'))
+    for tournament_id, profile_id, first_name, family_name, department, *card in rows:
+        position, points = results.get((tournament_id, profile_id), (None, None))
+        competitors[tournament_id].append([_member(first_name, family_name), department, *card, position, points])
+
+    standings = []
+    if season is not None:
+        standings = [[rank, _member(first_name, family_name), department, points, played, counted]
+                     for rank, first_name, family_name, department, points, played, counted in
+                     SeasonStanding.objects.filter(season=season).order_by('rank', 'pk')
+                     .values_list('rank', 'user_profile__first_name', 'user_profile__family_name',
+                                  'user_profile__department', 'points', 'events_played', 'events_counted')]
+
+    return {
+        'version': SNAPSHOT_VERSION,
+        'year': year,
+        'name': season.name if season else '',
+        'points_table': season.points_table if season else [],
+        'counting_results': season.counting_results if season else None,
+        'tournaments': [{
+            'date': tournament.date,
+            'tee_time': tournament.tee_time,
+            'course': tournament.course.name if tournament.course else '',
+            'city': tournament.course.get_full_city() if tournament.course else '',
+            'hcp_limit': tournament.hcp_limit,
+            'max_participants': tournament.max_participants,
+            'comment': tournament.comment,
+            'competitor_columns': COMPETITOR_COLUMNS,
+            'competitors': competitors[tournament.pk],
+        } for tournament in tournaments],
+        'standing_columns': STANDING_COLUMNS,
+        'standings': standings,
+    }
+
+
+def compress(snapshot: dict) -> bytes:
+    return zlib.compress(json.dumps(snapshot, cls=DjangoJSONEncoder, separators=(',', ':')).encode(), 9)
+
+
+def load_snapshot(archive: SeasonArchive) -> dict:
+    """ Decompress the snapshot, the rows of the tables as dicts for the templates. """
+    snapshot = json.loads(zlib.decompress(archive.data))
+    for tournament in snapshot['tournaments']:
+        tournament['competitors'] = [dict(zip(tournament['competitor_columns'], row))
+                                     for row in tournament['competitors']]
+    snapshot['standings'] = [dict(zip(snapshot['standing_columns'], row)) for row in snapshot['standings']]
+    return snapshot
+
+
+def archive_season(year: int) -> SeasonArchive:
+    """ Store the snapshot of the season and delete it from the live tables, in one transaction. """
+    with transaction.atomic():
+        snapshot = snapshot_season(year)
+        archive = SeasonArchive.objects.create(
+            year=year, name=snapshot['name'], data=compress(snapshot),
+            tournament_count=len(snapshot['tournaments']),
+            competitor_count=sum(len(tournament['competitors']) for tournament in snapshot['tournaments']))
+        # the order of merit first, so that deleting the tournaments does not update it
+        deletion.raw_cascade_delete(Season.objects.filter(year=year))
+        deletion.delete_tournaments(Tournament.objects.filter(date__year=year).values_list('pk', flat=True))
+    return archive
+
+
+def archivable_years(before: int) -> List[int]:
+    """ Years before `before` with tournaments or a season still in the live tables. """
+    years = {date.year for date in Tournament.objects.filter(date__year__lt=before).dates('date', 'year')}
+    years |= set(Season.objects.filter(year__lt=before).values_list('year', flat=True))
+    return sorted(years)
@@ -0,0 +1,83 @@
+"""
+Bulk deletion of tournaments without Django's collector.
+
+`QuerySet.delete()` loads every related object into memory to cascade and send signals, so deleting past seasons
+loads all their competitors, scores and hole scores. Here the cascade is followed on the model relations and each
+related table is deleted with one `DELETE ... WHERE ... IN (SELECT ...)` statement, a batch of tournaments per
+transaction. No signals are sent: the search index, the calendar feeds, the order of merit and the registrations
+of the members are updated here. Archiving keeps the rows but takes the tournaments out of the search index.
+"""
+from collections import defaultdict
+from typing import Iterable
+
+from django.db import models, transaction
+from django.db.models.deletion import ProtectedError
+from django.utils import timezone
+
+from accounts import registrations
+from search import index
+from search.models import SearchEntry
+from tournaments import ical, merit
+from tournaments.models import Competitor, Season, Tournament, TournamentResult
+
+BATCH_SIZE = 50
+
+
+def raw_cascade_delete(queryset: models.QuerySet) -> int:
+    """ Delete the rows of the queryset and, first, the rows referencing them (recursively). """
+    model = queryset.model
+    for relation in model._meta.related_objects:
+        if relation.many_to_many:
+            # the participants are stored by the explicit `Competitor` model
+            continue
+        related = relation.related_model._base_manager.filter(**{f'{relation.field.name}__in': queryset})
+        on_delete = relation.on_delete
+        if on_delete is models.CASCADE:
+            raw_cascade_delete(related)
+        elif on_delete is models.SET_NULL:
+            related.update(**{relation.field.name: None})
+        elif on_delete is models.PROTECT:
+            if related.exists():
+                raise ProtectedError(f'{relation.related_model.__name__} rows reference the deleted rows', set())
+        elif on_delete is not models.DO_NOTHING:
+            raise NotImplementedError(f'on_delete={on_delete.__name__} of {relation} is not supported')
+    # internal API used by the collector itself for the fast deletes: one DELETE statement, no instance loaded
+    return queryset._raw_delete(queryset.db)
+
+
+def delete_tournaments(tournament_ids: Iterable[int], batch_size: int = BATCH_SIZE) -> int:
+    """ Delete the tournaments and everything referencing them, return the number of tournaments deleted. """
+    tournament_ids = list(tournament_ids)
+    deleted = 0
+    for start in range(0, len(tournament_ids), batch_size):
+        batch = tournament_ids[start:start + batch_size]
+        with transaction.atomic():
+            ranked = defaultdict(set)
+            for season_id, profile_id in (TournamentResult.objects.filter(tournament__in=batch)
+                                          .values_list('season_id', 'user_profile_id')):
+                ranked[season_id].add(profile_id)
+            registered = set(Competitor.objects.filter(tournament__in=batch).values_list('user_profile_id', flat=True))
+            deleted += raw_cascade_delete(Tournament.objects.filter(pk__in=batch))
+            # the members ranked in the order of merit lose the results of the deleted tournaments
+            for season in Season.objects.filter(pk__in=ranked):
+                merit.update_standings(season, ranked[season.pk])
+        index.remove_entries(SearchEntry.TOURNAMENT, batch)
+        # the ids of the deleted tournaments may be reused
+        registrations.invalidate(registered)
+    if deleted:
+        ical.bump_version()
+    return deleted
+
+
+def archive_tournaments(tournament_ids: Iterable[int], archived: bool = True) -> int:
+    """ Archive (or restore) the tournaments: they leave (or return to) the search index as well. """
+    tournament_ids = list(tournament_ids)
+    updated = Tournament.objects.filter(pk__in=tournament_ids).update(is_archived=archived,
+                                                                      updated_date=timezone.now())
+    if archived:
+        index.remove_entries(SearchEntry.TOURNAMENT, tournament_ids)
+    else:
+        index.index_entries(index.tournament_entry(tournament)
+                            for tournament in Tournament.objects.filter(pk__in=tournament_ids).select_related('course'))
+    ical.bump_version()
+    return updated
@@ -1,6 +1,10 @@
+import datetime
+
 from django import forms
+from django.core.validators import MinValueValidator, MaxValueValidator
 
 from accounts.models import UserProfile
+from tournaments import geo, schedule
 from tournaments.models import Tournament, GolfCourse
 
 
@@ -14,3 +18,51 @@ class GolfCourseForm(forms.ModelForm):
     class Meta:
         model = GolfCourse
         fields = '__all__'
+
+
+class CompetitorImportForm(forms.Form):
+    file = forms.FileField(help_text='CSV file with a "username" and a "hcp" column')
+    dry_run = forms.BooleanField(required=False, initial=True,
+                                 help_text='Only check the file, nothing is saved')
+
+
+class SeasonBuilderForm(forms.Form):
+    start_date = forms.DateField(help_text='Date of the first tournament, the series keeps its weekday')
+    end_date = forms.DateField(help_text='No tournament after this date')
+    interval_weeks = forms.IntegerField(initial=2, min_value=1, max_value=8, help_text='Weeks between tournaments')
+    courses = forms.ModelMultipleChoiceField(queryset=GolfCourse.objects.order_by('name'),
+                                             help_text='Used in rotation, in alphabetical order')
+    tee_time = forms.TimeField(required=False, initial=datetime.time(9, 0))
+    hcp_limit = forms.DecimalField(max_digits=3, decimal_places=1, initial=54.0,
+                                   validators=[MinValueValidator(0.0), MaxValueValidator(54.0)])
+    hcp_relevant = forms.BooleanField(required=False, initial=True)
+    max_participants = forms.IntegerField(initial=30, min_value=1)
+    supervisor = forms.ModelChoiceField(queryset=UserProfile.objects.order_by('family_name', 'first_name'),
+                                        required=False)
+    comment = forms.CharField(widget=forms.Textarea, required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date, end_date = cleaned_data.get('start_date'), cleaned_data.get('end_date')
+        interval_weeks = cleaned_data.get('interval_weeks')
+        if start_date and end_date and interval_weeks:
+            if end_date < start_date:
+                raise forms.ValidationError('The end date is before the start date.')
+            if len(schedule.season_dates(start_date, end_date, interval_weeks)) > schedule.MAX_EVENTS:
+                raise forms.ValidationError(f'At most {schedule.MAX_EVENTS} tournaments can be created at once.')
+        return cleaned_data
+
+
+class NearbyForm(forms.Form):
+    zip_code = forms.IntegerField(min_value=0, max_value=99999)
+    country = forms.ChoiceField(choices=GolfCourse.COUNTRY_CHOICES, initial=GolfCourse.GERMANY)
+    radius = forms.IntegerField(initial=50, min_value=1, max_value=500, help_text='km')
+
+    def clean(self):
+        cleaned_data = super().clean()
+        zip_code, country = cleaned_data.get('zip_code'), cleaned_data.get('country')
+        if zip_code is not None and country:
+            cleaned_data['coordinates'] = geo.geocode(country, zip_code)
+            if cleaned_data['coordinates'] is None:
+                raise forms.ValidationError('Unknown zip code.')
+        return cleaned_data
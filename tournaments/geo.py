@@ -0,0 +1,196 @@
+"""
+"Courses near me": coordinates of the golf courses and a spatial index answering radius and k-nearest queries.
+
+The courses are geocoded offline: their latitude and longitude are the centre of their zip code area, looked up in
+the `ZipCoordinate` table (loaded from a GeoNames postal code file by `manage.py load_zip_coordinates`) when a course
+is saved. The courses are indexed in memory in a grid of `CELL_DEGREES` cells, so a query only computes the distance
+to the courses of the few cells around the searched point instead of scanning every course. Each worker rebuilds its
+index, with one query, when the version bumped on every change of a course differs from the one it was built at. The
+version is kept in the shared cache, so that the courses located by `manage.py load_zip_coordinates`, in another
+process, are found by the web workers.
+"""
+import csv
+import math
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, IO, Iterable, List, Optional, Tuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from tournaments.models import GolfCourse, Tournament, ZipCoordinate
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+# about 55 km north-south, a radius query of 50 km reads at most 3 x 3 cells
+CELL_DEGREES = 0.5
+VERSION_KEY = 'course-index-version'
+# columns of the GeoNames postal code files (tab separated, no header)
+GEONAMES_COUNTRY, GEONAMES_ZIP_CODE, GEONAMES_PLACE, GEONAMES_LATITUDE, GEONAMES_LONGITUDE = 0, 1, 2, 9, 10
+BATCH_SIZE = 1000
+# country codes of the golf courses differing from the ISO codes of GeoNames
+GEONAMES_COUNTRIES = {GolfCourse.ENGLAND: 'GB'}
+
+Coordinates = Tuple[float, float]
+
+
+def distance_km(latitude: float, longitude: float, other_latitude: float, other_longitude: float) -> float:
+    """ Great-circle distance (haversine formula). """
+    latitude, longitude, other_latitude, other_longitude = map(
+        math.radians, (latitude, longitude, other_latitude, other_longitude))
+    a = (math.sin((other_latitude - latitude) / 2) ** 2
+         + math.cos(latitude) * math.cos(other_latitude) * math.sin((other_longitude - longitude) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class GridIndex:
+    """ Points `(key, latitude, longitude)` bucketed by cell of `cell_degrees` x `cell_degrees`. The longitudes do
+    not wrap around the antimeridian, the courses are in Europe. """
+
+    def __init__(self, points: Iterable[Tuple[int, float, float]], cell_degrees: float = CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self.cells: Dict[Tuple[int, int], List[Tuple[int, float, float]]] = defaultdict(list)
+        for point in points:
+            self.cells[self._cell(point[1], point[2])].append(point)
+        self.size = sum(len(points) for points in self.cells.values())
+        rows, columns = zip(*self.cells) if self.cells else ((0,), (0,))
+        # the rings searched by `nearest` stop once they cover every cell
+        self._bounds = (min(rows), max(rows), min(columns), max(columns))
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees)
+
+    def _distances(self, cells, latitude: float, longitude: float) -> List[Tuple[float, int]]:
+        return [(distance_km(latitude, longitude, point_latitude, point_longitude), key)
+                for cell in cells for key, point_latitude, point_longitude in self.cells.get(cell, ())]
+
+    def within(self, latitude: float, longitude: float, radius_km: float) -> List[Tuple[float, int]]:
+        """ `(distance, key)` of the points at most `radius_km` away, nearest first. """
+        latitude_span = radius_km / KM_PER_DEGREE
+        widest = min(abs(latitude) + latitude_span, 89.0)
+        longitude_span = radius_km / (KM_PER_DEGREE * math.cos(math.radians(widest)))
+        bottom, left = self._cell(latitude - latitude_span, longitude - longitude_span)
+        top, right = self._cell(latitude + latitude_span, longitude + longitude_span)
+        cells = ((row, column) for row in range(bottom, top + 1) for column in range(left, right + 1))
+        return sorted(found for found in self._distances(cells, latitude, longitude) if found[0] <= radius_km)
+
+    def _ring(self, row: int, column: int, ring: int):
+        if ring == 0:
+            return [(row, column)]
+        sides = [(row - ring, column + offset) for offset in range(-ring, ring + 1)]
+        sides += [(row + ring, column + offset) for offset in range(-ring, ring + 1)]
+        sides += [(row + offset, column - ring) for offset in range(-ring + 1, ring)]
+        sides += [(row + offset, column + ring) for offset in range(-ring + 1, ring)]
+        return sides
+
+    def _outside_km(self, latitude: float, longitude: float, row: int, column: int, ring: int) -> float:
+        """ Lower bound of the distance to the points outside the square of the rings searched so far (up to the
+        difference between a parallel and the great circle, negligible over a few cells). """
+        cell = self.cell_degrees
+        latitude_gap = min(latitude - (row - ring) * cell, (row + ring + 1) * cell - latitude)
+        longitude_gap = min(longitude - (column - ring) * cell, (column + ring + 1) * cell - longitude)
+        # the parallels shorten towards the poles: the gap is measured at the edge of the square farthest from the
+        # equator
+        widest = min(max(abs((row - ring) * cell), abs((row + ring + 1) * cell)), 89.0)
+        return KM_PER_DEGREE * min(latitude_gap, longitude_gap * math.cos(math.radians(widest)))
+
+    def nearest(self, latitude: float, longitude: float, k: int) -> List[Tuple[float, int]]:
+        """ `(distance, key)` of the `k` nearest points, nearest first, searched ring of cells by ring of cells. """
+        if not self.size:
+            return []
+        row, column = self._cell(latitude, longitude)
+        bottom, top, left, right = self._bounds
+        rings = max(row - bottom, top - row, column - left, right - column, 0)
+        found = []
+        for ring in range(rings + 1):
+            found += self._distances(self._ring(row, column, ring), latitude, longitude)
+            found.sort()
+            if len(found) >= k and found[k - 1][0] <= self._outside_km(latitude, longitude, row, column, ring):
+                break
+        return found[:k]
+
+
+_index: Optional[GridIndex] = None
+_index_version = None
+_index_lock = threading.Lock()
+
+
+def bump_version():
+    """ Rebuild the course index of every worker, in every process, on its next query. """
+    # a time rather than `cache.incr`, which is not atomic with the file based cache
+    previous = cache.get(VERSION_KEY, 0)
+    cache.set(VERSION_KEY, max(time.time_ns(), previous + 1), timeout=None)
+
+
+def get_index() -> GridIndex:
+    global _index, _index_version
+    version = cache.get(VERSION_KEY)
+    with _index_lock:
+        if _index is None or _index_version != version:
+            _index = GridIndex(GolfCourse.objects.filter(latitude__isnull=False)
+                               .values_list('pk', 'latitude', 'longitude'))
+            _index_version = version
+        return _index
+
+
+def geonames_country(country: str) -> str:
+    return GEONAMES_COUNTRIES.get(country, country)
+
+
+def geocode(country: str, zip_code: int) -> Optional[Coordinates]:
+    return (ZipCoordinate.objects.filter(country=geonames_country(country), zip_code=zip_code)
+            .values_list('latitude', 'longitude').first())
+
+
+def nearby_tournaments(coordinates: Coordinates, radius_km: float) -> List[Tuple[float, Tournament]]:
+    """ `(distance, tournament)` of the upcoming tournaments at the courses within the radius, nearest first. """
+    distances = {pk: distance for distance, pk in get_index().within(*coordinates, radius_km)}
+    tournaments = (Tournament.objects
+                   .filter(course__in=distances, is_archived=False, date__gte=timezone.now().date())
+                   .select_related('course'))
+    return sorted(((distances[tournament.course_id], tournament) for tournament in tournaments),
+                  key=lambda found: (found[0], found[1].date))
+
+
+def nearest_courses(coordinates: Coordinates, k: int) -> List[Tuple[float, GolfCourse]]:
+    nearest = get_index().nearest(*coordinates, k)
+    courses = GolfCourse.objects.in_bulk([pk for _, pk in nearest])
+    return [(distance, courses[pk]) for distance, pk in nearest if pk in courses]
+
+
+def load_zip_coordinates(lines: IO[str]) -> int:
+    """ Replace the zip codes of the countries of a GeoNames postal code file, return the number of zip codes.
+    Zip codes shared by several places are located at the mean of their coordinates. """
+    places = defaultdict(list)
+    for row in csv.reader(lines, delimiter='\t'):
+        zip_code = row[GEONAMES_ZIP_CODE]
+        if not zip_code.isdigit():
+            # the courses store numeric zip codes only
+            continue
+        places[row[GEONAMES_COUNTRY], int(zip_code)].append(
+            (row[GEONAMES_PLACE], float(row[GEONAMES_LATITUDE]), float(row[GEONAMES_LONGITUDE])))
+    coordinates = [ZipCoordinate(country=country, zip_code=zip_code, place=rows[0][0][:100],
+                                 latitude=sum(row[1] for row in rows) / len(rows),
+                                 longitude=sum(row[2] for row in rows) / len(rows))
+                   for (country, zip_code), rows in places.items()]
+    with transaction.atomic():
+        ZipCoordinate.objects.filter(country__in={country for country, _ in places}).delete()
+        ZipCoordinate.objects.bulk_create(coordinates, batch_size=BATCH_SIZE)
+    return len(coordinates)
+
+
+def geocode_courses() -> int:
+    """ Locate the courses from the zip code table, return the number of courses located. """
+    coordinates = {(country, zip_code): (latitude, longitude) for country, zip_code, latitude, longitude in
+                   ZipCoordinate.objects.filter(zip_code__in=GolfCourse.objects.values('zip_code'))
+                   .values_list('country', 'zip_code', 'latitude', 'longitude')}
+    courses = list(GolfCourse.objects.only('country', 'zip_code', 'latitude', 'longitude'))
+    for course in courses:
+        key = geonames_country(course.country), course.zip_code
+        course.latitude, course.longitude = coordinates.get(key, (None, None))
+    GolfCourse.objects.bulk_update(courses, ['latitude', 'longitude'], batch_size=BATCH_SIZE)
+    # `bulk_update` sends no signals
+    bump_version()
+    return sum(course.latitude is not None for course in courses)
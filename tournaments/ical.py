@@ -0,0 +1,168 @@
+"""
+iCalendar (RFC 5545) feeds of the tournament calendar, global or with the registration status of a member. Both
+are served to the members only, authenticated by a signed token in the URL.
+
+Calendar clients poll the feeds every few minutes: the serialised calendars are cached under a version which is
+bumped whenever a tournament, a course or a registration changes (see `tournaments.signals`), so a poll costs a
+cache lookup. The version is the time of the last change, stored in the cache shared by all the processes: it is the
+Last-Modified of the feeds, and with their ETag allows clients to skip the download entirely.
+"""
+import datetime
+import hashlib
+import time
+from typing import NamedTuple, Optional
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils import timezone
+
+from tournaments.models import Competitor, Tournament
+
+VERSION_KEY = 'calendar-version'
+SECOND = 10 ** 9
+FEED_KEY = 'calendar-feed:{version}:{profile_pk}:{base_url}'
+TOKEN_SALT = 'tournaments.calendar'
+# the members subscribe again with a new token from the tournament list once a year
+TOKEN_MAX_AGE = datetime.timedelta(days=365)
+PRODUCT_ID = '-//KSF Golf//Tournament calendar//EN'
+EVENT_DURATION = datetime.timedelta(hours=5)
+# tournaments of the past year are kept in the feeds
+HISTORY = datetime.timedelta(days=365)
+
+
+class Feed(NamedTuple):
+    content: str
+    etag: str
+    last_modified: Optional[datetime.datetime]
+
+
+def feed_token(profile_pk: int) -> str:
+    """ Token of the feeds of a member: calendar clients cannot log in, the URL itself authenticates. """
+    return signing.dumps(profile_pk, salt=TOKEN_SALT)
+
+
+def profile_from_token(token: str) -> int:
+    """ :raise signing.BadSignature: if the token was not issued by `feed_token` or is older than `TOKEN_MAX_AGE` """
+    return signing.loads(token, salt=TOKEN_SALT, max_age=TOKEN_MAX_AGE)
+
+
+def get_version() -> int:
+    """ Time of the last change of a tournament, a course or a registration, in nanoseconds since the epoch. """
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # unknown (first use, cache cleared): anything may have changed
+        version = time.time_ns()
+        if not cache.add(VERSION_KEY, version, timeout=None):
+            version = cache.get(VERSION_KEY, version)
+    return version
+
+
+def bump_version():
+    """ Invalidate all the cached feeds. Every change gets a second of its own, the precision of Last-Modified. """
+    previous = cache.get(VERSION_KEY, 0)
+    cache.set(VERSION_KEY, max(time.time_ns(), (previous // SECOND + 1) * SECOND), timeout=None)
+
+
+def changed_date(version: int) -> datetime.datetime:
+    return datetime.datetime.fromtimestamp(version // SECOND, tz=datetime.timezone.utc)
+
+
+def escape_text(value: str) -> str:
+    return (value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def fold_line(line: str) -> str:
+    """ Fold a content line at 75 octets, continuation lines start with a space. """
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line
+    parts = []
+    while encoded:
+        size = 75 if not parts else 74
+        # do not split a multi-byte character
+        while size < len(encoded) and (encoded[size] & 0xC0) == 0x80:
+            size -= 1
+        parts.append(encoded[:size].decode('utf-8'))
+        encoded = encoded[size:]
+    return '\r\n '.join(parts)
+
+
+def format_utc(value: datetime.datetime) -> str:
+    return value.astimezone(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def tournament_event(tournament: Tournament, base_url: str, registered: Optional[bool]) -> list:
+    course = tournament.course
+    if tournament.participant_total >= tournament.max_participants:
+        status = 'full'
+    else:
+        status = 'open'
+    if registered:
+        status = 'registered'
+
+    lines = ['BEGIN:VEVENT',
+             f'UID:tournament-{tournament.pk}@ksfgolf',
+             f'DTSTAMP:{format_utc(tournament.updated_date)}',
+             f'LAST-MODIFIED:{format_utc(tournament.updated_date)}']
+    if tournament.tee_time:
+        start = datetime.datetime.combine(tournament.date, tournament.tee_time, tzinfo=ZoneInfo(settings.TIME_ZONE))
+        lines += [f'DTSTART:{format_utc(start)}', f'DTEND:{format_utc(start + EVENT_DURATION)}']
+    else:
+        lines += [f'DTSTART;VALUE=DATE:{tournament.date.strftime("%Y%m%d")}',
+                  f'DTEND;VALUE=DATE:{(tournament.date + datetime.timedelta(days=1)).strftime("%Y%m%d")}']
+
+    summary = f'Golf tournament: {course.name}' if course else 'Golf tournament'
+    description = (f'Registration: {status} ({tournament.participant_total}/{tournament.max_participants})\n'
+                   f'Handicap limit: {tournament.hcp_limit}')
+    if tournament.comment:
+        description += f'\n{tournament.comment}'
+    lines += [f'SUMMARY:{escape_text(summary)}',
+              f'DESCRIPTION:{escape_text(description)}',
+              f'URL:{base_url.rstrip("/")}{tournament.get_absolute_url()}',
+              'STATUS:CONFIRMED']
+    if course:
+        location = f'{course.name}, {course.address}, {course.get_full_city()}'
+        lines.append(f'LOCATION:{escape_text(location)}')
+    lines.append('END:VEVENT')
+    return lines
+
+
+def build_calendar(profile_pk: Optional[int], base_url: str, last_modified: Optional[datetime.datetime] = None) -> Feed:
+    """ Serialise the calendar, with the registration status of the member if a profile is given. """
+    tournaments = (Tournament.objects
+                   .filter(is_archived=False, date__gte=timezone.now().date() - HISTORY)
+                   .select_related('course')
+                   .annotate(participant_total=Count('competitor'))
+                   .order_by('date', 'tee_time'))
+    registered_ids = set()
+    if profile_pk is not None:
+        registered_ids = set(Competitor.objects.filter(user_profile_id=profile_pk)
+                             .values_list('tournament_id', flat=True))
+
+    lines = ['BEGIN:VCALENDAR', 'VERSION:2.0', f'PRODID:{PRODUCT_ID}', 'CALSCALE:GREGORIAN', 'METHOD:PUBLISH',
+             'X-WR-CALNAME:KSF Golf tournaments']
+    for tournament in tournaments:
+        registered = tournament.pk in registered_ids if profile_pk is not None else None
+        lines += tournament_event(tournament, base_url, registered)
+    lines.append('END:VCALENDAR')
+
+    content = ''.join(f'{fold_line(line)}\r\n' for line in lines)
+    etag = f'"{hashlib.sha1(content.encode()).hexdigest()}"'
+    return Feed(content, etag, last_modified)
+
+
+def get_feed(profile_pk: Optional[int], base_url: str) -> Feed:
+    """ Serialised calendar, from the cache unless something changed since it was built. """
+    version = get_version()
+    key = FEED_KEY.format(version=version, profile_pk=profile_pk or 'all',
+                          base_url=hashlib.md5(base_url.encode()).hexdigest())
+    feed = cache.get(key)
+    if feed is None:
+        # the registrations and deletions change the feed as well, not only the tournaments
+        feed = build_calendar(profile_pk, base_url, last_modified=changed_date(version))
+        cache.set(key, feed, timeout=24 * 3600)
+    return feed
@@ -0,0 +1,172 @@
+"""
+Import of the registrations and handicaps of a tournament from a CSV file, e.g. a guest list or the handicaps sent
+by the federation.
+
+The file has a `username` and an `hcp` column, separated by commas or, as exported by the spreadsheets of the countries
+writing a decimal comma, by semicolons. Unknown members are registered, the handicap of the registered ones
+is updated. The file is streamed and validated row by row, the members are resolved in bulk for the whole file and
+all the changes are written in bulk inside a single transaction, or not at all in a dry run.
+"""
+import csv
+import io
+from collections import defaultdict
+from decimal import Decimal
+from typing import IO, Dict, List, NamedTuple, Tuple
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts import registrations
+from tournaments import ical, utils
+from tournaments.models import Competitor, Tournament
+
+REQUIRED_COLUMNS = {'username', 'hcp'}
+BATCH_SIZE = 500
+# files which are not UTF-8 are read as Windows-1252 (a superset of Latin-1), the encoding of the spreadsheet exports
+ENCODINGS = ('utf-8-sig', 'cp1252')
+DELIMITERS = ',;'
+# start of the file from which the delimiter is guessed
+SNIFF_SIZE = 64 * 1024
+
+
+class ImportReport(NamedTuple):
+    created: int
+    updated: int
+    unchanged: int
+    # line number in the file and message
+    errors: List[Tuple[int, str]]
+    dry_run: bool
+
+    @property
+    def total(self):
+        return self.created + self.updated + self.unchanged + len(self.errors)
+
+
+def read_rows(csv_file: IO[bytes], errors: list) -> Dict[str, Tuple[int, Decimal]]:
+    """ Valid rows of the file by username, as line number and handicap. Invalid rows are added to `errors`, a file
+    which cannot be read is reported as an error of its first line. """
+    for encoding in ENCODINGS:
+        csv_file.seek(0)
+        text = io.TextIOWrapper(csv_file, encoding=encoding, newline='')
+        file_errors = []
+        try:
+            reader = csv.DictReader(text, delimiter=sniff_delimiter(text))
+            rows = _read_rows(reader, file_errors)
+        except UnicodeDecodeError:
+            continue
+        except csv.Error as error:
+            # the line being read is not counted yet
+            errors.append((reader.line_num + 1, f"Invalid CSV file: {error}"))
+            return {}
+        finally:
+            # the uploaded file is closed by its owner, not by the wrapper
+            text.detach()
+        errors += file_errors
+        return rows
+    errors.append((1, f"Invalid file: not a text file in one of the encodings {', '.join(ENCODINGS)}"))
+    return {}
+
+
+def sniff_delimiter(text: IO[str]) -> str:
+    sample = text.read(SNIFF_SIZE)
+    text.seek(0)
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=DELIMITERS).delimiter
+    except csv.Error:
+        # a single column, or rows of varying lengths: reported row by row
+        return ','
+
+
+def _read_rows(reader: csv.DictReader, errors: list) -> Dict[str, Tuple[int, Decimal]]:
+    missing = REQUIRED_COLUMNS - set(reader.fieldnames or [])
+    if missing:
+        errors.append((1, f"Missing columns: {', '.join(sorted(missing))}"))
+        return {}
+
+    rows = {}
+    for row in reader:
+        line = reader.line_num
+        # e.g. a decimal comma in a file separated by commas: the row is not guessed
+        if None in row:
+            errors.append((line, f"Too many fields: {len(reader.fieldnames) + len(row[None])} instead of "
+                                 f"{len(reader.fieldnames)}"))
+            continue
+        if None in row.values():
+            errors.append((line, "Missing fields"))
+            continue
+        username = (row['username'] or '').strip()
+        if not username:
+            errors.append((line, "Missing username"))
+            continue
+        try:
+            hcp = utils.parse_handicap(row['hcp'])
+        except ValueError as error:
+            errors.append((line, str(error)))
+            continue
+        if username in rows:
+            errors.append((line, f"Duplicate of line {rows[username][0]}: {username}"))
+            continue
+        rows[username] = (line, hcp)
+    return rows
+
+
+def _batches(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def resolve_members(usernames: List[str]) -> Dict[str, int]:
+    """ Primary keys of the profiles by username, without building model instances. """
+    # the lookup is batched like `in_bulk` under the limit of query parameters of the database
+    batch_size = connection.features.max_query_params or len(usernames) or 1
+    profiles = {}
+    for batch in _batches(usernames, batch_size):
+        profiles.update(User.objects.filter(username__in=batch, userprofile__isnull=False)
+                        .values_list('username', 'userprofile__id'))
+    return profiles
+
+
+def import_competitors(tournament: Tournament, csv_file: IO[bytes], dry_run: bool = False) -> ImportReport:
+    errors = []
+    rows = read_rows(csv_file, errors)
+
+    profiles = resolve_members(list(rows))
+    competitors = {profile_id: (pk, hcp) for profile_id, pk, hcp in
+                   Competitor.objects.filter(tournament=tournament).values_list('user_profile_id', 'pk', 'hcp')}
+    free_places = tournament.max_participants - len(competitors)
+
+    to_create = []
+    # primary keys of the competitors by new handicap
+    to_update = defaultdict(list)
+    unchanged = 0
+    for username, (line, hcp) in rows.items():
+        profile_id = profiles.get(username)
+        if profile_id is None:
+            errors.append((line, f"Unknown member: {username}"))
+            continue
+        if profile_id not in competitors:
+            if len(to_create) >= free_places:
+                errors.append((line, f"The tournament is full, {username} is not registered"))
+                continue
+            to_create.append((profile_id, hcp))
+        elif competitors[profile_id][1] != hcp:
+            to_update[hcp].append(competitors[profile_id][0])
+        else:
+            unchanged += 1
+
+    if not dry_run and (to_create or to_update):
+        today = timezone.now().date()
+        with transaction.atomic():
+            Competitor.objects.bulk_create([Competitor(tournament_id=tournament.pk, user_profile_id=profile_id,
+                                                       hcp=hcp, registration_date=today)
+                                            for profile_id, hcp in to_create], batch_size=BATCH_SIZE)
+            # handicaps take few distinct values: one UPDATE per value is far cheaper than a CASE per row
+            for hcp, pks in to_update.items():
+                for batch in _batches(pks, BATCH_SIZE):
+                    Competitor.objects.filter(pk__in=batch).update(hcp=hcp)
+        # no signals are sent by the bulk operations
+        ical.bump_version()
+        registrations.invalidate(profile_id for profile_id, _ in to_create)
+    updated = sum(len(pks) for pks in to_update.values())
+    return ImportReport(len(to_create), updated, unchanged, sorted(errors), dry_run)
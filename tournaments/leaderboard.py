@@ -0,0 +1,168 @@
+"""
+Live leaderboard of a tournament, pushed to the browsers over Server-Sent Events.
+
+All the viewers of a tournament share one `LeaderboardBroadcaster` per process: a single task polls the version of the
+score cards, recomputes the leaderboard when it changed and fans out only the rows whose rank changed to the queue of
+every connected viewer. The number of database queries therefore does not depend on the number of viewers.
+
+The stream needs an ASGI server (e.g. `uvicorn app.asgi:application`): a WSGI server, `runserver` included, would hold
+a worker per viewer and buffer the events until the stream ends. Pages served over WSGI poll the rows with htmx
+every `REFRESH_INTERVAL` seconds instead.
+"""
+import asyncio
+from typing import Dict, List, NamedTuple, Optional, Set
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, Max
+from django.template.loader import render_to_string
+
+from tournaments.models import Score
+
+EVENT_NAME = 'leaderboard'
+POLL_INTERVAL = 2.0
+KEEPALIVE_INTERVAL = 15.0
+# the stream is closed after a while, the browser then reconnects and the stale viewers are cleaned up
+STREAM_MAX_DURATION = 300.0
+QUEUE_SIZE = 16
+# polling of the rows by the pages served without stream
+REFRESH_INTERVAL = 5
+
+
+class LeaderboardRow(NamedTuple):
+    rank: int
+    competitor_id: int
+    name: str
+    holes_played: int
+    gross: int
+    net: int
+    stableford_points: int
+
+
+def can_stream(request) -> bool:
+    """ Whether the request is served by an ASGI server, able to keep the stream of events open. """
+    return isinstance(request, ASGIRequest)
+
+
+def leaderboard_rows(tournament_pk: int) -> List[LeaderboardRow]:
+    """ Ranked rows of the leaderboard, read from the totals stored on the score cards. """
+    scores = (Score.objects
+              .filter(competitor__tournament_id=tournament_pk, holes_played__gt=0)
+              .order_by('-stableford_points', 'net', 'gross', 'competitor_id')
+              .values_list('competitor_id', 'competitor__user_profile__first_name',
+                           'competitor__user_profile__family_name', 'holes_played', 'gross', 'net',
+                           'stableford_points'))
+    return [LeaderboardRow(rank, competitor_id, f'{first_name} {family_name}', *totals)
+            for rank, (competitor_id, first_name, family_name, *totals) in enumerate(scores, start=1)]
+
+
+def scores_version(tournament_pk: int) -> tuple:
+    """ Cheap fingerprint of the score cards of a tournament, changing whenever a card is saved or removed. """
+    version = Score.objects.filter(competitor__tournament_id=tournament_pk).aggregate(
+        updated=Max('updated_date'), total=Count('pk'))
+    return version['updated'], version['total']
+
+
+def empty_row(rank: int) -> LeaderboardRow:
+    return LeaderboardRow(rank, None, '', 0, 0, 0, 0)
+
+
+def rank_deltas(previous: List[LeaderboardRow], current: List[LeaderboardRow]) -> List[LeaderboardRow]:
+    """ Rows of the current leaderboard whose rank is not held by the same result as before. Ranks which are not
+    held anymore are returned as empty rows. """
+    deltas = [row for index, row in enumerate(current) if index >= len(previous) or previous[index] != row]
+    deltas += [empty_row(rank) for rank in range(len(current) + 1, len(previous) + 1)]
+    return deltas
+
+
+def render_rows(rows: List[LeaderboardRow], oob: bool = False) -> str:
+    return render_to_string('tournaments/partials/leaderboard-rows.html', {'rows': rows, 'oob': oob})
+
+
+def format_event(data: str, event: str = EVENT_NAME) -> str:
+    lines = ''.join(f'data: {line}\n' for line in data.splitlines() or [''])
+    return f'event: {event}\n{lines}\n'
+
+
+class LeaderboardBroadcaster:
+    def __init__(self, tournament_pk: int):
+        self.tournament_pk = tournament_pk
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.rows: List[LeaderboardRow] = []
+        self.version: Optional[tuple] = None
+        self.task: Optional[asyncio.Task] = None
+        self.lock = asyncio.Lock()
+
+    async def subscribe(self) -> asyncio.Queue:
+        async with self.lock:
+            if self.task is None or self.task.done():
+                await self.refresh()
+                self.task = asyncio.create_task(self.run())
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+        if not self.subscribers:
+            if self.task is not None:
+                self.task.cancel()
+            # a newer broadcaster of the tournament may have replaced this one meanwhile
+            if _broadcasters.get(self.tournament_pk) is self:
+                del _broadcasters[self.tournament_pk]
+
+    async def refresh(self) -> List[LeaderboardRow]:
+        """ Reload the leaderboard if the scores changed and return the rows whose rank changed. """
+        version = await sync_to_async(scores_version)(self.tournament_pk)
+        if version == self.version:
+            return []
+        rows = await sync_to_async(leaderboard_rows)(self.tournament_pk)
+        deltas = rank_deltas(self.rows, rows)
+        self.rows, self.version = rows, version
+        return deltas
+
+    def publish(self, payload: str):
+        for queue in list(self.subscribers):
+            if queue.full():
+                # the viewer cannot keep up: replace its backlog with the full leaderboard
+                while not queue.empty():
+                    queue.get_nowait()
+                payload_for_queue = render_rows(self.rows, oob=True)
+            else:
+                payload_for_queue = payload
+            queue.put_nowait(payload_for_queue)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(POLL_INTERVAL)
+            deltas = await self.refresh()
+            if deltas:
+                self.publish(render_rows(deltas, oob=True))
+
+
+_broadcasters: Dict[int, LeaderboardBroadcaster] = {}
+
+
+def get_broadcaster(tournament_pk: int) -> LeaderboardBroadcaster:
+    if tournament_pk not in _broadcasters:
+        _broadcasters[tournament_pk] = LeaderboardBroadcaster(tournament_pk)
+    return _broadcasters[tournament_pk]
+
+
+async def stream_leaderboard(tournament_pk: int):
+    """ Server-Sent Events of a viewer: the current leaderboard first, then the rank changes as they happen. """
+    broadcaster = get_broadcaster(tournament_pk)
+    queue = await broadcaster.subscribe()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + STREAM_MAX_DURATION
+    try:
+        yield format_event(render_rows(broadcaster.rows, oob=True))
+        while loop.time() < deadline:
+            try:
+                payload = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            yield format_event(payload)
+    finally:
+        broadcaster.unsubscribe(queue)
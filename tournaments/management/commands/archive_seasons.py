@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from tournaments import archive
+from tournaments.models import SeasonArchive
+
+
+class Command(BaseCommand):
+    help = 'Move the finished seasons out of the live tables into compressed snapshots.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', type=int, default=None,
+                            help='Archive the seasons before this year (default: the current year).')
+        parser.add_argument('--dry-run', action='store_true', help='Only list the seasons to archive.')
+
+    def handle(self, *args, **options):
+        before = options['before'] or timezone.now().year
+        if before > timezone.now().year:
+            raise CommandError('Only finished seasons can be archived.')
+        years = archive.archivable_years(before)
+        already_archived = set(SeasonArchive.objects.filter(year__in=years).values_list('year', flat=True))
+        if already_archived:
+            raise CommandError(f"Seasons already archived: {', '.join(map(str, sorted(already_archived)))}")
+        for year in years:
+            if options['dry_run']:
+                self.stdout.write(f'Season {year} would be archived.')
+                continue
+            season_archive = archive.archive_season(year)
+            self.stdout.write(f'Season {year}: {season_archive.tournament_count} tournaments and '
+                              f'{season_archive.competitor_count} competitors archived '
+                              f'({len(season_archive.data)} bytes).')
+        self.stdout.write(self.style.SUCCESS(f'{len(years)} seasons archived.' if not options['dry_run'] else
+                                             f'{len(years)} seasons to archive.'))
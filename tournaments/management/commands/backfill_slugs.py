@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from tournaments import utils
+from tournaments.models import Tournament
+
+
+class Command(BaseCommand):
+    help = 'Give a slug to the tournaments without one.'
+
+    def handle(self, *args, **options):
+        updated = utils.backfill_slugs(Tournament.objects.select_related('course'))
+        self.stdout.write(self.style.SUCCESS(f'Updated the slug of {updated} tournaments.'))
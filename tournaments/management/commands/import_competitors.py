@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tournaments import imports
+from tournaments.models import Tournament
+
+
+class Command(BaseCommand):
+    help = 'Register members to a tournament and update their handicaps from a CSV file (username, hcp).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tournament', type=int, help='Primary key of the tournament.')
+        parser.add_argument('file', help='CSV file with a "username" and a "hcp" column.')
+        parser.add_argument('--dry-run', action='store_true', help='Only check the file, nothing is saved.')
+
+    def handle(self, *args, **options):
+        try:
+            tournament = Tournament.objects.get(pk=options['tournament'])
+        except Tournament.DoesNotExist:
+            raise CommandError(f"Tournament {options['tournament']} does not exist")
+        with open(options['file'], 'rb') as csv_file:
+            report = imports.import_competitors(tournament, csv_file, dry_run=options['dry_run'])
+        for line, message in report.errors:
+            self.stderr.write(f'line {line}: {message}')
+        prefix = 'Dry run: ' if report.dry_run else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}{report.created} registered, {report.updated} updated, {report.unchanged} unchanged, '
+            f'{len(report.errors)} errors.'))
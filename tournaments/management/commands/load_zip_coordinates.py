@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from tournaments import geo
+
+
+class Command(BaseCommand):
+    help = 'Load the coordinates of the zip codes from a GeoNames postal code file (e.g. DE.txt of ' \
+           'https://download.geonames.org/export/zip/) and locate the golf courses.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Tab separated GeoNames postal code file.')
+
+    def handle(self, *args, **options):
+        with open(options['file'], encoding='utf-8', newline='') as zip_file:
+            loaded = geo.load_zip_coordinates(zip_file)
+        located = geo.geocode_courses()
+        self.stdout.write(self.style.SUCCESS(f'{loaded} zip codes loaded, {located} courses located.'))
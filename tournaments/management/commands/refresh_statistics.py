@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from tournaments import stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the statistics dashboard and store it in the cache.'
+
+    def handle(self, *args, **options):
+        stats.refresh_statistics()
+        self.stdout.write(self.style.SUCCESS('Statistics refreshed.'))
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app import startup
+
+
+class Command(BaseCommand):
+    help = 'Boot a WSGI worker in a new interpreter and report the import-time tree, the app registry ready time ' \
+           'and the latency of the first requests.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='/', help='Path of the requests made after the boot.')
+        parser.add_argument('--host', default='localhost', help='Host header of the requests.')
+        parser.add_argument('--min-ms', type=float, default=5.0,
+                            help='Only show the imports taking at least this long (cumulative).')
+        parser.add_argument('--depth', type=int, default=4, help='Levels of the import-time tree shown.')
+
+    def handle(self, *args, **options):
+        try:
+            profile = startup.profile_startup(options['url'], options['host'])
+        except RuntimeError as error:
+            raise CommandError(error)
+
+        self.stdout.write(f'Boot {profile.boot_seconds * 1000:.1f} ms, imports {profile.import_seconds * 1000:.1f} ms '
+                          f'(including those of the first requests)')
+        self.stdout.write(f'  settings loaded        {profile.settings_seconds * 1000:8.1f} ms')
+        self.stdout.write(f'  app registry ready     {profile.setup_seconds * 1000:8.1f} ms')
+        for app in sorted(profile.apps, key=lambda app: app.models_seconds + app.ready_seconds, reverse=True):
+            self.stdout.write(f'    {app.label:20} models {app.models_seconds * 1000:6.1f} ms, '
+                              f'ready {app.ready_seconds * 1000:6.1f} ms')
+        self.stdout.write(f'  WSGI application       {profile.wsgi_seconds * 1000:8.1f} ms')
+        for number, (status, seconds) in enumerate(profile.requests, start=1):
+            self.stdout.write(f"  request {number} {options['url']:13} {seconds * 1000:8.1f} ms ({status})")
+
+        self.stdout.write(f"\nImports of at least {options['min_ms']:g} ms (cumulative / self):")
+        self.write_tree(profile.imports, options['min_ms'] * 1000, options['depth'])
+
+    def write_tree(self, nodes, min_us, depth, level=0):
+        for node in sorted(nodes, key=lambda node: node.cumulative_us, reverse=True):
+            if node.cumulative_us < min_us:
+                break
+            self.stdout.write(f'{node.cumulative_us / 1000:8.1f} {node.self_us / 1000:6.1f} ms  '
+                              f'{"  " * level}{node.name}')
+            if level + 1 < depth:
+                self.write_tree(node.children, min_us, depth, level + 1)
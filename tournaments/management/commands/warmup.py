@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from app.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = 'Compile the templates and reverse the URLs as done at the boot of a production worker, timing a cold ' \
+           'and a warm run.'
+
+    def handle(self, *args, **options):
+        cold = warm_up()
+        warm = warm_up()
+        self.stdout.write(f'Compiled {cold.templates} templates and reversed {cold.urls} URLs in '
+                          f'{cold.seconds * 1000:.1f} ms (already warm: {warm.seconds * 1000:.1f} ms).')
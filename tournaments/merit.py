@@ -0,0 +1,95 @@
+"""
+Season order of merit, materialised in `SeasonStanding`.
+
+Finalising the results of a tournament stores the order of merit points of its players and updates the standings of
+those players only: their totals are recomputed from their own results (best N of M) and the season is re-ranked
+from the stored totals. The standings pages then read a single pre-ranked table.
+"""
+from typing import Iterable, List
+
+from django.db import transaction
+from django.utils import timezone
+
+from tournaments import scoring
+from tournaments.models import Competitor, Season, SeasonStanding, Tournament, TournamentResult
+
+
+def _positions(results: List[scoring.PlayerResult]) -> List[int]:
+    """ Finishing position of the ranked results, players with the same points and net score share a position. """
+    positions = []
+    for index, result in enumerate(results):
+        previous = results[index - 1] if index else None
+        if previous and (previous.stableford_points, previous.net) == (result.stableford_points, result.net):
+            positions.append(positions[-1])
+        else:
+            positions.append(index + 1)
+    return positions
+
+
+@transaction.atomic
+def finalise_tournament(tournament: Tournament) -> Season:
+    """ Store the order of merit results of the tournament and update the standings of its season. """
+    season, _ = Season.objects.get_or_create(year=tournament.date.year)
+    results = scoring.compute_results(tournament)
+    profiles = dict(Competitor.objects.filter(tournament=tournament).values_list('pk', 'user_profile_id'))
+
+    # finalising again replaces the previous results of the tournament
+    previous_players = set(TournamentResult.objects.filter(tournament=tournament)
+                           .values_list('user_profile_id', flat=True))
+    TournamentResult.objects.filter(tournament=tournament).delete()
+    TournamentResult.objects.bulk_create([
+        TournamentResult(season=season, tournament=tournament, user_profile_id=profiles[result.competitor_id],
+                         position=position, stableford_points=result.stableford_points,
+                         points=season.points_for_position(position))
+        for result, position in zip(results, _positions(results))])
+
+    tournament.results_finalised_date = timezone.now()
+    tournament.save(update_fields=['results_finalised_date'])
+    update_standings(season, previous_players | {profiles[result.competitor_id] for result in results})
+    return season
+
+
+def update_standings(season: Season, profile_ids: Iterable[int]):
+    """ Recompute the totals of the given members in the season, then re-rank the season. """
+    profile_ids = set(profile_ids)
+    points_by_profile = {profile_id: [] for profile_id in profile_ids}
+    results = TournamentResult.objects.filter(season=season, user_profile_id__in=profile_ids)
+    for profile_id, points in results.values_list('user_profile_id', 'points'):
+        points_by_profile[profile_id].append(points)
+
+    standings = []
+    for profile_id, points in points_by_profile.items():
+        counting = sorted(points, reverse=True)[:season.counting_results or None]
+        standings.append(SeasonStanding(season=season, user_profile_id=profile_id, points=sum(counting),
+                                        events_played=len(points), events_counted=len(counting)))
+    SeasonStanding.objects.bulk_create([standing for standing in standings if standing.events_played],
+                                       update_conflicts=True, unique_fields=['season', 'user_profile'],
+                                       update_fields=['points', 'events_played', 'events_counted'])
+    SeasonStanding.objects.filter(season=season, user_profile_id__in=[
+        standing.user_profile_id for standing in standings if not standing.events_played]).delete()
+    rerank(season)
+
+
+def rerank(season: Season):
+    """ Rank the standings of the season by points (equal points share a rank) and write only the changed ranks. """
+    changed = []
+    rank = 0
+    previous_points = None
+    ordered = SeasonStanding.objects.filter(season=season).order_by('-points', '-events_counted', 'pk')
+    for position, (pk, points, current_rank) in enumerate(ordered.values_list('pk', 'points', 'rank'), start=1):
+        if points != previous_points:
+            rank, previous_points = position, points
+        if rank != current_rank:
+            changed.append(SeasonStanding(pk=pk, rank=rank))
+    SeasonStanding.objects.bulk_update(changed, ['rank'], batch_size=500)
+
+
+@transaction.atomic
+def rebuild_season(season: Season):
+    """ Recompute the whole season from the stored positions, e.g. after a change of its points table. """
+    results = list(TournamentResult.objects.filter(season=season).only('pk', 'position', 'user_profile_id'))
+    for result in results:
+        result.points = season.points_for_position(result.position)
+    TournamentResult.objects.bulk_update(results, ['points'], batch_size=500)
+    SeasonStanding.objects.filter(season=season).delete()
+    update_standings(season, {result.user_profile_id for result in results})
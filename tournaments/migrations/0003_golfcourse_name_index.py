@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 10:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0002_rename_competitor_competitor_user_profile'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='golfcourse',
+            name='name',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2 on 2026-10-19 10:47
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0003_golfcourse_name_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Score',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('playing_handicap', models.SmallIntegerField(default=0)),
+                ('holes_played', models.PositiveSmallIntegerField(default=0)),
+                ('gross', models.PositiveSmallIntegerField(default=0)),
+                ('net', models.SmallIntegerField(default=0)),
+                ('stableford_points', models.PositiveSmallIntegerField(default=0)),
+                ('updated_date', models.DateTimeField(auto_now=True)),
+                ('competitor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='score', to='tournaments.competitor')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='HoleScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hole_number', models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(18)])),
+                ('strokes', models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(20)])),
+                ('score', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holes', to='tournaments.score')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CourseHole',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(18)])),
+                ('par', models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(3), django.core.validators.MaxValueValidator(6)])),
+                ('stroke_index', models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(18)])),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holes', to='tournaments.golfcourse')),
+            ],
+            options={
+                'ordering': ['course', 'number'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='holescore',
+            constraint=models.UniqueConstraint(fields=('score', 'hole_number'), name='unique_score_hole_number'),
+        ),
+        migrations.AddConstraint(
+            model_name='coursehole',
+            constraint=models.UniqueConstraint(fields=('course', 'number'), name='unique_course_hole_number'),
+        ),
+        migrations.AddConstraint(
+            model_name='coursehole',
+            constraint=models.UniqueConstraint(fields=('course', 'stroke_index'), name='unique_course_hole_stroke_index'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 4.2 on 2026-10-19 10:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+import tournaments.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_handicaprecord'),
+        ('tournaments', '0004_scoring'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Season',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField(unique=True)),
+                ('name', models.CharField(blank=True, max_length=100)),
+                ('points_table', models.JSONField(default=tournaments.models.default_points_table, help_text='Order of merit points by finishing position (1st, 2nd, ...)')),
+                ('counting_results', models.PositiveSmallIntegerField(blank=True, help_text='Number of best results counting, all if empty', null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='tournament',
+            name='results_finalised_date',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='TournamentResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField()),
+                ('stableford_points', models.PositiveSmallIntegerField()),
+                ('points', models.PositiveSmallIntegerField()),
+                ('season', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='results', to='tournaments.season')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='results', to='tournaments.tournament')),
+                ('user_profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='accounts.userprofile')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SeasonStanding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.PositiveIntegerField(default=0)),
+                ('events_played', models.PositiveSmallIntegerField(default=0)),
+                ('events_counted', models.PositiveSmallIntegerField(default=0)),
+                ('rank', models.PositiveIntegerField(default=0)),
+                ('season', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='tournaments.season')),
+                ('user_profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='accounts.userprofile')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='tournamentresult',
+            index=models.Index(fields=['season', 'user_profile'], name='tournaments_season__cbdc5a_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='tournamentresult',
+            constraint=models.UniqueConstraint(fields=('tournament', 'user_profile'), name='unique_tournament_result'),
+        ),
+        migrations.AddIndex(
+            model_name='seasonstanding',
+            index=models.Index(fields=['season', 'rank'], name='tournaments_season__215cf4_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='seasonstanding',
+            constraint=models.UniqueConstraint(fields=('season', 'user_profile'), name='unique_season_standing'),
+        ),
+    ]
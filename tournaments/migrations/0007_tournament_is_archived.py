@@ -0,0 +1,22 @@
+# Generated by Django 4.2 on 2026-10-19 11:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0006_waitlistentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='is_archived',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='tournament',
+            index=models.Index(condition=models.Q(('is_archived', False)), fields=['date'], name='tournament_active_date_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-19 11:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0007_tournament_is_archived'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeasonArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField(unique=True)),
+                ('name', models.CharField(blank=True, max_length=100)),
+                ('tournament_count', models.PositiveIntegerField(default=0)),
+                ('competitor_count', models.PositiveIntegerField(default=0)),
+                ('data', models.BinaryField()),
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-year'],
+            },
+        ),
+    ]
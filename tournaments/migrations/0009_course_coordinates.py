@@ -0,0 +1,38 @@
+# Generated by Django 4.2 on 2026-10-19 12:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0008_season_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZipCoordinate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('country', models.CharField(max_length=2)),
+                ('zip_code', models.IntegerField()),
+                ('place', models.CharField(blank=True, max_length=100)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='golfcourse',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='golfcourse',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='zipcoordinate',
+            constraint=models.UniqueConstraint(fields=('country', 'zip_code'), name='unique_zip_coordinate'),
+        ),
+    ]
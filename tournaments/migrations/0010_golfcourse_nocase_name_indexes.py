@@ -0,0 +1,27 @@
+# Generated by Django 4.2 on 2026-10-19 13:04
+
+from django.db import migrations, models
+import django.db.models.functions.comparison
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0009_course_coordinates'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='golfcourse',
+            name='name',
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='golfcourse',
+            index=models.Index(django.db.models.functions.comparison.Collate('name', 'nocase'), name='course_name_nocase'),
+        ),
+        migrations.AddIndex(
+            model_name='golfcourse',
+            index=models.Index(django.db.models.functions.comparison.Collate('city', 'nocase'), name='course_city_nocase'),
+        ),
+    ]
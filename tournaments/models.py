@@ -2,6 +2,7 @@ import datetime
 
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
+from django.db.models.functions import Collate
 from django.urls import reverse
 from django.utils import timezone
 from phonenumber_field import modelfields
@@ -29,6 +30,16 @@ class GolfCourse(models.Model):
     country = models.CharField(max_length=2, choices=COUNTRY_CHOICES, default=GERMANY)
     greenfee_external = models.DecimalField(max_digits=4, decimal_places=1, default=0)
     greenfee_member = models.DecimalField(max_digits=4, decimal_places=1, default=0)
+    # centre of the zip code area, filled from `ZipCoordinate` when the course is saved (see `tournaments.geo`)
+    latitude = models.FloatField(null=True, blank=True, editable=False)
+    longitude = models.FloatField(null=True, blank=True, editable=False)
+
+    class Meta:
+        # for the prefix searches of the admin, see `UserProfile.Meta`
+        indexes = [
+            models.Index(Collate('name', 'nocase'), name='course_name_nocase'),
+            models.Index(Collate('city', 'nocase'), name='course_city_nocase'),
+        ]
 
     def __str__(self):
         return self.name
@@ -54,6 +65,14 @@ class Tournament(models.Model):
     comment = models.TextField(blank=True)
     participants = models.ManyToManyField('accounts.UserProfile', blank=True,
                                           related_name='competitors', through='Competitor')
+    results_finalised_date = models.DateTimeField(null=True, blank=True, editable=False)
+    # archived tournaments are kept but hidden from the calendar and the feeds
+    is_archived = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['date'], condition=models.Q(is_archived=False), name='tournament_active_date_idx'),
+        ]
 
     def count_participants(self):
         return self.participants.count()
@@ -82,4 +101,167 @@ class Competitor(models.Model):
                               validators=[MinValueValidator(0.0), MaxValueValidator(54.0)])
 
     def __str__(self):
-        return f"{self.user_profile}({self.hcp}): {self.registration_date}"
\ No newline at end of file
+        return f"{self.user_profile}({self.hcp}): {self.registration_date}"
+
+
+class WaitlistEntry(models.Model):
+    """ Member waiting for a place in a full tournament, places are given in the order of the entries. """
+    tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE, related_name='waitlist')
+    user_profile = models.ForeignKey('accounts.UserProfile', on_delete=models.CASCADE)
+    created_date = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['created_date', 'pk']
+        constraints = [
+            models.UniqueConstraint(fields=['tournament', 'user_profile'], name='unique_waitlist_entry'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_profile} waiting for {self.tournament}"
+
+
+class CourseHole(models.Model):
+    course = models.ForeignKey(GolfCourse, on_delete=models.CASCADE, related_name='holes')
+    number = models.PositiveSmallIntegerField(validators=[MinValueValidator(1), MaxValueValidator(18)])
+    par = models.PositiveSmallIntegerField(validators=[MinValueValidator(3), MaxValueValidator(6)])
+    stroke_index = models.PositiveSmallIntegerField(validators=[MinValueValidator(1), MaxValueValidator(18)])
+
+    class Meta:
+        ordering = ['course', 'number']
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'number'], name='unique_course_hole_number'),
+            models.UniqueConstraint(fields=['course', 'stroke_index'], name='unique_course_hole_stroke_index'),
+        ]
+
+    def __str__(self):
+        return f"{self.course} #{self.number} (par {self.par}, SI {self.stroke_index})"
+
+
+class Score(models.Model):
+    """ Score card of a competitor. The totals are computed for the whole field by `tournaments.scoring`. """
+    competitor = models.OneToOneField(Competitor, on_delete=models.CASCADE, related_name='score')
+    # derived from the handicap of the competitor each time the results are computed
+    playing_handicap = models.SmallIntegerField(default=0)
+    holes_played = models.PositiveSmallIntegerField(default=0)
+    gross = models.PositiveSmallIntegerField(default=0)
+    net = models.SmallIntegerField(default=0)
+    stableford_points = models.PositiveSmallIntegerField(default=0)
+    updated_date = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.competitor.user_profile}: {self.gross} gross / {self.stableford_points} pts"
+
+
+class HoleScore(models.Model):
+    score = models.ForeignKey(Score, on_delete=models.CASCADE, related_name='holes')
+    hole_number = models.PositiveSmallIntegerField(validators=[MinValueValidator(1), MaxValueValidator(18)])
+    strokes = models.PositiveSmallIntegerField(validators=[MinValueValidator(1), MaxValueValidator(20)])
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['score', 'hole_number'], name='unique_score_hole_number'),
+        ]
+
+    def __str__(self):
+        return f"#{self.hole_number}: {self.strokes}"
+
+
+def default_points_table():
+    return [25, 20, 16, 13, 11, 10, 9, 8, 7, 6, 5, 4, 3, 2, 1]
+
+
+class Season(models.Model):
+    year = models.PositiveSmallIntegerField(unique=True)
+    name = models.CharField(max_length=100, blank=True)
+    points_table = models.JSONField(default=default_points_table,
+                                    help_text='Order of merit points by finishing position (1st, 2nd, ...)')
+    counting_results = models.PositiveSmallIntegerField(null=True, blank=True,
+                                                        help_text='Number of best results counting, all if empty')
+
+    def __str__(self):
+        return self.name or f"Season {self.year}"
+
+    def get_absolute_url(self):
+        return reverse("tournaments:standings", kwargs={"year": self.year})
+
+    def points_for_position(self, position: int) -> int:
+        return self.points_table[position - 1] if position <= len(self.points_table) else 0
+
+
+class TournamentResult(models.Model):
+    """ Finalised result of a member in a tournament, as counted for the order of merit. """
+    season = models.ForeignKey(Season, on_delete=models.CASCADE, related_name='results')
+    tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE, related_name='results')
+    user_profile = models.ForeignKey('accounts.UserProfile', on_delete=models.CASCADE)
+    position = models.PositiveSmallIntegerField()
+    stableford_points = models.PositiveSmallIntegerField()
+    points = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tournament', 'user_profile'], name='unique_tournament_result'),
+        ]
+        indexes = [
+            models.Index(fields=['season', 'user_profile']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_profile} #{self.position} ({self.points} pts): {self.tournament}"
+
+
+class SeasonStanding(models.Model):
+    """ Materialised order of merit: one pre-ranked row per member and season. """
+    season = models.ForeignKey(Season, on_delete=models.CASCADE, related_name='standings')
+    user_profile = models.ForeignKey('accounts.UserProfile', on_delete=models.CASCADE)
+    points = models.PositiveIntegerField(default=0)
+    events_played = models.PositiveSmallIntegerField(default=0)
+    events_counted = models.PositiveSmallIntegerField(default=0)
+    rank = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['season', 'user_profile'], name='unique_season_standing'),
+        ]
+        indexes = [
+            models.Index(fields=['season', 'rank']),
+        ]
+
+    def __str__(self):
+        return f"{self.season}: #{self.rank} {self.user_profile} ({self.points} pts)"
+
+
+class SeasonArchive(models.Model):
+    """ Compressed snapshot of a finished season, moved out of the live tables by `manage.py archive_seasons`. """
+    year = models.PositiveSmallIntegerField(unique=True)
+    name = models.CharField(max_length=100, blank=True)
+    tournament_count = models.PositiveIntegerField(default=0)
+    competitor_count = models.PositiveIntegerField(default=0)
+    # zlib-compressed JSON, see `tournaments.archive`
+    data = models.BinaryField()
+    created_date = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-year']
+
+    def __str__(self):
+        return self.name or f"Season {self.year} (archive)"
+
+    def get_absolute_url(self):
+        return reverse("tournaments:history", kwargs={"year": self.year})
+
+
+class ZipCoordinate(models.Model):
+    """ Centre of a zip code area, from the offline geocoding table loaded by `manage.py load_zip_coordinates`. """
+    country = models.CharField(max_length=2)
+    zip_code = models.IntegerField()
+    place = models.CharField(max_length=100, blank=True)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['country', 'zip_code'], name='unique_zip_coordinate'),
+        ]
+
+    def __str__(self):
+        return f"{self.country}-{self.zip_code:05d} {self.place}"
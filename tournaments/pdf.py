@@ -0,0 +1,140 @@
+"""
+Rendering of the printable documents of a tournament: the start sheet and a scorecard per flight, with fpdf2.
+
+The module works on plain data and imports nothing from Django, so that its functions run in the worker processes
+of `tournaments.printing` (started by fork or spawn) and return the documents as bytes.
+"""
+import io
+from typing import List, NamedTuple, Sequence
+
+from fpdf import FPDF
+from pypdf import PdfReader, PdfWriter
+
+FONT = 'Helvetica'
+MARGIN = 12
+ROW_HEIGHT = 7
+# columns of the hole number, par and stroke index
+HOLE_COLUMN_WIDTH = 14
+
+
+class Player(NamedTuple):
+    name: str
+    hcp: str
+    playing_handicap: int
+    # handicap strokes received on each hole, empty if the stroke indexes of the course are unknown
+    strokes: List[int]
+
+
+class Flight(NamedTuple):
+    number: int
+    tee_time: str
+    players: List[Player]
+
+
+class CourseCard(NamedTuple):
+    name: str
+    # empty if the holes of the course are not defined
+    pars: List[int]
+    stroke_indexes: List[int]
+
+
+def _text(value) -> str:
+    """ The core fonts only have the latin-1 characters. """
+    return str(value).encode('latin-1', 'replace').decode('latin-1')
+
+
+def _document() -> FPDF:
+    document = FPDF(orientation='portrait', unit='mm', format='A4')
+    document.set_margins(MARGIN, MARGIN)
+    document.set_auto_page_break(True, margin=MARGIN)
+    return document
+
+
+def _output(document: FPDF) -> bytes:
+    return bytes(document.output())
+
+
+def render_start_sheet(title: str, flights: Sequence[Flight]) -> bytes:
+    document = _document()
+    document.add_page()
+    document.set_font(FONT, 'B', 16)
+    document.cell(0, 10, _text(f'{title} - Start sheet'), new_x='LMARGIN', new_y='NEXT')
+    document.ln(2)
+    widths = (20, 25, 96, 20, 25)
+    header = ('Flight', 'Tee time', 'Player', 'HCP', 'Playing HCP')
+    document.set_font(FONT, 'B', 10)
+    for width, label in zip(widths, header):
+        document.cell(width, ROW_HEIGHT, label, border=1)
+    document.ln()
+    document.set_font(FONT, '', 10)
+    for flight in flights:
+        for position, player in enumerate(flight.players):
+            first = position == 0
+            values = (flight.number if first else '', flight.tee_time if first else '', player.name, player.hcp,
+                      player.playing_handicap)
+            for width, value in zip(widths, values):
+                document.cell(width, ROW_HEIGHT, _text(value), border=1)
+            document.ln()
+    return _output(document)
+
+
+def render_scorecards(title: str, course: CourseCard, flights: Sequence[Flight]) -> bytes:
+    """ A page per flight: the holes with their par and stroke index, and per player the strokes received and an
+    empty box for the score. """
+    document = _document()
+    holes = len(course.pars) or 18
+    for flight in flights:
+        document.add_page()
+        document.set_font(FONT, 'B', 14)
+        document.cell(0, 8, _text(title), new_x='LMARGIN', new_y='NEXT')
+        document.set_font(FONT, '', 11)
+        document.cell(0, 7, _text(f'{course.name} - Flight {flight.number} - Tee time {flight.tee_time}'),
+                      new_x='LMARGIN', new_y='NEXT')
+        document.ln(2)
+
+        player_width = (document.epw - 3 * HOLE_COLUMN_WIDTH) / max(len(flight.players), 1)
+        document.set_font(FONT, 'B', 9)
+        document.cell(3 * HOLE_COLUMN_WIDTH, ROW_HEIGHT, '', border=1)
+        for player in flight.players:
+            document.cell(player_width, ROW_HEIGHT, _text(f'{player.name} ({player.playing_handicap})'), border=1,
+                          align='C')
+        document.ln()
+        for label in ('Hole', 'Par', 'SI'):
+            document.cell(HOLE_COLUMN_WIDTH, ROW_HEIGHT, label, border=1, align='C')
+        for _ in flight.players:
+            document.cell(player_width / 2, ROW_HEIGHT, 'Strokes', border=1, align='C')
+            document.cell(player_width / 2, ROW_HEIGHT, 'Score', border=1, align='C')
+        document.ln()
+
+        document.set_font(FONT, '', 10)
+        for hole in range(holes):
+            par = course.pars[hole] if course.pars else ''
+            stroke_index = course.stroke_indexes[hole] if course.stroke_indexes else ''
+            for value in (hole + 1, par, stroke_index):
+                document.cell(HOLE_COLUMN_WIDTH, ROW_HEIGHT, str(value), border=1, align='C')
+            for player in flight.players:
+                received = player.strokes[hole] if player.strokes else ''
+                document.cell(player_width / 2, ROW_HEIGHT, str(received or ''), border=1, align='C')
+                document.cell(player_width / 2, ROW_HEIGHT, '', border=1)
+            document.ln()
+        document.set_font(FONT, 'B', 10)
+        document.cell(HOLE_COLUMN_WIDTH, ROW_HEIGHT, 'Total', border=1, align='C')
+        document.cell(HOLE_COLUMN_WIDTH, ROW_HEIGHT, str(sum(course.pars) or ''), border=1, align='C')
+        document.cell(HOLE_COLUMN_WIDTH, ROW_HEIGHT, '', border=1)
+        for player in flight.players:
+            document.cell(player_width / 2, ROW_HEIGHT, str(player.playing_handicap), border=1, align='C')
+            document.cell(player_width / 2, ROW_HEIGHT, '', border=1)
+        document.ln(ROW_HEIGHT * 3)
+        document.set_font(FONT, '', 10)
+        document.cell(document.epw / 2, ROW_HEIGHT, 'Marker: ______________________')
+        document.cell(document.epw / 2, ROW_HEIGHT, 'Player: ______________________')
+    return _output(document)
+
+
+def merge(documents: Sequence[bytes]) -> bytes:
+    writer = PdfWriter()
+    for document in documents:
+        writer.append(PdfReader(io.BytesIO(document)))
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
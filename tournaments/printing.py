@@ -0,0 +1,86 @@
+"""
+Printable scorecards and start sheet of a tournament, generated from its flight plan as one PDF document.
+
+The flights of large events are rendered in parallel by a process pool, a chunk of flights per process, and the
+parts are merged into one document. The document is cached under a digest of the flight plan and of the course, so
+it is generated again only when they change (a new competitor, a changed handicap or tee time, another strategy).
+"""
+import datetime
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import List, NamedTuple
+
+from django.core.cache import cache
+
+from tournaments import pdf, scoring, utils
+from tournaments.models import Competitor, Tournament
+
+CACHE_KEY = 'printing:{tournament_pk}:{digest}'
+CACHE_TIMEOUT = 24 * 3600
+TEE_INTERVAL = datetime.timedelta(minutes=10)
+# flights rendered by one worker process; the plans of a single chunk are rendered in the request process
+FLIGHTS_PER_PROCESS = 12
+
+
+class Document(NamedTuple):
+    content: bytes
+    etag: str
+
+
+def course_card(tournament: Tournament) -> pdf.CourseCard:
+    if tournament.course is None:
+        return pdf.CourseCard('', [], [])
+    try:
+        pars, stroke_indexes = scoring.course_layout(tournament.course_id)
+    except ValueError:
+        # holes not defined: the par, stroke index and strokes received are left blank
+        pars, stroke_indexes = [], []
+    return pdf.CourseCard(tournament.course.name, pars, stroke_indexes)
+
+
+def flight_plan(tournament: Tournament, strategy: str, course: pdf.CourseCard) -> List[pdf.Flight]:
+    """ :raise IndexError: if the strategy cannot form the flights of this number of competitors """
+    competitors = list(Competitor.objects.filter(tournament=tournament).select_related('user_profile'))
+    flights = []
+    for number, competitors_of_flight in enumerate(utils.FLIGHT_STRATEGIES[strategy](competitors), start=1):
+        tee_time = ''
+        if tournament.tee_time:
+            start = datetime.datetime.combine(tournament.date, tournament.tee_time)
+            tee_time = (start + (number - 1) * TEE_INTERVAL).strftime('%H:%M')
+        players = []
+        for competitor in competitors_of_flight:
+            handicap = scoring.playing_handicap(competitor.hcp)
+            strokes = scoring.strokes_received(handicap, course.stroke_indexes) if course.stroke_indexes else []
+            players.append(pdf.Player(str(competitor.user_profile), str(competitor.hcp), handicap, strokes))
+        flights.append(pdf.Flight(number, tee_time, players))
+    return flights
+
+
+def render(title: str, course: pdf.CourseCard, flights: List[pdf.Flight]) -> bytes:
+    chunks = [flights[start:start + FLIGHTS_PER_PROCESS] for start in range(0, len(flights), FLIGHTS_PER_PROCESS)]
+    if len(chunks) <= 1:
+        parts = [pdf.render_start_sheet(title, flights)]
+        parts += [pdf.render_scorecards(title, course, chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(len(chunks) + 1, os.cpu_count() or 1)) as pool:
+            start_sheet = pool.submit(pdf.render_start_sheet, title, flights)
+            scorecards = pool.map(pdf.render_scorecards, repeat(title), repeat(course), chunks)
+            parts = [start_sheet.result(), *scorecards]
+    return pdf.merge(parts)
+
+
+def get_document(tournament: Tournament, strategy: str) -> Document:
+    """ The scorecards and start sheet of the tournament, from the cache unless the flight plan changed. """
+    title = str(tournament)
+    course = course_card(tournament)
+    flights = flight_plan(tournament, strategy, course)
+    digest = hashlib.sha1(json.dumps([title, course, flights]).encode()).hexdigest()
+    key = CACHE_KEY.format(tournament_pk=tournament.pk, digest=digest)
+    content = cache.get(key)
+    if content is None:
+        content = render(title, course, flights)
+        cache.set(key, content, CACHE_TIMEOUT)
+    return Document(content, f'"{digest}"')
@@ -0,0 +1,67 @@
+"""
+Season builder: a series of recurring tournaments generated from a template, e.g. every second Wednesday with the
+courses in rotation.
+
+The series is planned (and previewed) first, then created at once: the slugs are allocated with one query and the
+tournaments inserted with a single `bulk_create` in one transaction.
+"""
+import datetime
+from typing import List, NamedTuple
+
+from django.db import transaction
+from django.utils.text import slugify
+
+from search import index
+from tournaments import ical, utils
+from tournaments.models import Tournament
+
+MAX_EVENTS = 60
+# fields of the template copied to each tournament
+TEMPLATE_FIELDS = ['tee_time', 'hcp_limit', 'hcp_relevant', 'max_participants', 'supervisor', 'comment']
+
+
+class PlannedTournament(NamedTuple):
+    tournament: Tournament
+    # a tournament already takes place on the course that day, it is not created again
+    conflict: bool
+
+
+def season_dates(start: datetime.date, end: datetime.date, interval_weeks: int) -> List[datetime.date]:
+    """ Dates from `start` to `end` (included) every `interval_weeks` weeks, on the weekday of `start`. """
+    step = datetime.timedelta(weeks=interval_weeks)
+    dates = []
+    date = start
+    while date <= end:
+        dates.append(date)
+        date += step
+    return dates
+
+
+def plan_season(template: dict) -> List[PlannedTournament]:
+    """ Unsaved tournaments of the series described by the cleaned data of a `SeasonBuilderForm`. """
+    dates = season_dates(template['start_date'], template['end_date'], template['interval_weeks'])
+    courses = list(template['courses'])
+    tournaments = [Tournament(date=date, course=courses[number % len(courses)],
+                              **{field: template[field] for field in TEMPLATE_FIELDS})
+                   for number, date in enumerate(dates)]
+
+    scheduled = set(Tournament.objects
+                    .filter(date__range=(dates[0], dates[-1]), course__in=courses)
+                    .values_list('date', 'course_id')) if dates else set()
+    planned = [PlannedTournament(tournament, (tournament.date, tournament.course_id) in scheduled)
+               for tournament in tournaments]
+    new_tournaments = [tournament for tournament, conflict in planned if not conflict]
+    slugs = utils.unique_slugs(Tournament.objects.all(), [slugify(str(tournament)) for tournament in new_tournaments])
+    for tournament, slug in zip(new_tournaments, slugs):
+        tournament.slug = slug
+    return planned
+
+
+def create_season(planned: List[PlannedTournament]) -> List[Tournament]:
+    tournaments = [tournament for tournament, conflict in planned if not conflict]
+    with transaction.atomic():
+        tournaments = Tournament.objects.bulk_create(tournaments)
+    # `bulk_create` sends no signals: index the tournaments and refresh the calendar feeds here
+    index.index_entries([index.tournament_entry(tournament) for tournament in tournaments])
+    ical.bump_version()
+    return tournaments
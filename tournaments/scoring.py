@@ -0,0 +1,140 @@
+"""
+Scoring engine computing gross, net and Stableford results for a whole field at once.
+
+The hole scores of a tournament are loaded with a single query into a players x holes matrix, the results of every
+player are then computed row by row from the course layout (par and stroke index per hole). Score cards are saved
+with bulk inserts/upserts so that entering the cards of a full field costs a handful of queries.
+"""
+import operator
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+from functools import reduce
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from tournaments.models import CourseHole, HoleScore, Score
+
+HOLES = 18
+
+
+class PlayerResult(NamedTuple):
+    competitor_id: int
+    playing_handicap: int
+    holes_played: int
+    gross: int
+    net: int
+    stableford_points: int
+
+
+def playing_handicap(hcp: Decimal) -> int:
+    """ Number of handicap strokes of a competitor, i.e. the handicap rounded to the nearest stroke. """
+    return int(Decimal(hcp).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def strokes_received(handicap: int, stroke_indexes: Sequence[int]) -> List[int]:
+    """ Handicap strokes received on each hole. Plus handicaps give strokes back from the easiest holes first. """
+    base, extra = divmod(handicap, HOLES)
+    return [base + 1 if stroke_index <= extra else base for stroke_index in stroke_indexes]
+
+
+def course_layout(course_id: int) -> Tuple[List[int], List[int]]:
+    """ Par and stroke index of each hole of the course, in hole order. """
+    holes = list(CourseHole.objects.filter(course_id=course_id).order_by('number').values_list('par', 'stroke_index'))
+    if len(holes) != HOLES:
+        raise ValueError(f"The par and stroke index of the {HOLES} holes of the course are not defined.")
+    pars, stroke_indexes = zip(*holes)
+    return list(pars), list(stroke_indexes)
+
+
+def compute_field(cards: Sequence[Sequence[Optional[int]]], handicaps: Sequence[int], pars: Sequence[int],
+                  stroke_indexes: Sequence[int]) -> List[Tuple[int, int, int, int]]:
+    """ Compute the results of a field from the players x holes matrix of strokes (None for holes not played).
+    :return: (holes played, gross, net, stableford points) per player, in the order of the cards.
+    """
+    received_by_handicap = {}
+    results = []
+    for card, handicap in zip(cards, handicaps):
+        received = received_by_handicap.get(handicap)
+        if received is None:
+            received = received_by_handicap[handicap] = strokes_received(handicap, stroke_indexes)
+        played = [(strokes, par, given) for strokes, par, given in zip(card, pars, received) if strokes]
+        gross = sum(strokes for strokes, _, _ in played)
+        net = gross - sum(given for _, _, given in played)
+        points = sum(max(0, par + given - strokes + 2) for strokes, par, given in played)
+        results.append((len(played), gross, net, points))
+    return results
+
+
+def rank_results(results: List[PlayerResult]) -> List[PlayerResult]:
+    """ Order the results of the players who started (as the leaderboard) by Stableford points, then by net and gross
+    score. Blank score cards get no position. """
+    return sorted((result for result in results if result.holes_played),
+                  key=lambda result: (-result.stableford_points, result.net, result.gross))
+
+
+def _field_results(tournament) -> List[Tuple[int, PlayerResult]]:
+    pars, stroke_indexes = course_layout(tournament.course_id)
+    # the playing handicap follows the handicap of the competitor, which can change after the card was created
+    scores = [(score_id, competitor_id, playing_handicap(hcp)) for score_id, competitor_id, hcp in
+              Score.objects.filter(competitor__tournament=tournament).values_list('pk', 'competitor_id',
+                                                                                  'competitor__hcp')]
+
+    matrix = {score_id: [None] * HOLES for score_id, _, _ in scores}
+    hole_scores = HoleScore.objects.filter(score__competitor__tournament=tournament)
+    for score_id, hole_number, strokes in hole_scores.values_list('score_id', 'hole_number', 'strokes'):
+        matrix[score_id][hole_number - 1] = strokes
+
+    field = compute_field([matrix[score_id] for score_id, _, _ in scores],
+                          [handicap for _, _, handicap in scores], pars, stroke_indexes)
+    return [(score_id, PlayerResult(competitor_id, handicap, *result))
+            for (score_id, competitor_id, handicap), result in zip(scores, field)]
+
+
+def compute_results(tournament) -> List[PlayerResult]:
+    """ Ranked results of the competitors of the tournament having played at least a hole. """
+    return rank_results([result for _, result in _field_results(tournament)])
+
+
+@transaction.atomic
+def save_hole_scores(tournament, cards: Dict[int, Sequence[Optional[int]]]) -> List[PlayerResult]:
+    """ Save the score cards of several competitors of the tournament and update the results of the field.
+    :param cards: strokes of the 18 holes (None or 0 for a hole not played) by competitor id.
+    :return: the ranked results of the field.
+    """
+    competitors = dict(tournament.competitor_set.filter(pk__in=cards).values_list('pk', 'hcp'))
+    Score.objects.bulk_create([Score(competitor_id=pk, playing_handicap=playing_handicap(hcp))
+                               for pk, hcp in competitors.items()], ignore_conflicts=True)
+    score_ids = dict(Score.objects.filter(competitor_id__in=competitors).values_list('competitor_id', 'pk'))
+
+    entered, cleared = [], defaultdict(list)
+    for competitor_id, card in cards.items():
+        if competitor_id not in score_ids:
+            continue
+        for hole_number, strokes in enumerate(card[:HOLES], start=1):
+            if strokes:
+                entered.append(HoleScore(score_id=score_ids[competitor_id], hole_number=hole_number,
+                                         strokes=strokes))
+            else:
+                cleared[hole_number].append(score_ids[competitor_id])
+    HoleScore.objects.bulk_create(entered, batch_size=500, update_conflicts=True,
+                                  unique_fields=['score', 'hole_number'], update_fields=['strokes'])
+    if cleared:
+        # one condition per hole keeps the statement small whatever the size of the field
+        HoleScore.objects.filter(reduce(operator.or_, (Q(hole_number=hole_number, score_id__in=ids)
+                                                       for hole_number, ids in cleared.items()))).delete()
+    return update_results(tournament)
+
+
+def update_results(tournament) -> List[PlayerResult]:
+    """ Recompute the results of the field and store the totals on the score cards. """
+    field = _field_results(tournament)
+    now = timezone.now()
+    Score.objects.bulk_update(
+        [Score(pk=score_id, playing_handicap=result.playing_handicap, holes_played=result.holes_played,
+               gross=result.gross, net=result.net, stableford_points=result.stableford_points, updated_date=now)
+         for score_id, result in field],
+        ['playing_handicap', 'holes_played', 'gross', 'net', 'stableford_points', 'updated_date'], batch_size=500)
+    return rank_results([result for _, result in field])
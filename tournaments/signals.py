@@ -0,0 +1,26 @@
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from tournaments import geo, ical
+from tournaments.models import Competitor, GolfCourse, Tournament
+
+
+@receiver(post_save, sender=Tournament)
+@receiver(post_delete, sender=Tournament)
+@receiver(post_save, sender=GolfCourse)
+@receiver(post_delete, sender=GolfCourse)
+@receiver(post_save, sender=Competitor)
+@receiver(post_delete, sender=Competitor)
+def invalidate_calendar_feeds(sender, **kwargs):
+    ical.bump_version()
+
+
+@receiver(pre_save, sender=GolfCourse)
+def geocode_course(sender, instance, **kwargs):
+    instance.latitude, instance.longitude = geo.geocode(instance.country, instance.zip_code) or (None, None)
+
+
+@receiver(post_save, sender=GolfCourse)
+@receiver(post_delete, sender=GolfCourse)
+def invalidate_course_index(sender, **kwargs):
+    geo.bump_version()
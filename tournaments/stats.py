@@ -0,0 +1,92 @@
+"""
+Statistics dashboard of the tournaments: participation per course, department and month, and handicaps.
+
+Each widget is a single aggregated query. The dashboard is served from the cache and refreshed by a job of the
+worker (`tournaments.tasks.refresh_statistics`) once it is older than `REFRESH_INTERVAL`, so that page loads do not
+depend on the size of the history.
+"""
+import datetime
+
+from django.core.cache import cache
+from django.db.models import Avg, Case, CharField, Count, Max, Min, Value, When
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from jobs import queue
+from tournaments.models import Competitor
+
+CACHE_KEY = 'tournament-statistics'
+# set while a refresh is queued, the page loads meanwhile do not queue another one
+PENDING_KEY = 'tournament-statistics-pending'
+REFRESH_INTERVAL = datetime.timedelta(minutes=15)
+REFRESH_TASK = 'tournaments.tasks.refresh_statistics'
+
+# upper limit (excluded) and label of the handicap bands
+HANDICAP_BANDS = [(10, '0 - 9.9'), (20, '10 - 19.9'), (30, '20 - 29.9'), (37, '30 - 36.9')]
+HIGHEST_HANDICAP_BAND = '37 - 54'
+
+
+def participation_per_course():
+    return list(Competitor.objects
+                .values('tournament__course__name')
+                .annotate(players=Count('pk'), tournaments=Count('tournament', distinct=True))
+                .order_by('-players', 'tournament__course__name'))
+
+
+def participation_per_department():
+    return list(Competitor.objects
+                .values('user_profile__department')
+                .annotate(players=Count('pk'), members=Count('user_profile', distinct=True))
+                .order_by('-players', 'user_profile__department'))
+
+
+def participation_per_month():
+    return list(Competitor.objects
+                .annotate(month=TruncMonth('tournament__date'))
+                .values('month')
+                .annotate(players=Count('pk'), tournaments=Count('tournament', distinct=True))
+                .order_by('month'))
+
+
+def handicap_distribution():
+    band = Case(*[When(hcp__lt=limit, then=Value(label)) for limit, label in HANDICAP_BANDS],
+                default=Value(HIGHEST_HANDICAP_BAND), output_field=CharField())
+    return list(Competitor.objects
+                .annotate(band=band)
+                .values('band')
+                .annotate(players=Count('pk'))
+                .order_by('band'))
+
+
+def handicap_summary():
+    return Competitor.objects.aggregate(average=Avg('hcp'), lowest=Min('hcp'), highest=Max('hcp'),
+                                        players=Count('pk'))
+
+
+WIDGETS = {
+    'per_course': participation_per_course,
+    'per_department': participation_per_department,
+    'per_month': participation_per_month,
+    'handicap_bands': handicap_distribution,
+    'handicaps': handicap_summary,
+}
+
+
+def refresh_statistics() -> dict:
+    """ Compute all the widgets and store them in the cache. """
+    statistics = {name: widget() for name, widget in WIDGETS.items()}
+    statistics['computed_at'] = timezone.now()
+    cache.set(CACHE_KEY, statistics, timeout=None)
+    cache.delete(PENDING_KEY)
+    return statistics
+
+
+def get_statistics() -> dict:
+    """ Statistics from the cache, refreshed by the worker when outdated (computed inline only the first time). """
+    statistics = cache.get(CACHE_KEY)
+    if statistics is None:
+        return refresh_statistics()
+    if (timezone.now() - statistics['computed_at'] > REFRESH_INTERVAL
+            and cache.add(PENDING_KEY, True, timeout=REFRESH_INTERVAL.total_seconds())):
+        queue.enqueue(REFRESH_TASK, dedup_key=REFRESH_TASK)
+    return statistics
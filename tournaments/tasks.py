@@ -0,0 +1,16 @@
+"""
+Background tasks of the tournaments, executed by `manage.py runworker` (see `jobs.queue`).
+"""
+from jobs.queue import task
+from tournaments import merit, stats
+from tournaments.models import Season
+
+
+@task()
+def rebuild_season(season_id: int):
+    merit.rebuild_season(Season.objects.get(pk=season_id))
+
+
+@task()
+def refresh_statistics():
+    stats.refresh_statistics()
@@ -1,17 +1,46 @@
+import asyncio
+import gzip
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
 from decimal import Decimal
+from io import StringIO
 from http import HTTPStatus
-from random import uniform, choice, sample
+from random import Random, uniform, choice, sample
+from unittest import mock
 
 import pytest
 from django.contrib.auth import get_user
-from django.test import RequestFactory, TestCase, Client
-from django.contrib.auth.models import User
-from django.urls import reverse
+from asgiref.sync import sync_to_async
+from django.test import AsyncClient, RequestFactory, TestCase, Client, override_settings
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command, CommandError
+from django.db import connection
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
+from django.templatetags.static import static
+from django.test.utils import CaptureQueriesContext
+from django.conf import settings
+from django.template import Template, engines
+from django.urls import get_resolver, reverse
 from django.utils import timezone
 from faker import Faker
+from pypdf import PdfReader
 
+import brotli
 from accounts.models import UserProfile
-from tournaments.models import Tournament, GolfCourse, Competitor
+from app import startup, warmup
+from app.middleware import CompressionMiddleware, accepted_encoding, minify_html
+from jobs.models import Job
+from search.models import SearchEntry
+from tournaments import scoring, leaderboard, merit, stats, ical, imports, utils, deletion, archive, printing, geo
+from tournaments.models import Tournament, GolfCourse, Competitor, CourseHole, Score, HoleScore, Season, \
+    SeasonStanding, TournamentResult, WaitlistEntry, SeasonArchive
 import datetime
 
 from tournaments.utils import slugify_instance_str
@@ -106,6 +135,39 @@ class TestListTournament(ViewsTestCase):
         assert 'object_list' in response.context
         assert len(response.context['object_list']) == 2  # only the tournament of the current year
 
+    @pytest.mark.django_db
+    def test_list_tournament_registration_badges(self):
+        cache.clear()
+        today = timezone.now().date()
+        registered, full, open_ = [Tournament.objects.create(date=today + datetime.timedelta(days=days),
+                                                             course=self.golf_course, hcp_limit=34.0,
+                                                             max_participants=1)
+                                   for days in (10, 20, 30)]
+        member = User.objects.create_user(username='member', password='test')
+        member_profile = UserProfile.objects.create(user=member, first_name='Mem', family_name='Ber')
+        Competitor.objects.create(tournament=registered, user_profile=self.superuser_profile, hcp=12.0)
+        Competitor.objects.create(tournament=full, user_profile=member_profile, hcp=12.0)
+        client = Client()
+        client.force_login(self.superuser)
+        url = reverse('tournaments:list') + '?type=upcoming'
+        client.get(url)
+
+        # the tournaments with their participants count, the registrations come from the cache
+        with self.assertNumQueries(1):
+            response = client.get(url)
+        content = response.content.decode()
+        rows = {tournament.pk: content.split(f'tournament-{tournament.pk}"')[1].split('</tr>')[0]
+                for tournament in (registered, full, open_)}
+        assert 'Registered' in rows[registered.pk]
+        assert 'Full' in rows[full.pk]
+        assert 'Open' in rows[open_.pk]
+
+        # the registration invalidates the cached set
+        client.post(reverse('accounts:participate', args=[open_.pk]))
+        response = client.get(url)
+        assert response.context['registered_ids'] == {registered.pk, open_.pk}
+        cache.clear()
+
 
 class TestCreateTournament(ViewsTestCase):
     def setUp(self):
@@ -689,6 +751,22 @@ class TestTournamentSetup(TestCase):
 
 class TestTournamentPreparation(TestTournamentSetup):
 
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_user(username='staff-usr', password='test-staff', is_staff=True))
+
+    @pytest.mark.django_db
+    def test_participants_refresh_is_staff_only(self):
+        parameters = {'tpk': self.tournament.pk, 'FlightStrat': 'SortByHcp'}
+        member = User.objects.create_user(username='member-usr', password='test-member')
+        for url in (reverse('tournaments:fetch_flights'), reverse('tournaments:fetch_competitors')):
+            assert self.client.get(url, parameters).status_code == HTTPStatus.OK
+            self.client.logout()
+            assert self.client.get(url, parameters).status_code == HTTPStatus.FOUND
+            self.client.force_login(member)
+            assert self.client.get(url, parameters).status_code == HTTPStatus.FOUND
+            self.client.force_login(User.objects.get(username='staff-usr'))
+
     @pytest.mark.django_db
     def test_generate_flight_by_handicap(self):
         response = self.client.get(reverse('tournaments:fetch_flights'),
@@ -719,3 +797,1168 @@ class TestTournamentPreparation(TestTournamentSetup):
             # Check if competitors are correctly placed as Low-Medium-High
             assert hcp_values[0] <= hcp_values[1] <= hcp_values[2], \
                 "Competitors in a flight are not ordered as Low-Medium-High"
+
+    @pytest.mark.django_db
+    def test_participants_tab_swapped_with_flights(self):
+        staff = User.objects.create_superuser(username='super-usr', password='test-staff')
+        self.client.force_login(staff)
+        url = reverse('tournaments:detail', args=[self.tournament.pk, 'participants'])
+        page = self.client.get(url)
+        assert b'<html' in page.content
+        # the flights are rendered with the page, no request on load
+        assert page.context['flights'] == utils.order_flights_by_handicap(self.tournament.competitor_set.all())
+
+        with CaptureQueriesContext(connection) as queries:
+            tab = self.client.get(url, HTTP_HX_REQUEST='true')
+        assert b'<html' not in tab.content
+        assert 'HX-Request' in tab['Vary']
+        assert len(tab.content) < len(page.content)
+        assert len([query for query in queries if 'tournaments_competitor' in query['sql']]) == 1
+
+        refresh_url = reverse('tournaments:fetch_competitors')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(refresh_url, {'tpk': self.tournament.pk, 'FlightStrat': 'HighMediumLow'},
+                                       HTTP_HX_REQUEST='true')
+        assert len(queries) == 1
+        competitors, flights = response.content.decode().split('hx-swap-oob="true"')
+        assert competitors.count('<tr>') == 31
+        assert flights.count('<td rowspan') == 10
+
+
+class TestTournamentAdmin(TestTournamentSetup):
+
+    def setUp(self):
+        super().setUp()
+        self.superuser = User.objects.create_superuser(username='admin-usr', password='test-admin',
+                                                       email='admin.user@superuser.com')
+        self.client.login(username='admin-usr', password='test-admin')
+
+    @pytest.mark.django_db
+    def test_tournament_changelist_query_count_is_constant(self):
+        url = reverse('admin:tournaments_tournament_changelist')
+        # the session and the user are loaded from the database by the first request only
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as small_list:
+            self.client.get(url)
+
+        # every other tournament gets some participants as well
+        profiles = list(UserProfile.objects.all()[:5])
+        for tournament in Tournament.objects.exclude(pk=self.tournament.pk):
+            for profile in profiles:
+                Competitor.objects.create(tournament=tournament, user_profile=profile, hcp=Decimal('12.0'))
+
+        with CaptureQueriesContext(connection) as large_list:
+            response = self.client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert len(large_list) == len(small_list)
+
+    @pytest.mark.django_db
+    def test_tournament_change_view_paginates_competitors(self):
+        users = User.objects.bulk_create([User(username=f'late-{number}') for number in range(30)])
+        profiles = UserProfile.objects.bulk_create([UserProfile(user=user, first_name='Late', family_name=str(number))
+                                                    for number, user in enumerate(users)])
+        for profile in profiles:
+            Competitor.objects.create(tournament=self.tournament, user_profile=profile, hcp=20)
+        url = reverse('admin:tournaments_tournament_change', args=[self.tournament.pk])
+        response = self.client.get(url, {'competitors_page': 2})
+        assert response.status_code == HTTPStatus.OK
+        formset = response.context['inline_admin_formsets'][0].formset
+        assert formset.page.number == 2
+        assert formset.page.paginator.count == 60
+        # the remainder past the first 50 registrations
+        expected = list(self.tournament.competitor_set.order_by('registration_date', 'pk')[50:])
+        assert [form.instance for form in formset.forms] == expected
+
+    @pytest.mark.django_db
+    def test_competitor_changelist_search_by_member_name(self):
+        competitor = self.tournament.competitor_set.select_related('user_profile').first()
+        url = reverse('admin:tournaments_competitor_changelist')
+        response = self.client.get(url, {'q': competitor.user_profile.family_name})
+        assert response.status_code == HTTPStatus.OK
+        assert competitor in response.context['cl'].result_list
+
+    @pytest.mark.django_db
+    def test_changelist_prefix_searches_use_the_name_indexes(self):
+        for url in (reverse('admin:tournaments_golfcourse_changelist'),
+                    reverse('admin:accounts_userprofile_changelist')):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, {'q': 'Mü'})
+            assert response.status_code == HTTPStatus.OK
+            searches = [query['sql'] for query in queries if 'LIKE' in query['sql']]
+            assert searches
+            for sql in searches:
+                with connection.cursor() as cursor:
+                    cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                    plan = ' '.join(row[-1] for row in cursor.fetchall())
+                assert 'SCAN' not in plan, plan
+
+
+PARS = [4, 4, 3, 5, 4, 4, 3, 5, 4, 4, 4, 3, 5, 4, 4, 3, 5, 4]
+STROKE_INDEXES = [7, 3, 15, 1, 11, 5, 17, 9, 13, 8, 4, 16, 2, 12, 6, 18, 10, 14]
+
+
+class ScoringSetup(TestTournamentSetup):
+
+    def setUp(self):
+        super().setUp()
+        CourseHole.objects.bulk_create([
+            CourseHole(course=self.tournament.course, number=number, par=par, stroke_index=stroke_index)
+            for number, (par, stroke_index) in enumerate(zip(PARS, STROKE_INDEXES), start=1)])
+        self.client.force_login(User.objects.create_superuser(username='scorer', password='test-scorer'))
+
+
+class TestScoring(ScoringSetup):
+
+    def test_strokes_received(self):
+        assert sum(scoring.strokes_received(20, STROKE_INDEXES)) == 20
+        assert scoring.strokes_received(20, [1, 2, 3, 18]) == [2, 2, 1, 1]
+        # plus handicap gives a stroke back on the easiest hole
+        assert scoring.strokes_received(-1, [1, 17, 18]) == [0, 0, -1]
+
+    def test_compute_field(self):
+        par_card = list(PARS)
+        bogey_card = [par + 1 for par in PARS]
+        partial_card = PARS[:9] + [None] * 9
+        results = scoring.compute_field([par_card, bogey_card, partial_card], [0, 18, 18], PARS, STROKE_INDEXES)
+        assert results[0] == (18, 72, 72, 36)
+        assert results[1] == (18, 90, 72, 36)
+        assert results[2] == (9, 36, 27, 27)
+
+    @pytest.mark.django_db
+    def test_save_hole_scores_for_whole_field(self):
+        competitors = list(self.tournament.competitor_set.all())
+        cards = {competitor.pk: [par + (i % 3) for par in PARS] for i, competitor in enumerate(competitors)}
+        with CaptureQueriesContext(connection) as queries:
+            results = scoring.save_hole_scores(self.tournament, cards)
+        # the number of queries does not depend on the size of the field
+        assert len(queries) < 15
+        assert len(results) == len(competitors)
+        assert HoleScore.objects.count() == 18 * len(competitors)
+        points = [result.stableford_points for result in results]
+        assert points == sorted(points, reverse=True)
+        score = Score.objects.get(competitor=competitors[0])
+        assert score.gross == 72 and score.holes_played == 18
+
+        # a second save updates the strokes and clears the holes left blank
+        cards = {competitors[0].pk: PARS[:17] + [None]}
+        scoring.save_hole_scores(self.tournament, cards)
+        score.refresh_from_db()
+        assert score.holes_played == 17
+        assert score.gross == 72 - PARS[17]
+        assert HoleScore.objects.count() == 18 * len(competitors) - 1
+
+    @pytest.mark.django_db
+    def test_playing_handicap_follows_the_competitor_handicap(self):
+        competitor = self.tournament.competitor_set.first()
+        competitor.hcp = Decimal('10.2')
+        competitor.save()
+        scoring.save_hole_scores(self.tournament, {competitor.pk: list(PARS)})
+        assert Score.objects.get(competitor=competitor).playing_handicap == 10
+
+        competitor.hcp = Decimal('18.0')
+        competitor.save()
+        results = scoring.update_results(self.tournament)
+        result = next(result for result in results if result.competitor_id == competitor.pk)
+        assert (result.playing_handicap, result.net, result.stableford_points) == (18, 54, 54)
+        assert Score.objects.get(competitor=competitor).playing_handicap == 18
+
+    @pytest.mark.django_db
+    def test_enter_scores_view(self):
+        competitor = self.tournament.competitor_set.first()
+        data = {f'c{competitor.pk}-{hole}': par for hole, par in enumerate(PARS, start=1)}
+        response = self.client.post(reverse('tournaments:scores', args=[self.tournament.pk]), data)
+        assert response.status_code == HTTPStatus.OK
+        assert response.context['message'] == 'Scores saved successfully'
+        assert Score.objects.get(competitor=competitor).gross == sum(PARS)
+
+    @pytest.mark.django_db
+    def test_enter_scores_view_invalid_strokes(self):
+        competitor = self.tournament.competitor_set.first()
+        response = self.client.post(reverse('tournaments:scores', args=[self.tournament.pk]),
+                                    {f'c{competitor.pk}-1': 'abc'})
+        assert response.context['error'] == 'Invalid number of strokes: abc'
+        assert not Score.objects.exists()
+
+
+class TestLeaderboard(ScoringSetup):
+
+    def setUp(self):
+        super().setUp()
+        self.competitors = list(self.tournament.competitor_set.order_by('pk')[:3])
+        Competitor.objects.filter(pk__in=[competitor.pk for competitor in self.competitors]).update(hcp=18)
+        scoring.save_hole_scores(self.tournament, {competitor.pk: [par + i for par in PARS]
+                                                   for i, competitor in enumerate(self.competitors)})
+
+    def test_rank_deltas(self):
+        rows = leaderboard.leaderboard_rows(self.tournament.pk)
+        swapped = [rows[0], rows[2]._replace(rank=2), rows[1]._replace(rank=3)]
+        assert leaderboard.rank_deltas(rows, rows) == []
+        assert leaderboard.rank_deltas(rows, swapped) == swapped[1:]
+        assert leaderboard.rank_deltas(rows, rows[:1]) == [leaderboard.empty_row(2), leaderboard.empty_row(3)]
+
+    @pytest.mark.django_db
+    def test_leaderboard_page(self):
+        response = self.client.get(reverse('tournaments:leaderboard', args=[self.tournament.pk]))
+        assert response.status_code == HTTPStatus.OK
+        rows = response.context['rows']
+        # one row per competitor, the ones without score card are empty
+        assert len(rows) == 30
+        assert [row.competitor_id for row in rows[:3]] == [competitor.pk for competitor in self.competitors]
+        assert rows[3].competitor_id is None
+        # served over WSGI: the rows are polled instead of streamed
+        content = response.content.decode()
+        assert 'sse-connect' not in content and 'hx-trigger="every 5s"' in content
+
+        response = self.client.get(reverse('tournaments:leaderboard', args=[self.tournament.pk]),
+                                   HTTP_HX_REQUEST='true')
+        assert [row.competitor_id for row in response.context['rows'][:3]] == [
+            competitor.pk for competitor in self.competitors]
+        assert '<table>' not in response.content.decode()
+        response = self.client.get(reverse('tournaments:leaderboard-stream', args=[self.tournament.pk]))
+        assert response.status_code == HTTPStatus.NO_CONTENT
+
+    async def test_leaderboard_stream_view(self):
+        client = AsyncClient()
+        response = await client.get(reverse('tournaments:leaderboard-stream', args=[self.tournament.pk]))
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+        user = await sync_to_async(User.objects.get)(username='scorer')
+        await sync_to_async(client.force_login)(user)
+        response = await client.get(reverse('tournaments:leaderboard', args=[self.tournament.pk]))
+        assert 'sse-connect' in response.content.decode()
+        response = await client.get(reverse('tournaments:leaderboard-stream', args=[self.tournament.pk]))
+        assert response.status_code == HTTPStatus.OK
+        assert response['Content-Type'] == 'text/event-stream'
+        assert response.is_async
+
+    async def test_stream_sends_leaderboard_then_rank_changes(self):
+        stream = leaderboard.stream_leaderboard(self.tournament.pk)
+        first_event = await stream.__anext__()
+        assert first_event.startswith('event: leaderboard\n')
+        assert first_event.count('hx-swap-oob') == 3
+
+        broadcaster = leaderboard.get_broadcaster(self.tournament.pk)
+        other_viewer = await broadcaster.subscribe()
+        # the last competitor plays a better round and takes the lead
+        await sync_to_async(scoring.save_hole_scores)(self.tournament, {self.competitors[2].pk: [1] * 18})
+        deltas = await broadcaster.refresh()
+        assert [row.competitor_id for row in deltas] == [competitor.pk for competitor in
+                                                          (self.competitors[2], self.competitors[0],
+                                                           self.competitors[1])]
+        broadcaster.publish(leaderboard.render_rows(deltas, oob=True))
+
+        event = await stream.__anext__()
+        assert 'leaderboard-rank-1' in event
+        assert leaderboard.format_event(other_viewer.get_nowait()) == event
+        broadcaster.unsubscribe(other_viewer)
+        await stream.aclose()
+        assert self.tournament.pk not in leaderboard._broadcasters
+
+    def test_old_broadcaster_leaves_the_new_one_registered(self):
+        old = leaderboard.LeaderboardBroadcaster(self.tournament.pk)
+        queue = asyncio.Queue()
+        old.subscribers.add(queue)
+        self.addCleanup(leaderboard._broadcasters.pop, self.tournament.pk, None)
+        new = leaderboard.get_broadcaster(self.tournament.pk)
+        old.unsubscribe(queue)
+        assert leaderboard._broadcasters[self.tournament.pk] is new
+
+
+class TestOrderOfMerit(ScoringSetup):
+
+    def setUp(self):
+        super().setUp()
+        self.season = Season.objects.create(year=self.tournament.date.year, points_table=[10, 6, 4],
+                                            counting_results=1)
+        self.profiles = list(UserProfile.objects.order_by('pk')[:3])
+        self.tournaments = [self.tournament, Tournament.objects.create(
+            date=self.tournament.date, course=self.tournament.course, hcp_limit=54.0)]
+        Competitor.objects.all().delete()
+        for tournament in self.tournaments:
+            for profile in self.profiles:
+                Competitor.objects.create(tournament=tournament, user_profile=profile, hcp=18)
+
+    def play(self, tournament, strokes_over_par):
+        """ Enter the cards of the tournament, strokes over par on each hole by member. """
+        cards = {competitor.pk: [par + strokes_over_par[self.profiles.index(competitor.user_profile)]
+                                 for par in PARS]
+                 for competitor in tournament.competitor_set.select_related('user_profile')}
+        scoring.save_hole_scores(tournament, cards)
+
+    def standings(self):
+        return list(SeasonStanding.objects.filter(season=self.season).order_by('rank', 'user_profile_id')
+                    .values_list('user_profile_id', 'rank', 'points', 'events_played'))
+
+    @pytest.mark.django_db
+    def test_finalise_tournament(self):
+        self.play(self.tournaments[0], [0, 1, 1])
+        merit.finalise_tournament(self.tournaments[0])
+        first, second, third = (profile.pk for profile in self.profiles)
+        # the two last players share the second position
+        assert self.standings() == [(first, 1, 10, 1), (second, 2, 6, 1), (third, 2, 6, 1)]
+        self.tournaments[0].refresh_from_db()
+        assert self.tournaments[0].results_finalised_date is not None
+
+    @pytest.mark.django_db
+    def test_non_starter_gets_no_position(self):
+        cards = {competitor.pk: list(PARS) for competitor in self.tournament.competitor_set.all()}
+        # a blank card is posted for the last player
+        cards[self.tournament.competitor_set.get(user_profile=self.profiles[2]).pk] = [None] * 18
+        scoring.save_hole_scores(self.tournament, cards)
+        merit.finalise_tournament(self.tournament)
+        first, second, third = (profile.pk for profile in self.profiles)
+        assert self.standings() == [(first, 1, 10, 1), (second, 1, 10, 1)]
+        assert not TournamentResult.objects.filter(user_profile_id=third).exists()
+
+    @pytest.mark.django_db
+    def test_best_results_counting_and_incremental_update(self):
+        self.play(self.tournaments[0], [0, 1, 2])
+        merit.finalise_tournament(self.tournaments[0])
+        self.play(self.tournaments[1], [2, 0, 1])
+        merit.finalise_tournament(self.tournaments[1])
+        first, second, third = (profile.pk for profile in self.profiles)
+        # only the best result counts: the first two players share the lead
+        assert self.standings() == [(first, 1, 10, 2), (second, 1, 10, 2), (third, 3, 6, 2)]
+
+        # finalising again after a correction replaces the results of the tournament
+        self.play(self.tournaments[1], [2, 1, 0])
+        merit.finalise_tournament(self.tournaments[1])
+        assert TournamentResult.objects.count() == 6
+        assert self.standings() == [(first, 1, 10, 2), (third, 1, 10, 2), (second, 3, 6, 2)]
+
+    @pytest.mark.django_db
+    def test_rebuild_season_after_points_table_change(self):
+        self.play(self.tournaments[0], [0, 1, 2])
+        merit.finalise_tournament(self.tournaments[0])
+        self.season.points_table = [3, 2, 1]
+        self.season.save()
+        merit.rebuild_season(self.season)
+        assert [points for _, _, points, _ in self.standings()] == [3, 2, 1]
+
+    @pytest.mark.django_db
+    def test_admin_queues_rebuild_on_points_table_change(self):
+        self.play(self.tournaments[0], [0, 1, 2])
+        merit.finalise_tournament(self.tournaments[0])
+        self.client.force_login(User.objects.create_superuser(username='organiser', password='test-organiser'))
+        url = reverse('admin:tournaments_season_change', args=[self.season.pk])
+        for points_table in ([3, 2, 1], [5, 3, 1]):
+            self.client.post(url, {'year': self.season.year, 'name': '', 'points_table': str(points_table),
+                                   'counting_results': 1})
+        # both changes are covered by a single rebuild
+        job = Job.objects.get()
+        assert job.arguments == {'season_id': self.season.pk}
+        call_command('runworker', threads=1, burst=True, stdout=StringIO())
+        assert [points for _, _, points, _ in self.standings()] == [5, 3, 1]
+
+    @pytest.mark.django_db
+    def test_standings_view(self):
+        self.play(self.tournaments[0], [0, 1, 2])
+        response = self.client.post(reverse('tournaments:finalise', args=[self.tournaments[0].pk]))
+        assert response.status_code == HTTPStatus.FOUND
+        assert response.url == self.season.get_absolute_url()
+
+        # the session and the user are served from the cache
+        with self.assertNumQueries(3):
+            response = self.client.get(response.url)
+        assert [standing.rank for standing in response.context['standings']] == [1, 2, 3]
+
+
+class TestStatistics(TestTournamentSetup):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client.force_login(User.objects.create_superuser(username='organiser', password='test-organiser'))
+
+    def tearDown(self):
+        super().tearDown()
+        cache.clear()
+
+    @pytest.mark.django_db
+    def test_refresh_statistics(self):
+        statistics = stats.refresh_statistics()
+        assert statistics['per_course'] == [{'tournament__course__name': self.tournament.course.name,
+                                             'players': 30, 'tournaments': 1}]
+        assert sum(department['players'] for department in statistics['per_department']) == 30
+        assert statistics['per_month'][0]['month'] == self.tournament.date.replace(day=1)
+        assert sum(band['players'] for band in statistics['handicap_bands']) == 30
+        assert statistics['handicaps']['players'] == 30
+
+    @pytest.mark.django_db
+    def test_one_query_per_widget(self):
+        with self.assertNumQueries(len(stats.WIDGETS)):
+            stats.refresh_statistics()
+
+    @pytest.mark.django_db
+    def test_statistics_view_is_served_from_cache(self):
+        url = reverse('tournaments:statistics')
+        self.client.get(url)
+        with self.assertNumQueries(0):  # the session and the user are served from the cache too
+            response = self.client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert response.context['statistics']['handicaps']['players'] == 30
+
+    @pytest.mark.django_db
+    def test_outdated_statistics_refreshed_by_worker(self):
+        statistics = stats.refresh_statistics()
+        statistics['computed_at'] -= stats.REFRESH_INTERVAL * 2
+        cache.set(stats.CACHE_KEY, statistics)
+        url = reverse('tournaments:statistics')
+        for _ in range(2):
+            assert self.client.get(url).context['statistics']['computed_at'] == statistics['computed_at']
+        job = Job.objects.get()
+        assert job.name == stats.REFRESH_TASK
+
+        call_command('runworker', threads=1, burst=True, stdout=StringIO())
+        assert self.client.get(url).context['statistics']['computed_at'] > statistics['computed_at']
+        assert Job.objects.get().status == Job.SUCCEEDED
+
+
+class TestCalendarFeed(TestTournamentSetup):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.token = ical.feed_token(UserProfile.objects.first().pk)
+        self.url = reverse('tournaments:calendar-all', args=[self.token])
+
+    def tearDown(self):
+        super().tearDown()
+        cache.clear()
+
+    @pytest.mark.django_db
+    def test_fold_and_escape(self):
+        line = 'DESCRIPTION:' + 'ä' * 60
+        folded = ical.fold_line(line)
+        assert all(len(part.encode()) <= 75 for part in folded.split('\r\n'))
+        assert folded.replace('\r\n ', '') == line
+        assert ical.escape_text('a,b;c\\d\ne') == r'a\,b\;c\\d\ne'
+
+    @pytest.mark.django_db
+    def test_global_feed(self):
+        response = self.client.get(self.url)
+        assert response.status_code == HTTPStatus.OK
+        assert response['Content-Type'] == 'text/calendar; charset=utf-8'
+        content = response.content.decode()
+        assert content.startswith('BEGIN:VCALENDAR\r\n')
+        assert content.count('BEGIN:VEVENT') == Tournament.objects.count()
+        assert f'UID:tournament-{self.tournament.pk}@ksfgolf' in content
+        assert all(len(line.encode()) <= 75 for line in content.split('\r\n'))
+        assert response['ETag']
+        assert response['Last-Modified']
+
+    @pytest.mark.django_db
+    def test_conditional_request_and_cache(self):
+        url = self.url
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        assert response.content == b''
+
+    @pytest.mark.django_db
+    def test_feed_invalidated_on_change(self):
+        url = self.url
+        etag = self.client.get(url)['ETag']
+        self.tournament.comment = 'Shotgun start'
+        self.tournament.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        assert 'Shotgun start' in response.content.decode()
+
+    @pytest.mark.django_db
+    def test_last_modified_follows_registrations(self):
+        url = self.url
+        last_modified = self.client.get(url)['Last-Modified']
+        assert self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code == HTTPStatus.NOT_MODIFIED
+
+        profile = UserProfile.objects.exclude(competitors=self.tournament).first()
+        Competitor.objects.create(tournament=self.tournament, user_profile=profile, hcp=Decimal('12.0'))
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == HTTPStatus.OK
+        assert response['Last-Modified'] != last_modified
+        assert '(31/' in response.content.decode()
+
+    @pytest.mark.django_db
+    def test_personal_feed(self):
+        competitor = Competitor.objects.filter(tournament=self.tournament).first()
+        token = ical.feed_token(competitor.user_profile_id)
+        content = self.client.get(reverse('tournaments:calendar', args=[token])).content.decode()
+        assert content.count('Registration: registered') == 1
+        assert content.count('BEGIN:VEVENT') == Tournament.objects.count()
+
+    @pytest.mark.django_db
+    def test_invalid_token(self):
+        response = self.client.get(reverse('tournaments:calendar', args=['forged']))
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        assert self.client.get(reverse('tournaments:calendar-all', args=['forged'])).status_code == HTTPStatus.NOT_FOUND
+        # the tokens expire
+        issued = time.time() - ical.TOKEN_MAX_AGE.total_seconds() - 60
+        with mock.patch('time.time', return_value=issued):
+            token = ical.feed_token(UserProfile.objects.first().pk)
+        assert self.client.get(reverse('tournaments:calendar-all', args=[token])).status_code == HTTPStatus.NOT_FOUND
+
+
+class TestImportCompetitors(TestTournamentSetup):
+
+    def setUp(self):
+        super().setUp()
+        self.registered = list(self.tournament.competitor_set.select_related('user_profile__user').order_by('pk'))
+        self.others = list(UserProfile.objects.exclude(competitors=self.tournament).select_related('user'))
+        self.tournament.max_participants = 32
+        self.tournament.save()
+
+    def csv_file(self, rows, header='username,hcp'):
+        return io.BytesIO('\n'.join([header] + rows).encode())
+
+    @pytest.mark.django_db
+    def test_import(self):
+        rows = [f'{self.registered[0].user_profile.user.username},12.3',
+                f'{self.registered[1].user_profile.user.username},{self.registered[1].hcp}',
+                f'{self.others[0].user.username},20',
+                'nobody,10',
+                f'{self.others[1].user.username},60',
+                f'{self.registered[0].user_profile.user.username},11',
+                ',5',
+                f'{self.others[2].user.username},7,4',
+                f'{self.others[3].user.username},8',
+                f'{self.others[4].user.username},9']
+        with self.assertNumQueries(2):
+            report = imports.import_competitors(self.tournament, self.csv_file(rows), dry_run=True)
+        assert (report.created, report.updated, report.unchanged) == (2, 1, 1)
+        assert Competitor.objects.filter(tournament=self.tournament).count() == 30
+
+        report = imports.import_competitors(self.tournament, self.csv_file(rows))
+        assert report.errors == [(5, 'Unknown member: nobody'), (6, 'Invalid handicap: 60'),
+                                 (7, f'Duplicate of line 2: {self.registered[0].user_profile.user.username}'),
+                                 (8, 'Missing username'), (9, 'Too many fields: 3 instead of 2'),
+                                 (11, f'The tournament is full, {self.others[4].user.username} is not registered')]
+        assert Competitor.objects.get(pk=self.registered[0].pk).hcp == Decimal('12.3')
+        assert Competitor.objects.get(user_profile=self.others[0], tournament=self.tournament).hcp == Decimal('20')
+        assert Competitor.objects.filter(tournament=self.tournament).count() == 32
+
+    @pytest.mark.django_db
+    def test_missing_columns(self):
+        report = imports.import_competitors(self.tournament, self.csv_file(['a;1'], header='name;handicap'))
+        assert report.errors == [(1, 'Missing columns: hcp, username')]
+
+    @pytest.mark.django_db
+    def test_latin1_and_invalid_files(self):
+        username = self.others[0].user.username
+        latin1 = f'username,hcp,comment\n{username},5.5,Gäste aus Mönchengladbach\n'.encode('latin-1')
+        report = imports.import_competitors(self.tournament, io.BytesIO(latin1), dry_run=True)
+        assert (report.created, report.errors) == (1, [])
+
+        # Excel export of a country writing a decimal comma
+        excel = f'username;hcp\r\n{username};12,5\r\nMüller;3,0\r\n'.encode('cp1252')
+        report = imports.import_competitors(self.tournament, io.BytesIO(excel), dry_run=True)
+        assert (report.created, report.errors) == (1, [(3, 'Unknown member: Müller')])
+        assert imports.read_rows(io.BytesIO(excel), []) == {username: (2, Decimal('12.5')),
+                                                            'Müller': (3, Decimal('3.0'))}
+
+        report = imports.import_competitors(self.tournament, self.csv_file(['anna,' + '1' * 200000]))
+        assert report.errors == [(2, 'Invalid CSV file: field larger than field limit (131072)')]
+
+        # the decimal comma in a file separated by commas is not read as 12.0
+        rows = f'username,hcp\n{username},12,5\n{self.others[1].user.username}\n'.encode()
+        report = imports.import_competitors(self.tournament, io.BytesIO(rows))
+        assert (report.created, report.errors) == (0, [(2, 'Too many fields: 3 instead of 2'), (3, 'Missing fields')])
+
+        upload = SimpleUploadedFile('handicaps.csv', latin1, content_type='text/csv')
+        self.client.force_login(User.objects.create_superuser(username='organiser', password='test-organiser'))
+        response = self.client.post(reverse('tournaments:import', args=[self.tournament.pk]), {'file': upload})
+        assert response.status_code == HTTPStatus.OK
+        assert response.context['report'].created == 1
+
+    @pytest.mark.django_db
+    def test_import_view(self):
+        self.client.force_login(User.objects.create_superuser(username='organiser', password='test-organiser'))
+        upload = SimpleUploadedFile('handicaps.csv', f'username,hcp\n{self.others[0].user.username},5.5\n'.encode(),
+                                    content_type='text/csv')
+        response = self.client.post(reverse('tournaments:import', args=[self.tournament.pk]), {'file': upload})
+        assert response.status_code == HTTPStatus.OK
+        assert response.context['report'].created == 1
+        assert Competitor.objects.filter(user_profile=self.others[0], tournament=self.tournament).exists()
+
+
+class TestSeasonBuilder(ViewsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.courses = [GolfCourse.objects.create(name=name, zip_code=70686)
+                        for name in ('Beta course', 'Alpha course')]
+        # the course of the third tournament is already booked that day
+        Tournament.objects.create(date=datetime.date(2024, 5, 1), course=self.courses[1], hcp_limit=54.0,
+                                  slug='alpha-course-2024-05-01')
+        # an unrelated tournament took the slug of the first one
+        Tournament.objects.create(date=datetime.date(2023, 1, 1), hcp_limit=54.0, slug='alpha-course-2024-04-03')
+        self.client.force_login(self.superuser)
+
+    def data(self, end_date='2024-05-29', **kwargs):
+        return {'start_date': '2024-04-03', 'end_date': end_date, 'interval_weeks': 2,
+                'courses': [course.pk for course in self.courses], 'tee_time': '10:00', 'hcp_limit': '36.0',
+                'hcp_relevant': 'on', 'max_participants': 24, **kwargs}
+
+    @pytest.mark.django_db
+    def test_preview(self):
+        response = self.client.post(reverse('tournaments:build-season'), self.data(preview='Preview'))
+        assert response.status_code == HTTPStatus.OK
+        planned = [(tournament.date, tournament.course.name, tournament.slug, conflict)
+                   for tournament, conflict in response.context['planned']]
+        assert planned == [
+            (datetime.date(2024, 4, 3), 'Alpha course', 'alpha-course-2024-04-03-2', False),
+            (datetime.date(2024, 4, 17), 'Beta course', 'beta-course-2024-04-17', False),
+            (datetime.date(2024, 5, 1), 'Alpha course', None, True),
+            (datetime.date(2024, 5, 15), 'Beta course', 'beta-course-2024-05-15', False),
+            (datetime.date(2024, 5, 29), 'Alpha course', 'alpha-course-2024-05-29', False),
+        ]
+        assert Tournament.objects.count() == 2
+
+    @pytest.mark.django_db
+    def test_create_with_constant_number_of_queries(self):
+        url = reverse('tournaments:build-season')
+        # the session and the user are loaded from the database by the first request only
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as short_season:
+            response = self.client.post(url, self.data(create='Create'))
+        assert response.status_code == HTTPStatus.FOUND
+        assert Tournament.objects.filter(max_participants=24, tee_time=datetime.time(10, 0)).count() == 4
+        with CaptureQueriesContext(connection) as long_season:
+            self.client.post(url, self.data(start_date='2025-01-01', end_date='2025-12-31', create='Create'))
+        assert Tournament.objects.count() == 2 + 4 + 27
+        assert len(long_season) == len(short_season)
+        # the tournaments are searchable
+        assert SearchEntry.objects.filter(kind=SearchEntry.TOURNAMENT).count() == Tournament.objects.count()
+
+    @pytest.mark.django_db
+    def test_too_many_tournaments(self):
+        response = self.client.post(reverse('tournaments:build-season'),
+                                    self.data(end_date='2030-01-01', interval_weeks=1, preview='Preview'))
+        assert 'planned' not in response.context
+        assert response.context['form'].non_field_errors()
+
+
+class TestSlugs(TestCase):
+    def setUp(self):
+        self.golf_course = GolfCourse.objects.create(name='Test golf course', zip_code=70686)
+
+    def create(self, **kwargs):
+        return Tournament.objects.create(date=datetime.date(2024, 6, 1), course=self.golf_course, hcp_limit=54.0,
+                                         **kwargs)
+
+    @pytest.mark.django_db
+    def test_next_free_suffix_with_one_query(self):
+        self.create(slug='test-golf-course-2024-06-01')
+        self.create(slug='test-golf-course-2024-06-01-2')
+        tournament = self.create()
+        with self.assertNumQueries(1):
+            slugify_instance_str(tournament)
+        assert tournament.slug == 'test-golf-course-2024-06-01-3'
+        slugify_instance_str(tournament, save=True)
+        # the instance keeps its own slug
+        assert slugify_instance_str(tournament).slug == 'test-golf-course-2024-06-01-3'
+
+    @pytest.mark.django_db
+    def test_slug_taken_by_concurrent_insert(self):
+        tournament = self.create()
+        taken = self.create(slug='test-golf-course-2024-06-01')
+        free = utils.unique_slugs
+        # the first allocation does not see the concurrent tournament yet
+        with mock.patch('tournaments.utils.unique_slugs',
+                        side_effect=[[taken.slug], ['test-golf-course-2024-06-01-2']]) as allocate:
+            slugify_instance_str(tournament, save=True)
+        assert allocate.call_count == 2
+        tournament.refresh_from_db()
+        assert tournament.slug == 'test-golf-course-2024-06-01-2'
+        assert free(Tournament.objects.all(), ['test-golf-course-2024-06-01']) == ['test-golf-course-2024-06-01-3']
+
+    @pytest.mark.django_db
+    def test_long_slugs_are_truncated(self):
+        slugs = utils.unique_slugs(Tournament.objects.all(), ['x' * 60] * 3)
+        assert slugs == ['x' * 50, 'x' * 48 + '-2', 'x' * 48 + '-3']
+
+    @pytest.mark.django_db
+    def test_backfill_slugs(self):
+        self.create(slug='test-golf-course-2024-06-01')
+        for _ in range(3):
+            self.create()
+        call_command('backfill_slugs', stdout=StringIO())
+        assert sorted(Tournament.objects.values_list('slug', flat=True)) == [
+            'test-golf-course-2024-06-01', 'test-golf-course-2024-06-01-2', 'test-golf-course-2024-06-01-3',
+            'test-golf-course-2024-06-01-4']
+
+
+class TestBulkDeletion(ScoringSetup):
+
+    def setUp(self):
+        super().setUp()
+        self.season = Season.objects.create(year=self.tournament.date.year, points_table=[10, 6, 4])
+        self.empty_tournament = Tournament.objects.create(date=self.tournament.date, course=self.tournament.course,
+                                                          hcp_limit=54.0)
+        self.other_tournament = Tournament.objects.create(date=self.tournament.date, course=self.tournament.course,
+                                                          hcp_limit=54.0)
+        competitors = list(self.tournament.competitor_set.order_by('pk'))
+        for competitor in competitors[:3]:
+            Competitor.objects.create(tournament=self.other_tournament, user_profile=competitor.user_profile, hcp=18)
+        for tournament in (self.tournament, self.other_tournament):
+            scoring.save_hole_scores(tournament, {competitor.pk: PARS
+                                                  for competitor in tournament.competitor_set.all()})
+            merit.finalise_tournament(tournament)
+        WaitlistEntry.objects.create(tournament=self.tournament, user_profile=UserProfile.objects.last())
+
+    @pytest.mark.django_db
+    def test_cascade_without_loading_related_rows(self):
+        with CaptureQueriesContext(connection) as empty:
+            deletion.delete_tournaments([self.empty_tournament.pk])
+        with CaptureQueriesContext(connection) as full:
+            deletion.delete_tournaments([self.tournament.pk])
+        # the scores, results and standings of 30 members are not loaded one by one
+        assert len(full) - len(empty) < 10
+        assert not Tournament.objects.filter(pk__in=[self.tournament.pk, self.empty_tournament.pk]).exists()
+        assert Competitor.objects.count() == 3
+        assert Score.objects.count() == 3
+        assert HoleScore.objects.count() == 3 * 18
+        assert not WaitlistEntry.objects.exists()
+        assert TournamentResult.objects.count() == 3
+        # only the members of the remaining tournament are still ranked
+        assert SeasonStanding.objects.filter(season=self.season).count() == 3
+        assert not SearchEntry.objects.filter(kind=SearchEntry.TOURNAMENT, object_id=self.tournament.pk).exists()
+
+    @pytest.mark.django_db
+    def test_archive_hides_tournament(self):
+        self.client.force_login(User.objects.create_superuser(username='archivist', password='test-archivist'))
+        self.client.post(reverse('tournaments:delete'), {'delete-checkboxes': [self.tournament.pk],
+                                                         'archive': 'Archive selection'})
+        self.tournament.refresh_from_db()
+        assert self.tournament.is_archived
+        # archived, not deleted
+        assert self.tournament.competitor_set.count() == 30
+        response = self.client.get(reverse('tournaments:list'))
+        assert self.tournament not in response.context['object_list']
+        response = self.client.get(reverse('tournaments:list') + '?type=archived')
+        assert list(response.context['object_list']) == [self.tournament]
+        token = ical.feed_token(UserProfile.objects.first().pk)
+        feed = self.client.get(reverse('tournaments:calendar-all', args=[token])).content.decode()
+        assert f'UID:tournament-{self.tournament.pk}@' not in feed
+        # no longer searchable nor open for registration
+        assert not SearchEntry.objects.filter(kind=SearchEntry.TOURNAMENT, object_id=self.tournament.pk).exists()
+        self.tournament.save()
+        assert not SearchEntry.objects.filter(kind=SearchEntry.TOURNAMENT, object_id=self.tournament.pk).exists()
+        response = self.client.post(reverse('accounts:participate', args=[self.tournament.pk]))
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    @pytest.mark.django_db
+    def test_admin_restore_reindexes_tournament(self):
+        self.client.force_login(User.objects.create_superuser(username='archivist', password='test-archivist'))
+        url = reverse('admin:tournaments_tournament_changelist')
+        self.client.post(url, {'action': 'archive_tournaments', '_selected_action': [self.tournament.pk]})
+        assert not SearchEntry.objects.filter(kind=SearchEntry.TOURNAMENT, object_id=self.tournament.pk).exists()
+        self.client.post(url, {'action': 'restore_tournaments', '_selected_action': [self.tournament.pk]})
+        assert SearchEntry.objects.filter(kind=SearchEntry.TOURNAMENT, object_id=self.tournament.pk).exists()
+
+    @pytest.mark.django_db
+    def test_admin_actions_need_the_change_permission(self):
+        viewer = User.objects.create_user(username='viewer', password='test-viewer', is_staff=True)
+        viewer.user_permissions.add(Permission.objects.get(codename='view_tournament'))
+        self.client.force_login(viewer)
+        url = reverse('admin:tournaments_tournament_changelist')
+        response = self.client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        # no action is offered to a user who may only view the tournaments
+        assert response.context['action_form'] is None
+        self.client.post(url, {'action': 'archive_tournaments', '_selected_action': [self.tournament.pk]})
+        self.tournament.refresh_from_db()
+        assert not self.tournament.is_archived
+
+    @pytest.mark.django_db
+    def test_admin_deletion_is_confirmed(self):
+        self.client.force_login(User.objects.create_superuser(username='organiser', password='test-organiser'))
+        url = reverse('admin:tournaments_tournament_changelist')
+        data = {'action': 'delete_tournaments', '_selected_action': [self.tournament.pk, self.empty_tournament.pk]}
+        response = self.client.post(url, data)
+        assert response.status_code == HTTPStatus.OK
+        assert 'Their 30 registrations' in response.content.decode()
+        assert Tournament.objects.filter(pk=self.tournament.pk).exists()
+
+        response = self.client.post(url, {**data, 'post': 'yes'})
+        assert response.status_code == HTTPStatus.FOUND
+        assert not Tournament.objects.filter(pk__in=[self.tournament.pk, self.empty_tournament.pk]).exists()
+
+
+class TestSeasonArchive(ScoringSetup):
+
+    def setUp(self):
+        super().setUp()
+        self.last_year = self.tournament.date.year - 1
+        self.old_tournaments = [Tournament.objects.create(date=datetime.date(self.last_year, month, 1),
+                                                          course=self.tournament.course, hcp_limit=54.0)
+                                for month in (5, 6)]
+        self.profiles = list(UserProfile.objects.order_by('pk')[:3])
+        for tournament in self.old_tournaments:
+            for profile in self.profiles:
+                Competitor.objects.create(tournament=tournament, user_profile=profile, hcp=18)
+            cards = {competitor.pk: [par + self.profiles.index(competitor.user_profile) for par in PARS]
+                     for competitor in tournament.competitor_set.all()}
+            scoring.save_hole_scores(tournament, cards)
+            merit.finalise_tournament(tournament)
+
+    @pytest.mark.django_db
+    def test_archive_finished_seasons(self):
+        call_command('archive_seasons', before=self.tournament.date.year, stdout=StringIO())
+        # the live tables only keep the current season
+        assert not Tournament.objects.filter(date__year__lt=self.tournament.date.year).exists()
+        assert Tournament.objects.count() == 40
+        assert not Season.objects.filter(year=self.last_year).exists()
+        assert not Competitor.objects.filter(tournament__in=self.old_tournaments).exists()
+        assert not TournamentResult.objects.exists()
+
+        season_archive = SeasonArchive.objects.get()
+        assert (season_archive.year, season_archive.tournament_count, season_archive.competitor_count) == \
+               (self.last_year, 2, 6)
+        snapshot = archive.load_snapshot(season_archive)
+        assert [standing['member'] for standing in snapshot['standings']] == [str(profile)
+                                                                              for profile in self.profiles]
+        assert snapshot['standings'][0]['points'] == 50
+        winner = snapshot['tournaments'][0]['competitors'][0]
+        assert (winner['member'], winner['position'], winner['gross']) == (str(self.profiles[0]), 1, sum(PARS))
+
+        with self.assertRaises(CommandError):
+            call_command('archive_seasons', before=self.tournament.date.year + 1, stdout=StringIO())
+
+    @pytest.mark.django_db
+    def test_history_view(self):
+        archive.archive_season(self.last_year)
+        response = self.client.get(reverse('tournaments:history'))
+        assert response.status_code == HTTPStatus.OK
+        assert 'snapshot' not in response.context
+        response = self.client.get(reverse('tournaments:history', args=[self.last_year]))
+        assert len(response.context['snapshot']['tournaments']) == 2
+        assert str(self.profiles[0]) in response.content.decode()
+        assert self.client.get(reverse('tournaments:history', args=[1990])).status_code == HTTPStatus.NOT_FOUND
+
+    @pytest.mark.django_db
+    def test_history_hides_handicaps_from_members(self):
+        archive.archive_season(self.last_year)
+        url = reverse('tournaments:history', args=[self.last_year])
+        assert '<th>HCP</th>' in self.client.get(url).content.decode()
+        self.client.force_login(User.objects.create_user(username='member-usr', password='test-member'))
+        content = self.client.get(url).content.decode()
+        assert str(self.profiles[0]) in content
+        assert '<th>HCP</th>' not in content
+        assert '<th>Department</th>' not in content
+
+
+class TestPrinting(ScoringSetup):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.url = reverse('tournaments:print', args=[self.tournament.pk])
+
+    def tearDown(self):
+        super().tearDown()
+        cache.clear()
+
+    @pytest.mark.django_db
+    def test_scorecards_and_start_sheet(self):
+        response = self.client.get(self.url, {'FlightStrat': 'SortByHcp'})
+        assert response.status_code == HTTPStatus.OK
+        assert response['Content-Type'] == 'application/pdf'
+        reader = PdfReader(io.BytesIO(b''.join(response.streaming_content)))
+        # the start sheet, then a page per flight
+        assert len(reader.pages) == 1 + 10
+        competitor = self.tournament.competitor_set.order_by('hcp').select_related('user_profile').first()
+        assert str(competitor.user_profile) in reader.pages[0].extract_text()
+        scorecard = reader.pages[1].extract_text()
+        assert str(competitor.user_profile) in scorecard
+        assert f'{self.tournament.course.name} - Flight 1' in scorecard
+
+        # cached until the flight plan changes
+        with mock.patch.object(printing, 'render', wraps=printing.render) as render:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+            assert response.status_code == HTTPStatus.NOT_MODIFIED
+            competitor.hcp = 54
+            competitor.save()
+            assert self.client.get(self.url).status_code == HTTPStatus.OK
+        assert render.call_count == 1
+
+    @pytest.mark.django_db
+    def test_flights_rendered_in_parallel(self):
+        course = printing.course_card(self.tournament)
+        flights = printing.flight_plan(self.tournament, 'HighMediumLow', course)
+        assert course.pars == PARS
+        assert [player.strokes for player in flights[0].players] == [
+            scoring.strokes_received(player.playing_handicap, STROKE_INDEXES) for player in flights[0].players]
+        sequential = PdfReader(io.BytesIO(printing.render('Title', course, flights)))
+        with mock.patch.object(printing, 'FLIGHTS_PER_PROCESS', 3):
+            parallel = PdfReader(io.BytesIO(printing.render('Title', course, flights)))
+        assert len(parallel.pages) == len(sequential.pages) == 11
+        assert [page.extract_text() for page in parallel.pages] == [page.extract_text() for page in sequential.pages]
+
+    def test_staff_only(self):
+        self.client.force_login(User.objects.create_user(username='member'))
+        assert self.client.get(self.url).status_code == HTTPStatus.FOUND
+
+
+GEONAMES_ROWS = [
+    # country, zip code, place, state, code, district, code, county, code, latitude, longitude, accuracy
+    ['DE', '70173', 'Stuttgart', 'Baden-Württemberg', 'BW', '', '', '', '', '48.7823', '9.177', '4'],
+    ['DE', '71088', 'Holzgerlingen', 'Baden-Württemberg', 'BW', '', '', '', '', '48.6397', '9.0117', '4'],
+    ['DE', '72074', 'Tübingen', 'Baden-Württemberg', 'BW', '', '', '', '', '48.54', '9.06', '4'],
+    ['DE', '72074', 'Tübingen Nord', 'Baden-Württemberg', 'BW', '', '', '', '', '48.56', '9.08', '4'],
+    ['DE', '80331', 'München', 'Bayern', 'BY', '', '', '', '', '48.1371', '11.5754', '4'],
+    ['DE', '10115', 'Berlin', 'Berlin', 'BE', '', '', '', '', '52.532', '13.3849', '4'],
+]
+
+
+class TestNearby(TestCase):
+    def setUp(self):
+        cache.clear()
+        lines = io.StringIO(''.join('\t'.join(row) + '\n' for row in GEONAMES_ROWS))
+        assert geo.load_zip_coordinates(lines) == 5
+        self.courses = {zip_code: GolfCourse.objects.create(name=f'Golfclub {zip_code}', zip_code=zip_code)
+                        for zip_code in (71088, 72074, 80331, 10115)}
+        upcoming = timezone.now().date() + datetime.timedelta(days=30)
+        for course in self.courses.values():
+            Tournament.objects.create(date=upcoming, course=course, hcp_limit=36.0)
+        self.client.force_login(User.objects.create_user(username='golfer'))
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_grid_index_matches_scan(self):
+        generator = Random(7)
+        points = [(key, generator.uniform(43, 55), generator.uniform(-5, 15)) for key in range(2000)]
+        index = geo.GridIndex(points)
+        for _ in range(20):
+            latitude, longitude = generator.uniform(44, 54), generator.uniform(-4, 14)
+            scan = sorted((geo.distance_km(latitude, longitude, point_latitude, point_longitude), key)
+                          for key, point_latitude, point_longitude in points)
+            assert index.within(latitude, longitude, 80) == [found for found in scan if found[0] <= 80]
+            assert index.nearest(latitude, longitude, 5) == scan[:5]
+        assert geo.GridIndex([]).nearest(48.0, 9.0, 3) == []
+
+    @pytest.mark.django_db
+    def test_courses_geocoded(self):
+        holzgerlingen = self.courses[71088]
+        assert (holzgerlingen.latitude, holzgerlingen.longitude) == (48.6397, 9.0117)
+        # the places sharing a zip code are located at their mean
+        assert self.courses[72074].latitude == pytest.approx(48.55)
+        # Stuttgart - Berlin
+        assert round(geo.distance_km(48.7823, 9.177, 52.532, 13.3849)) == 512
+
+        unknown = GolfCourse.objects.create(name='Golfclub Nowhere', zip_code=99999)
+        assert unknown.latitude is None
+        GolfCourse.objects.filter(pk=unknown.pk).update(zip_code=70173)
+        assert geo.geocode_courses() == 5
+
+    @pytest.mark.django_db
+    def test_english_courses_located_with_the_gb_zip_codes(self):
+        geo.load_zip_coordinates(io.StringIO('GB\t10115\tLondon\t\t\t\t\t\t\t51.5\t-0.12\t4\n'))
+        london = GolfCourse.objects.create(name='Golfclub London', zip_code=10115, country=GolfCourse.ENGLAND)
+        assert (london.latitude, london.longitude) == (51.5, -0.12)
+        GolfCourse.objects.filter(pk=london.pk).update(latitude=None, longitude=None)
+        assert geo.geocode_courses() == 5
+        assert GolfCourse.objects.get(pk=london.pk).latitude == 51.5
+
+    @pytest.mark.django_db
+    def test_index_rebuilt_on_a_version_bumped_by_another_process(self):
+        coordinates = (48.7823, 9.177)
+        assert [course for _, course in geo.nearest_courses(coordinates, 1)] == [self.courses[71088]]
+        # the command located the courses in its own process: only the shared version tells the workers
+        GolfCourse.objects.filter(pk=self.courses[10115].pk).update(latitude=48.78, longitude=9.18)
+        cache.set(geo.VERSION_KEY, cache.get(geo.VERSION_KEY) + 1, timeout=None)
+        assert [course for _, course in geo.nearest_courses(coordinates, 1)] == [self.courses[10115]]
+
+    @pytest.mark.django_db
+    def test_nearby_tournaments(self):
+        url = reverse('tournaments:nearby')
+        response = self.client.get(url, {'zip_code': 70173, 'country': 'DE', 'radius': 50})
+        assert response.status_code == HTTPStatus.OK
+        nearby = [tournament.course for _, tournament in response.context['tournaments']]
+        assert nearby == [self.courses[71088], self.courses[72074]]
+        assert [course for _, course in response.context['courses']] == [
+            self.courses[71088], self.courses[72074], self.courses[80331], self.courses[10115]]
+
+        # the index is rebuilt when a course changes
+        self.courses[72074].zip_code = 80331
+        self.courses[72074].save()
+        response = self.client.get(url, {'zip_code': 70173, 'country': 'DE', 'radius': 50})
+        assert [tournament.course for _, tournament in response.context['tournaments']] == [self.courses[71088]]
+
+        response = self.client.get(url, {'zip_code': 12345, 'country': 'DE', 'radius': 50})
+        assert 'Unknown zip code.' in response.content.decode()
+
+    @pytest.mark.django_db
+    def test_load_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', encoding='utf-8') as zip_file:
+            row = ['DE', '70173', 'Stuttgart', '', '', '', '', '', '', '48.0', '9.0', '']
+            zip_file.write('\t'.join(row) + '\n')
+            zip_file.flush()
+            out = StringIO()
+            call_command('load_zip_coordinates', zip_file.name, stdout=out)
+        assert '1 zip codes loaded, 0 courses located.' in out.getvalue()
+        assert not GolfCourse.objects.filter(latitude__isnull=False).exists()
+
+
+class TestStaticAssets(TestCase):
+    def setUp(self):
+        self.static_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.static_root.cleanup)
+        storages = {
+            'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+            'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+        }
+        override = override_settings(STATIC_ROOT=self.static_root.name, STORAGES=storages, DEBUG=False)
+        override.enable()
+        self.addCleanup(override.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    @pytest.mark.django_db
+    def test_hashed_and_precompressed(self):
+        url = static('js/htmx.min.js')
+        assert url != '/static/js/htmx.min.js' and url.endswith('.js')
+        assert url in Client().get(reverse('home')).content.decode()
+
+        response = Client().get(url, HTTP_ACCEPT_ENCODING='gzip, br')
+        assert response.status_code == HTTPStatus.OK
+        assert response['Content-Encoding'] == 'br'
+        assert 'immutable' in response['Cache-Control']
+        response = Client().get(url, HTTP_ACCEPT_ENCODING='gzip')
+        assert response['Content-Encoding'] == 'gzip'
+        response = Client().get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+class TestResponseCompression(ViewsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tournament = Tournament.objects.create(date=datetime.date(2024, 6, 1), tee_time=datetime.time(8, 0),
+                                                    hcp_limit=54, max_participants=200)
+        users = User.objects.bulk_create([User(username=f'player-{number}', email=f'player-{number}@ksf.de')
+                                          for number in range(200)])
+        profiles = UserProfile.objects.bulk_create([
+            UserProfile(user=user, first_name='Player', family_name=str(number), department='Golf & Co')
+            for number, user in enumerate(users)])
+        Competitor.objects.bulk_create([Competitor(tournament=self.tournament, user_profile=profile, hcp=number % 54)
+                                        for number, profile in enumerate(profiles)])
+        self.client.force_login(self.superuser)
+        self.url = f"{reverse('tournaments:fetch_competitors')}?tpk={self.tournament.pk}"
+
+    def test_minify_html(self):
+        html = '<div>\n    <p>Golf &amp;\n\n  <b>Co</b></p>\n    <pre>  a\n    b</pre>\n</div>\xa0 <span> x </span>\n'
+        assert minify_html(html) == '<div>\n<p>Golf &amp;\n<b>Co</b></p>\n<pre>  a\n    b</pre>\n</div>\xa0 <span> x </span>\n'
+
+    @pytest.mark.django_db
+    def test_competitors_table_compressed(self):
+        plain = self.client.get(self.url)
+        assert 'Content-Encoding' not in plain
+        assert 'Accept-Encoding' in plain['Vary']
+        # the competitors table, before the flights swapped out of band
+        assert plain.content.split(b'hx-swap-oob')[0].count(b'<tr>') == 201
+        assert b'\n        ' not in plain.content
+
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        assert response['Content-Encoding'] == 'br'
+        assert brotli.decompress(response.content) == plain.content
+        assert int(response['Content-Length']) < len(plain.content) / 10
+
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        assert response['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(response.content) == plain.content
+
+    @pytest.mark.django_db
+    def test_small_responses_not_compressed(self):
+        Competitor.objects.all().delete()
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='br')
+        assert 'Content-Encoding' not in response
+
+    def test_streaming_responses_not_buffered(self):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip')
+        chunks = [f'<tr><td>{number}</td></tr>\n'.encode() for number in range(100)]
+        middleware = CompressionMiddleware(lambda request: StreamingHttpResponse(iter(chunks)))
+        response = middleware(request)
+        assert response['Content-Encoding'] == 'gzip'
+        compressed = list(response.streaming_content)
+        # a compressed chunk per chunk, each one decodable on arrival
+        assert len(compressed) == len(chunks) + 1
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        assert decompressor.decompress(compressed[0]) == chunks[0]
+        assert gzip.decompress(b''.join(compressed)) == b''.join(chunks)
+
+        middleware = CompressionMiddleware(
+            lambda request: StreamingHttpResponse(iter(chunks), content_type='text/event-stream'))
+        assert 'Content-Encoding' not in middleware(request)
+
+    def test_refused_encodings_not_used(self):
+        for header, encoding in (('gzip, deflate, br', 'br'), ('br;q=0, gzip', 'gzip'), ('BR;Q=0.0,gzip;q=0.5', 'gzip'),
+                                 ('gzip;q=1.0, br;q=0.8', 'gzip'), ('br;q=0, gzip;q=0', ''), ('identity', ''),
+                                 ('gzip;q=invalid', '')):
+            request = self.factory.get('/', HTTP_ACCEPT_ENCODING=header)
+            assert accepted_encoding(request) == encoding, header
+
+    def test_only_compressible_types_compressed(self):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip')
+        content = b'%PDF-1.7\n' + b'0' * 10000
+        middleware = CompressionMiddleware(
+            lambda request: FileResponse(io.BytesIO(content), content_type='application/pdf'))
+        response = middleware(request)
+        assert 'Content-Encoding' not in response
+        assert b''.join(response.streaming_content) == content
+
+        middleware = CompressionMiddleware(lambda request: JsonResponse({'data': ['0' * 10000]}))
+        assert middleware(request)['Content-Encoding'] == 'gzip'
+
+
+class TestWarmUp(TestCase):
+    def test_warm_up(self):
+        templates_dir = settings.BASE_DIR / 'templates'
+        template_names = [path.relative_to(templates_dir).as_posix() for path in templates_dir.rglob('*.*')]
+        report = warmup.warm_up()
+        assert report.templates > len(template_names)
+        assert report.urls == len([pattern for namespace in warmup.NAMESPACES
+                                   for pattern in get_resolver().namespace_dict[namespace][1].url_patterns])
+
+        cached_loader = engines['django'].engine.template_loaders[0]
+        # misses are cached as exceptions
+        assert set(template_names) <= {template.origin.template_name for template in
+                                       cached_loader.get_template_cache.values() if isinstance(template, Template)}
+
+        out = StringIO()
+        call_command('warmup', stdout=out)
+        assert f'Compiled {report.templates} templates and reversed {report.urls} URLs' in out.getvalue()
+
+
+class TestProductionSettings(TestCase):
+    def test_secret_key_required(self):
+        environ = {**os.environ, 'DJANGO_ENV': 'production'}
+        environ.pop('SECRET_KEY', None)
+        command = [sys.executable, '-c', 'import app.settings']
+        result = subprocess.run(command, cwd=settings.BASE_DIR, env=environ, capture_output=True, text=True)
+        assert result.returncode != 0
+        assert 'ImproperlyConfigured' in result.stderr
+        environ['SECRET_KEY'] = 'not-the-development-key'
+        assert subprocess.run(command, cwd=settings.BASE_DIR, env=environ).returncode == 0
+
+
+class TestStartupProfile(TestCase):
+    def test_parse_importtime(self):
+        lines = ['import time: self [us] | cumulative | imported package',
+                 'import time:        10 |         10 |     phonenumbers.util',
+                 'import time:        20 |         30 |   phonenumbers',
+                 'import time:         5 |          5 |   json',
+                 'Invalid HTTP_HOST header',
+                 'import time:         1 |         36 | phonenumber_field',
+                 'import time:         2 |          2 | app']
+        phonenumber_field, app = startup.parse_importtime(lines)
+        assert (phonenumber_field.name, phonenumber_field.self_us, phonenumber_field.cumulative_us) == \
+               ('phonenumber_field', 1, 36)
+        assert [node.name for node in phonenumber_field.children] == ['phonenumbers', 'json']
+        assert phonenumber_field.children[0].children[0].name == 'phonenumbers.util'
+        assert app.children == []
+
+    def test_startup_profile_command(self):
+        out = StringIO()
+        call_command('startup_profile', url='/', min_ms=1, stdout=out)
+        output = out.getvalue()
+        assert 'app registry ready' in output
+        assert 'request 1 /' in output and '(200)' in output
+        assert 'phonenumber_field.modelfields' in output
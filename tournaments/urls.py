@@ -8,10 +8,25 @@ app_name = 'tournaments'
 urlpatterns = [
     path('', views.list_tournament, name='list'),
     path('create-tournament/', views.create_tournament, name='create'),
+    path('build-season/', views.build_season, name='build-season'),
     path('create-course/', views.create_course, name='create-course'),
     path('delete/', views.delete_tournaments, name='delete'),
+    path('statistics/', views.get_statistics, name='statistics'),
+    path('nearby/', views.nearby_tournaments, name='nearby'),
+    path('calendar/<str:token>/all.ics', views.calendar_feed, {'personal': False}, name='calendar-all'),
+    path('calendar/<str:token>.ics', views.calendar_feed, name='calendar'),
+    path('standings/', views.season_standings, name='standings'),
+    path('standings/<int:year>/', views.season_standings, name='standings'),
+    path('history/', views.season_history, name='history'),
+    path('history/<int:year>/', views.season_history, name='history'),
     path('<int:pk>/<str:detail_page>', views.get_tournament_detail, name='detail'),
     path('<int:pk>/edit/', views.edit_tournament, name='edit'),
+    path('<int:pk>/scores/', views.enter_scores, name='scores'),
+    path('<int:pk>/import/', views.import_competitors, name='import'),
+    path('<int:pk>/finalise/', views.finalise_results, name='finalise'),
+    path('<int:pk>/print/', views.print_documents, name='print'),
+    path('<int:pk>/leaderboard/', views.get_leaderboard, name='leaderboard'),
+    path('<int:pk>/leaderboard/stream/', views.leaderboard_stream, name='leaderboard-stream'),
 ]
 
 htmx_urlpatterns = [
@@ -1,30 +1,115 @@
+import functools
 import itertools
-import random
+import operator
 import datetime
 import statistics
+from decimal import Decimal, InvalidOperation
+from typing import List, Optional
 
-from django.db.models import QuerySet
+from django.db import IntegrityError, transaction
+from django.db.models import Q, QuerySet
 from django.utils.text import slugify
 
+# longest suffix appended to a slug to make it unique, e.g. "-99999"
+SLUG_SUFFIX_LENGTH = 6
+# attempts to save an allocated slug taken meanwhile by a concurrent insert
+SLUG_SAVE_ATTEMPTS = 3
+
 
 def slugify_instance_str(instance, save=False, new_slug=None):
-    if new_slug is not None:
-        slug = new_slug
-    else:
-        slug = slugify(instance.__str__())
-    Klass = instance.__class__
-    qs = Klass.objects.filter(slug=slug).exclude(id=instance.id)
-    if qs.exists():
-        # auto generate new slug
-        rand_int = random.randint(300_000, 500_000)
-        slug = f"{slug}-{rand_int}"
-        return slugify_instance_str(instance, save=save, new_slug=slug)
-    instance.slug = slug
-    if save:
-        instance.save()
+    """ Give the instance the first free slug based on its string (or on `new_slug`): `name`, `name-2`, ...
+
+    The free slug is found with a single query. When saving, a slug taken in the meantime by a concurrent insert is
+    rejected by the unique constraint and the next free one is allocated.
+    """
+    base = new_slug if new_slug is not None else slugify(instance.__str__())
+    base = base or instance._meta.model_name
+    others = instance.__class__.objects.exclude(pk=instance.pk)
+    for attempt in range(1, SLUG_SAVE_ATTEMPTS + 1):
+        instance.slug = unique_slugs(others, [base])[0]
+        if not save:
+            break
+        try:
+            with transaction.atomic():
+                instance.save()
+            break
+        except IntegrityError:
+            if attempt == SLUG_SAVE_ATTEMPTS or not others.filter(slug=instance.slug).exists():
+                raise
     return instance
 
 
+def backfill_slugs(queryset: QuerySet, batch_size: int = 500) -> int:
+    """ Give a slug to all the rows of the queryset without one, return the number of rows updated. """
+    instances = list(queryset.filter(Q(slug__isnull=True) | Q(slug='')).order_by('pk'))
+    if not instances:
+        return 0
+    model = queryset.model
+    bases = [slugify(str(instance)) or model._meta.model_name for instance in instances]
+    for attempt in range(1, SLUG_SAVE_ATTEMPTS + 1):
+        for instance, slug in zip(instances, unique_slugs(model.objects.all(), bases)):
+            instance.slug = slug
+        try:
+            with transaction.atomic():
+                model.objects.bulk_update(instances, ['slug'], batch_size=batch_size)
+            break
+        except IntegrityError:
+            if attempt == SLUG_SAVE_ATTEMPTS:
+                raise
+    return len(instances)
+
+
+def _slug_candidates(base: str, max_length: int):
+    """ The base slug then `base-2`, `base-3`, ... all truncated to `max_length`. """
+    yield base[:max_length]
+    number = 2
+    while True:
+        suffix = f'-{number}'
+        yield f'{base[:max_length - len(suffix)]}{suffix}'
+        number += 1
+
+
+def unique_slugs(queryset: QuerySet, base_slugs: List[str]) -> List[str]:
+    """ First free slug for each of the base slugs, with a single query whatever the number of slugs.
+
+    All the candidates of a base start with the same stem: the slugs taken are fetched with one range query per stem
+    on the unique (so indexed) slug column. Slugs only contain ASCII letters, digits, "-" and "_", all sorting
+    before "~".
+    """
+    max_length = queryset.model._meta.get_field('slug').max_length
+    stems = {base[:max_length - SLUG_SUFFIX_LENGTH] for base in base_slugs}
+    if not stems:
+        return []
+    prefix_filter = functools.reduce(operator.or_, [Q(slug__gte=stem, slug__lt=f'{stem}~') for stem in stems])
+    taken = set(queryset.filter(prefix_filter).values_list('slug', flat=True))
+    slugs = []
+    for base in base_slugs:
+        slug = next(candidate for candidate in _slug_candidates(base, max_length) if candidate not in taken)
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def parse_strokes(value: Optional[str]) -> Optional[int]:
+    """ Number of strokes entered on a score card, None for a hole left blank. """
+    if value is None or not value.strip():
+        return None
+    if not value.strip().isdigit() or not 1 <= int(value) <= 20:
+        raise ValueError(f"Invalid number of strokes: {value}")
+    return int(value)
+
+
+def parse_handicap(value: Optional[str]) -> Decimal:
+    """ Handicap index given as text, e.g. in an imported file: a decimal number from 0 to 54 with one decimal. """
+    try:
+        hcp = Decimal((value or '').strip().replace(',', '.'))
+    except InvalidOperation:
+        raise ValueError(f"Invalid handicap: {value}") from None
+    if not hcp.is_finite() or not 0 <= hcp <= 54 or hcp != hcp.quantize(Decimal('0.1')):
+        raise ValueError(f"Invalid handicap: {value}")
+    return hcp.quantize(Decimal('0.1'))
+
+
 def stringify_time_delta(date: datetime.date) -> str:
     current_time = datetime.datetime.now(tz=datetime.timezone.utc)  # This is timezone-aware
     time_difference = current_time - date
@@ -44,9 +129,16 @@ def stringify_time_delta(date: datetime.date) -> str:
         return f"{date.strftime('%d.%m.%Y')}"
 
 
-def order_flights_by_handicap(competitors: QuerySet):
-    # convert QuerySet to list if competitors is QuerySet
-    competitors = list(competitors.order_by('hcp'))
+def _sorted_by_handicap(competitors) -> list:
+    """ The competitors by ascending handicap: ordered by the database for a QuerySet, in memory for the competitors
+    already loaded. """
+    if isinstance(competitors, QuerySet):
+        return list(competitors.order_by('hcp'))
+    return sorted(competitors, key=operator.attrgetter('hcp'))
+
+
+def order_flights_by_handicap(competitors):
+    competitors = _sorted_by_handicap(competitors)
 
     flights = []
     remainder = len(competitors) % 3
@@ -68,18 +160,18 @@ def get_flight_avg(flight):
     return statistics.mean(hcp_values)
 
 
-def form_basic_high_mid_low_flights(competitors: QuerySet):
+def form_basic_high_mid_low_flights(competitors):
     """ Basic strategy to form the 'HML' flights """
     flights = []
-    competitors = competitors.order_by('hcp')
-    competitors_as_list = list(competitors)
+    competitors_as_list = _sorted_by_handicap(competitors)
+    count = len(competitors_as_list)
 
-    nr_flights = competitors.count() // 3
-    if competitors.count() % 3 != 0:
+    nr_flights = count // 3
+    if count % 3 != 0:
         nr_flights += 1
 
         # First flight is constituted of the best hcp player with a mid-hcp player
-        first_flight = (competitors_as_list.pop(0), competitors_as_list.pop(competitors.count() // 2))
+        first_flight = (competitors_as_list.pop(0), competitors_as_list.pop(count // 2))
         flights.append(first_flight)
 
     while True:
@@ -95,6 +187,13 @@ def form_basic_high_mid_low_flights(competitors: QuerySet):
     return flights
 
 
+# strategies of the flight composition form, each taking the competitors as a QuerySet or a list
+FLIGHT_STRATEGIES = {
+    'SortByHcp': order_flights_by_handicap,
+    'HighMediumLow': form_basic_high_mid_low_flights,
+}
+
+
 def form_high_middle_low_flights(competitors: QuerySet):
     """ Form flights of competitor, each flight should be constituted of high-mid-low handicap players
     :param competitors: The competitors to form flights
@@ -1,30 +1,53 @@
+import io
 from datetime import datetime
 
+from asgiref.sync import sync_to_async
+
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required, user_passes_test
+from django.core import signing
+from django.db.models import Count
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, \
+    StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
 
-from accounts.models import UserProfile
-from tournaments import utils
-from tournaments.forms import TournamentForm, GolfCourseForm
-from tournaments.models import Tournament, Competitor
+from accounts import registrations
+from tournaments import utils, scoring, leaderboard, merit, stats, ical, schedule, geo
+from tournaments.forms import TournamentForm, GolfCourseForm, CompetitorImportForm, SeasonBuilderForm, NearbyForm
+from tournaments.models import Tournament, Competitor, HoleScore, Season, SeasonStanding, SeasonArchive
 from tournaments.utils import slugify_instance_str
 
+# longer error reports are truncated on the page
+IMPORT_ERRORS_SHOWN = 500
+# courses listed by the "near me" search, whatever their distance
+NEAREST_COURSES = 5
+
 
 @login_required
 def list_tournament(request):
     filter_type = request.GET.get('type')
     current_year = datetime.now().year
+    tournament_qs = Tournament.objects.filter(is_archived=False)
     if filter_type == 'past':
-        tournament_qs = Tournament.objects.filter(date__lt=datetime.today()).order_by('date')
+        tournament_qs = tournament_qs.filter(date__lt=datetime.today()).order_by('date')
     elif filter_type == 'upcoming':
-        tournament_qs = Tournament.objects.filter(date__gte=datetime.today()).order_by('date')
+        tournament_qs = tournament_qs.filter(date__gte=datetime.today()).order_by('date')
+    elif filter_type == 'archived' and request.user.is_superuser:
+        tournament_qs = Tournament.objects.filter(is_archived=True).order_by('-date')
     else:
-        tournament_qs = Tournament.objects.filter(date__year=current_year).order_by('date')
+        tournament_qs = tournament_qs.filter(date__year=current_year).order_by('date')
         pass
+    profile = request.profile
     context = {
-        'object_list': tournament_qs,
+        # the courses and the participants count (of the "full" badges) are loaded by the same query
+        'object_list': tournament_qs.select_related('course').annotate(participants_count=Count('participants')),
         'current_year': current_year,
+        'today': timezone.now().date(),
+        'registered_ids': registrations.registered_tournament_ids(profile.pk) if profile else frozenset(),
+        'calendar_token': ical.feed_token(profile.pk) if profile else None,
     }
     return render(request, 'tournaments/list.html', context)
 
@@ -36,11 +59,26 @@ def create_tournament(request):
     context = {'form': form}
     if form.is_valid():
         tournament = form.save(commit=False)
-        tournament.slug = slugify_instance_str(tournament, save=True)
+        slugify_instance_str(tournament, save=True)
         return redirect('tournaments:list')
     return render(request, 'tournaments/create-update.html', context)
 
 
+@user_passes_test(lambda usr: usr.is_superuser)
+@staff_member_required
+def build_season(request):
+    form = SeasonBuilderForm(request.POST or None)
+    context = {'form': form}
+    if form.is_valid():
+        # the series is planned again on creation: slugs may have been taken since the preview
+        planned = schedule.plan_season(form.cleaned_data)
+        if 'create' in request.POST:
+            schedule.create_season(planned)
+            return redirect('tournaments:list')
+        context['planned'] = planned
+    return render(request, 'tournaments/season-builder.html', context)
+
+
 @user_passes_test(lambda usr: usr.is_superuser)
 @staff_member_required
 def create_course(request):
@@ -73,50 +111,239 @@ def edit_tournament(request, pk=None):
 @user_passes_test(lambda usr: usr.is_superuser)
 @staff_member_required
 def delete_tournaments(request):
+    # imported by the views using them only, not at the boot of every worker
+    from tournaments import deletion
+
     if request.method == 'POST':
         tournament_ids = request.POST.getlist('delete-checkboxes')
-        qs = Tournament.objects.filter(pk__in=tournament_ids)
-        qs.delete()
+        if 'archive' in request.POST:
+            deletion.archive_tournaments(tournament_ids)
+        else:
+            deletion.delete_tournaments(tournament_ids)
     return redirect('tournaments:list')
 
 
+def _competitors_and_flights(tournament_pk, flight_composition: str) -> dict:
+    """ The competitors table and the flights, formed from the same query. """
+    competitors = (Competitor.objects.filter(tournament__id=tournament_pk)
+                   .select_related('user_profile__user').order_by('registration_date'))
+    form_flights = utils.FLIGHT_STRATEGIES.get(flight_composition)
+    return {'competitors': competitors, 'flights': form_flights(list(competitors)) if form_flights else []}
+
+
 @login_required
 def get_tournament_detail(request, pk, detail_page):
     # construct the template path
     template_name = f'tournaments/partials/{detail_page}.html'
-    tournament = get_object_or_404(Tournament, pk=pk)
-    course = tournament.course
-    user = UserProfile.objects.get(user=request.user)
+    tournament = get_object_or_404(Tournament.objects.select_related('course'), pk=pk)
     context = {'detail_template': template_name,
                "object": tournament,
-               "course": course,
-               "is_registered": user.is_registered(tournament.pk)}
+               "course": tournament.course}
     if detail_page == 'participants':
         # only if is staff user
         if request.user.is_staff:
-            # now retrieve and order Competitor models
-            competitors = tournament.competitor_set.order_by('registration_date')
-            context['competitors'] = competitors
+            context.update(_competitors_and_flights(tournament.pk, 'SortByHcp'))
         else:
             return redirect('tournaments:detail', pk=tournament.pk, detail_page='overview')
-    return render(request, 'tournaments/details.html', context)
+    else:
+        user = request.profile
+        context['is_registered'] = user.is_registered(tournament.pk)
+        context['is_waitlisted'] = tournament.waitlist.filter(user_profile=user).exists()
+    if request.htmx and not request.htmx.history_restore_request:
+        # switch between the tabs: only the content of the tab is swapped
+        response = render(request, template_name, context)
+    else:
+        response = render(request, 'tournaments/details.html', context)
+    patch_vary_headers(response, ('HX-Request',))
+    return response
 
 
+# the names and handicaps of the participants: staff only, as the participants tab
+@login_required
+@user_passes_test(lambda usr: usr.is_staff)
 def fetch_flights(request):
     tournament_pk = request.GET.get('tpk')
     flight_composition = request.GET.get('FlightStrat')
-    competitors = Competitor.objects.filter(tournament__id=tournament_pk)
-    flights = {}
-    if flight_composition == 'SortByHcp':
-        flights = utils.order_flights_by_handicap(competitors)
-    if flight_composition == 'HighMediumLow':
-        flights = utils.form_basic_high_mid_low_flights(competitors)
-    context = {'flights': flights}
+    competitors = Competitor.objects.filter(tournament__id=tournament_pk).select_related('user_profile')
+    form_flights = utils.FLIGHT_STRATEGIES.get(flight_composition)
+    context = {'flights': form_flights(competitors) if form_flights else []}
     return render(request, 'tournaments/partials/flights.html', context=context)
 
 
+@login_required
+@user_passes_test(lambda usr: usr.is_staff)
 def fetch_competitors(request):
-    tournament_pk = request.GET.get('tpk')
-    competitors = Competitor.objects.filter(tournament__id=tournament_pk).order_by('registration_date')
-    context = {'competitors': competitors}
-    return render(request, 'tournaments/partials/competitors.html', context=context)
+    """ Refresh of the participants tab: the competitors table, and the flights swapped out of band. """
+    context = _competitors_and_flights(request.GET.get('tpk'), request.GET.get('FlightStrat', 'SortByHcp'))
+    return render(request, 'tournaments/partials/competitors-refresh.html', context=context)
+
+
+@staff_member_required
+def enter_scores(request, pk):
+    tournament = get_object_or_404(Tournament.objects.select_related('course'), pk=pk)
+    competitors = {competitor.pk: competitor for competitor in
+                   tournament.competitor_set.select_related('user_profile').order_by('user_profile__family_name')}
+    holes = range(1, scoring.HOLES + 1)
+    context = {'object': tournament, 'holes': holes}
+    results = []
+    try:
+        if request.method == 'POST':
+            cards = {pk: [utils.parse_strokes(request.POST.get(f'c{pk}-{hole}')) for hole in holes]
+                     for pk in competitors}
+            results = scoring.save_hole_scores(tournament, cards)
+            context['message'] = 'Scores saved successfully'
+        else:
+            results = scoring.compute_results(tournament)
+    except ValueError as error:
+        context['error'] = str(error)
+
+    strokes = {pk: [None] * scoring.HOLES for pk in competitors}
+    hole_scores = HoleScore.objects.filter(score__competitor__tournament=tournament)
+    for competitor_id, hole_number, hole_strokes in hole_scores.values_list('score__competitor_id', 'hole_number',
+                                                                            'strokes'):
+        strokes[competitor_id][hole_number - 1] = hole_strokes
+    context['cards'] = [(competitor, strokes[pk]) for pk, competitor in competitors.items()]
+    context['results'] = [(competitors[result.competitor_id], result) for result in results]
+    return render(request, 'tournaments/scores.html', context)
+
+
+@staff_member_required
+def import_competitors(request, pk):
+    from tournaments import imports
+
+    tournament = get_object_or_404(Tournament.objects.select_related('course'), pk=pk)
+    form = CompetitorImportForm(request.POST or None, request.FILES or None)
+    context = {'object': tournament, 'form': form}
+    if request.method == 'POST' and form.is_valid():
+        report = imports.import_competitors(tournament, request.FILES['file'], dry_run=form.cleaned_data['dry_run'])
+        context['report'] = report
+        context['errors'] = report.errors[:IMPORT_ERRORS_SHOWN]
+    return render(request, 'tournaments/import.html', context)
+
+
+@staff_member_required
+def print_documents(request, pk):
+    """ Scorecards of the flights and start sheet as one PDF, streamed in blocks by `FileResponse`. """
+    from tournaments import printing
+
+    tournament = get_object_or_404(Tournament.objects.select_related('course'), pk=pk)
+    strategy = request.GET.get('FlightStrat', 'SortByHcp')
+    if strategy not in utils.FLIGHT_STRATEGIES:
+        return HttpResponseBadRequest(f'Unknown flight composition: {strategy}')
+    try:
+        document = printing.get_document(tournament, strategy)
+    except IndexError:
+        return HttpResponseBadRequest('The flights cannot be formed with this number of competitors.')
+    response = get_conditional_response(request, etag=document.etag)
+    if response is None:
+        response = FileResponse(io.BytesIO(document.content), content_type='application/pdf',
+                                filename=f'scorecards-{tournament.slug or tournament.pk}.pdf')
+    response['ETag'] = document.etag
+    return response
+
+
+@login_required
+def get_leaderboard(request, pk):
+    tournament = get_object_or_404(Tournament.objects.select_related('course'), pk=pk)
+    rows = leaderboard.leaderboard_rows(tournament.pk)
+    # one row per possible rank so that the streamed rank changes can be swapped in place
+    positions = max(len(rows), tournament.competitor_set.count())
+    rows += [leaderboard.empty_row(rank) for rank in range(len(rows) + 1, positions + 1)]
+    if request.htmx:
+        # rows polled by the page when the server cannot stream them
+        response = render(request, 'tournaments/partials/leaderboard-rows.html', {'rows': rows})
+    else:
+        context = {'object': tournament, 'rows': rows, 'stream': leaderboard.can_stream(request),
+                   'refresh_interval': leaderboard.REFRESH_INTERVAL}
+        response = render(request, 'tournaments/leaderboard.html', context)
+    patch_vary_headers(response, ('HX-Request',))
+    return response
+
+
+# Served as an infinite stream: this view needs an ASGI server (app.asgi), a WSGI server would buffer it.
+async def leaderboard_stream(request, pk):
+    is_authenticated = await sync_to_async(lambda: request.user.is_authenticated)()
+    if not is_authenticated:
+        return HttpResponseForbidden()
+    if not leaderboard.can_stream(request):
+        # tells the EventSource of the browser not to reconnect, the page polls the rows instead
+        return HttpResponse(status=204)
+    if not await Tournament.objects.filter(pk=pk).aexists():
+        raise Http404
+    response = StreamingHttpResponse(leaderboard.stream_leaderboard(pk), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+def nearby_tournaments(request):
+    form = NearbyForm(request.GET or None)
+    context = {'form': form}
+    if form.is_valid():
+        coordinates = form.cleaned_data['coordinates']
+        context['tournaments'] = geo.nearby_tournaments(coordinates, form.cleaned_data['radius'])
+        context['courses'] = geo.nearest_courses(coordinates, NEAREST_COURSES)
+    return render(request, 'tournaments/nearby.html', context)
+
+
+@staff_member_required
+def finalise_results(request, pk):
+    tournament = get_object_or_404(Tournament, pk=pk)
+    if request.method == 'POST':
+        season = merit.finalise_tournament(tournament)
+        return redirect(season.get_absolute_url())
+    return redirect('tournaments:scores', pk=tournament.pk)
+
+
+@login_required
+def season_standings(request, year=None):
+    if year is None:
+        year = datetime.now().year
+    season = Season.objects.filter(year=year).first()
+    standings = (SeasonStanding.objects.filter(season=season).select_related('user_profile')
+                 .order_by('rank', 'user_profile__family_name'))
+    context = {'season': season,
+               'year': year,
+               'standings': standings,
+               'seasons': Season.objects.values_list('year', flat=True).order_by('-year')}
+    return render(request, 'tournaments/standings.html', context)
+
+
+@login_required
+def season_history(request, year=None):
+    from tournaments import archive
+
+    # only the metadata of the archives is read for the list, a snapshot is decompressed when displayed
+    archives = SeasonArchive.objects.defer('data')
+    context = {'archives': archives}
+    if year is not None:
+        season_archive = get_object_or_404(SeasonArchive, year=year)
+        context['year'] = year
+        context['snapshot'] = archive.load_snapshot(season_archive)
+    return render(request, 'tournaments/history.html', context)
+
+
+@staff_member_required
+def get_statistics(request):
+    context = {'statistics': stats.get_statistics()}
+    return render(request, 'tournaments/statistics.html', context)
+
+
+def calendar_feed(request, token, personal=True):
+    # the global feed too: the comments and the participant counts of the tournaments are for the members only
+    try:
+        profile_pk = ical.profile_from_token(token)
+    except signing.BadSignature:
+        raise Http404
+    feed = ical.get_feed(profile_pk if personal else None, request.build_absolute_uri('/'))
+    last_modified = int(feed.last_modified.timestamp()) if feed.last_modified else None
+    response = get_conditional_response(request, etag=feed.etag, last_modified=last_modified)
+    if response is None:
+        response = HttpResponse(feed.content, content_type='text/calendar; charset=utf-8')
+        response['Content-Disposition'] = 'inline; filename="tournaments.ics"'
+    response['ETag'] = feed.etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, max-age=300'
+    return response